@@ -0,0 +1,32 @@
+"""Add composite (course_id, order_index) index on lessons
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+# Écart entre deux clés d'ordre consécutives (voir core/ordering.py)
+ORDER_GAP = 65536
+
+def upgrade() -> None:
+    op.create_index('ix_lessons_course_id_order_index', 'lessons', ['course_id', 'order_index'], unique=False)
+    # Espacer les clés existantes (1, 2, 3...) pour permettre les déplacements sans renumérotation
+    op.execute(
+        sa.text(
+            "UPDATE lessons SET order_index = ranked.position * :gap "
+            "FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY course_id ORDER BY order_index, id) AS position "
+            "FROM lessons) AS ranked "
+            "WHERE lessons.id = ranked.id"
+        ).bindparams(gap=ORDER_GAP)
+    )
+
+def downgrade() -> None:
+    op.drop_index('ix_lessons_course_id_order_index', table_name='lessons')
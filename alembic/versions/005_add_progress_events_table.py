@@ -0,0 +1,39 @@
+"""Add progress_events table partitioned by month
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table('progress_events',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('occurred_at', sa.DateTime(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('module_id', sa.Integer(), nullable=True),
+    sa.Column('lesson_id', sa.Integer(), nullable=True),
+    sa.Column('event_type', sa.Enum('viewed', 'completed', 'time_spent', name='progresseventtype'), nullable=False),
+    sa.Column('duration_seconds', sa.Integer(), nullable=True),
+    sa.Column('received_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['module_id'], ['course_modules.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['lesson_id'], ['lessons.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', 'occurred_at'),
+    postgresql_partition_by='RANGE (occurred_at)'
+    )
+    op.create_index('ix_progress_events_user_id_occurred_at', 'progress_events', ['user_id', 'occurred_at'], unique=False)
+    # Les partitions mensuelles sont créées au démarrage de l'API (core/progress.ensure_partitions)
+    op.execute('CREATE TABLE progress_events_default PARTITION OF progress_events DEFAULT')
+
+def downgrade() -> None:
+    op.drop_index('ix_progress_events_user_id_occurred_at', table_name='progress_events')
+    op.drop_table('progress_events')
+    op.execute('DROP TYPE progresseventtype')
@@ -0,0 +1,20 @@
+"""Add version column to course_modules for partial content updates
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.add_column('course_modules', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+def downgrade() -> None:
+    op.drop_column('course_modules', 'version')
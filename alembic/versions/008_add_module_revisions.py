@@ -0,0 +1,46 @@
+"""Add content_chunks and module_revisions tables for module history
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table('content_chunks',
+    sa.Column('hash', sa.String(length=64), nullable=False),
+    sa.Column('data', sa.Text(), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('hash')
+    )
+    op.create_table('module_revisions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('module_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    # Type déjà créé avec la table course_modules
+    sa.Column('type', postgresql.ENUM('text', 'video', name='moduletype', create_type=False), nullable=False),
+    sa.Column('chunk_hashes', sa.JSON(), nullable=False),
+    sa.Column('content_length', sa.Integer(), nullable=False),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['module_id'], ['course_modules.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('module_id', 'version', name='uq_module_revisions_module_id_version')
+    )
+    op.create_index(op.f('ix_module_revisions_id'), 'module_revisions', ['id'], unique=False)
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_module_revisions_id'), table_name='module_revisions')
+    op.drop_table('module_revisions')
+    op.drop_table('content_chunks')
@@ -0,0 +1,27 @@
+"""Add partial unique index allowing a single admin user
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # La valeur doit être commitée avant d'être utilisée dans le prédicat de l'index
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE roleenum ADD VALUE IF NOT EXISTS 'admin'")
+    op.create_index(
+        'uq_users_single_admin', 'users', ['role'], unique=True,
+        postgresql_where=sa.text("role = 'admin'"),
+    )
+
+def downgrade() -> None:
+    # La valeur 'admin' reste dans le type : PostgreSQL ne sait pas la retirer
+    op.drop_index('uq_users_single_admin', table_name='users')
@@ -0,0 +1,22 @@
+"""Add indexes supporting course catalogue filters and facets
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_index('ix_courses_level_created_at', 'courses', ['level', 'created_at'], unique=False)
+    op.create_index('ix_courses_created_at', 'courses', ['created_at'], unique=False)
+
+def downgrade() -> None:
+    op.drop_index('ix_courses_created_at', table_name='courses')
+    op.drop_index('ix_courses_level_created_at', table_name='courses')
@@ -0,0 +1,77 @@
+"""Partition enrollments by hash of course_id
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+# Doit rester égal à models/enrollment.ENROLLMENT_PARTITIONS
+ENROLLMENT_PARTITIONS = 16
+
+def upgrade() -> None:
+    # Une inscription sans cours n'a pas de partition : plutôt échouer que la perdre
+    orphans = op.get_bind().execute(sa.text('SELECT count(*) FROM enrollments WHERE course_id IS NULL')).scalar()
+    if orphans:
+        raise RuntimeError(
+            f'{orphans} enrollment(s) have no course_id and cannot be partitioned; '
+            'delete or fix them before running this migration'
+        )
+    op.rename_table('enrollments', 'enrollments_unpartitioned')
+    # Les noms d'index (clé primaire comprise) sont uniques dans le schéma
+    op.execute('ALTER TABLE enrollments_unpartitioned RENAME CONSTRAINT enrollments_pkey TO enrollments_unpartitioned_pkey')
+    op.execute('ALTER INDEX ix_enrollments_id RENAME TO ix_enrollments_unpartitioned_id')
+    op.create_table('enrollments',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('enrollments_id_seq')"), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('course_id', sa.Integer(), nullable=False),
+    sa.Column('enrolled_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+    sa.PrimaryKeyConstraint('id', 'course_id'),
+    postgresql_partition_by='HASH (course_id)'
+    )
+    for remainder in range(ENROLLMENT_PARTITIONS):
+        op.execute(
+            f'CREATE TABLE enrollments_p{remainder:02d} PARTITION OF enrollments '
+            f'FOR VALUES WITH (MODULUS {ENROLLMENT_PARTITIONS}, REMAINDER {remainder})'
+        )
+    # La séquence de l'ancienne colonne serial doit survivre à la suppression de sa table
+    op.execute('ALTER SEQUENCE enrollments_id_seq OWNED BY NONE')
+    op.execute(
+        'INSERT INTO enrollments (id, user_id, course_id, enrolled_at) '
+        'SELECT id, user_id, course_id, enrolled_at FROM enrollments_unpartitioned'
+    )
+    op.drop_table('enrollments_unpartitioned')
+    # Index créés après la copie : un seul tri par partition au lieu d'une mise à jour par ligne
+    op.create_index(op.f('ix_enrollments_id'), 'enrollments', ['id'], unique=False)
+    op.create_index('ix_enrollments_course_id_user_id', 'enrollments', ['course_id', 'user_id'], unique=False)
+    op.create_index('ix_enrollments_user_id', 'enrollments', ['user_id'], unique=False)
+    op.execute('ANALYZE enrollments')
+
+def downgrade() -> None:
+    op.rename_table('enrollments', 'enrollments_partitioned')
+    op.execute('ALTER TABLE enrollments_partitioned RENAME CONSTRAINT enrollments_pkey TO enrollments_partitioned_pkey')
+    op.create_table('enrollments',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('enrollments_id_seq')"), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('course_id', sa.Integer(), nullable=True),
+    sa.Column('enrolled_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(
+        'INSERT INTO enrollments (id, user_id, course_id, enrolled_at) '
+        'SELECT id, user_id, course_id, enrolled_at FROM enrollments_partitioned'
+    )
+    op.drop_table('enrollments_partitioned')
+    op.execute('ALTER SEQUENCE enrollments_id_seq OWNED BY enrollments.id')
+    op.create_index(op.f('ix_enrollments_id'), 'enrollments', ['id'], unique=False)
@@ -0,0 +1,26 @@
+"""Add a de-duplication key for queued jobs
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.add_column('jobs', sa.Column('dedupe_key', sa.String(length=200), nullable=True))
+    # Au plus un job en attente par clé ; les jobs en cours ou terminés ne comptent pas
+    op.create_index(
+        'uq_jobs_queued_dedupe_key', 'jobs', ['dedupe_key'], unique=True,
+        postgresql_where=sa.text("status = 'queued'"),
+    )
+
+def downgrade() -> None:
+    op.drop_index('uq_jobs_queued_dedupe_key', table_name='jobs')
+    op.drop_column('jobs', 'dedupe_key')
@@ -0,0 +1,126 @@
+"""Inscriptions : table unique contre table partitionnée par hachage de course_id.
+
+Usage (depuis backend/, PostgreSQL uniquement) :
+    python -m benchmarks.enrollment_partitions --url postgresql://... [--rows 10000000]
+
+Crée deux tables de travail de même contenu (`bench_enrollments_heap` et
+`bench_enrollments_hash`, avec les index du modèle), puis mesure les requêtes
+faites sur les inscriptions : inscrits d'un cours, cours d'un utilisateur,
+nombre d'inscrits par cours (tableau de bord) et lecture incrémentale par id
+(recommandations). Pour chaque requête, le plan indique le nombre de
+partitions effectivement lues. Les tables sont supprimées à la fin, sauf avec
+`--keep`.
+"""
+import argparse
+import json
+import random
+import time
+from sqlalchemy import create_engine, text
+from models.enrollment import ENROLLMENT_PARTITIONS
+
+TABLES = ("bench_enrollments_heap", "bench_enrollments_hash")
+
+QUERIES = {
+    "inscrits d'un cours": "SELECT user_id FROM {table} WHERE course_id = :course_id",
+    "cours d'un utilisateur": "SELECT course_id FROM {table} WHERE user_id = :user_id",
+    "inscrits par cours": "SELECT course_id, count(*) FROM {table} GROUP BY course_id",
+    "lecture incrémentale": "SELECT id, user_id, course_id FROM {table} WHERE id > :after_id ORDER BY id LIMIT 10000",
+}
+
+def _create(connection, rows: int, courses: int, users: int) -> None:
+    for table in TABLES:
+        connection.execute(text(f"DROP TABLE IF EXISTS {table}"))
+    connection.execute(text(
+        "CREATE TABLE bench_enrollments_heap ("
+        "id integer PRIMARY KEY, user_id integer, course_id integer NOT NULL, enrolled_at timestamp)"
+    ))
+    connection.execute(text(
+        "CREATE TABLE bench_enrollments_hash ("
+        "id integer NOT NULL, user_id integer, course_id integer NOT NULL, enrolled_at timestamp, "
+        "PRIMARY KEY (id, course_id)) PARTITION BY HASH (course_id)"
+    ))
+    for remainder in range(ENROLLMENT_PARTITIONS):
+        connection.execute(text(
+            f"CREATE TABLE bench_enrollments_hash_p{remainder:02d} PARTITION OF bench_enrollments_hash "
+            f"FOR VALUES WITH (MODULUS {ENROLLMENT_PARTITIONS}, REMAINDER {remainder})"
+        ))
+    # Popularité des cours très inégale, comme en production
+    connection.execute(text(
+        "INSERT INTO bench_enrollments_heap "
+        "SELECT n, 1 + (random() * :users)::int, 1 + (power(random(), 3) * :courses)::int, "
+        "now() - random() * interval '3 years' FROM generate_series(1, :rows) AS n"
+    ), {"rows": rows, "courses": courses - 1, "users": users - 1})
+    connection.execute(text("INSERT INTO bench_enrollments_hash SELECT * FROM bench_enrollments_heap"))
+    for table in TABLES:
+        connection.execute(text(f"CREATE INDEX ON {table} (course_id, user_id)"))
+        connection.execute(text(f"CREATE INDEX ON {table} (user_id)"))
+        connection.execute(text(f"ANALYZE {table}"))
+
+def _scanned_relations(connection, sql: str, params: dict) -> int:
+    plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    relations = set()
+
+    def walk(node):
+        if "Relation Name" in node:
+            relations.add(node["Relation Name"])
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return len(relations)
+
+def _measure(connection, sql: str, params_for, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        connection.execute(text(sql), params_for()).fetchall()
+    return (time.perf_counter() - start) / iterations * 1000
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", required=True)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--courses", type=int, default=20_000)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    if engine.dialect.name != "postgresql":
+        parser.error("le partitionnement n'existe que sur PostgreSQL")
+
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        _create(connection, args.rows, args.courses, args.users)
+    print(f"{args.rows} inscriptions chargées en {time.perf_counter() - started:.0f} s\n")
+
+    rng = random.Random(42)
+
+    def params_for():
+        return {
+            "course_id": 1 + int(rng.random() ** 3 * (args.courses - 1)),
+            "user_id": rng.randint(1, args.users),
+            "after_id": rng.randint(1, args.rows),
+        }
+
+    try:
+        with engine.connect() as connection:
+            for label, template in QUERIES.items():
+                # L'agrégat complet est bien plus lent : moins d'itérations
+                iterations = 3 if "GROUP BY" in template else args.iterations
+                print(label)
+                for table in TABLES:
+                    sql = template.format(table=table)
+                    relations = _scanned_relations(connection, sql, params_for())
+                    elapsed = _measure(connection, sql, params_for, iterations)
+                    print(f"  {table:<24} {elapsed:9.2f} ms/requête  {relations:>3} relation(s) lue(s)")
+    finally:
+        if not args.keep:
+            with engine.begin() as connection:
+                for table in TABLES:
+                    connection.execute(text(f"DROP TABLE IF EXISTS {table}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Pic de mémoire d'une longue liste : instances ORM contre lignes simples (`core.rows`).
+
+Usage (depuis backend/) :
+    python -m benchmarks.list_memory [--url sqlite:///./bench_list.db] [--rows 50000]
+
+Chaque variante tourne dans un processus neuf, qui mesure son pic de RSS
+(`ru_maxrss`) avant et après avoir produit le corps JSON de la réponse :
+- "orm"  : `db.query(User).all()` puis validation `UserRead` et encodage,
+           comme le faisait `GET /api/auth/admin/users` ;
+- "lean" : `core.rows.iter_json_array`, consommé comme le ferait le serveur.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+from datetime import datetime
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import sessionmaker
+from db import Base
+from models import User, RoleEnum
+
+def _peak_rss_mb() -> float:
+    # Kio sous Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _seed(url: str, rows: int) -> None:
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        existing = connection.execute(select(func.count()).select_from(User)).scalar()
+        now = datetime.utcnow()
+        for start in range(existing, rows, 5000):
+            connection.execute(insert(User), [
+                {
+                    "username": f"user{index}",
+                    "email": f"user{index}@example.com",
+                    "firstname": "Prénom",
+                    "lastname": "Nom",
+                    "hashed_password": "x" * 60,
+                    "role": RoleEnum.student,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for index in range(start, min(start + 5000, rows))
+            ])
+
+def _run(url: str, mode: str) -> None:
+    from core.rows import iter_json_array, lean_select
+    from schemas.user import UserRead
+
+    engine = create_engine(url)
+    db = sessionmaker(bind=engine)()
+    db.execute(select(1))
+    before = _peak_rss_mb()
+    size = 0
+    if mode == "orm":
+        users = db.query(User).order_by(User.id).all()
+        body = json.dumps([UserRead.model_validate(user).model_dump(mode="json") for user in users])
+        size = len(body)
+    else:
+        for chunk in iter_json_array(db, lean_select(UserRead, User).order_by(User.id)):
+            size += len(chunk)
+    print(json.dumps({"before": before, "peak": _peak_rss_mb(), "bytes": size}))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite:///./bench_list.db")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--mode", choices=("orm", "lean"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        _run(args.url, args.mode)
+        return
+
+    _seed(args.url, args.rows)
+    print(f"{args.rows} utilisateurs")
+    for mode in ("orm", "lean"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.list_memory", "--url", args.url, "--mode", mode],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        measure = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"  {mode:<5} pic RSS {measure['peak']:7.1f} Mo "
+            f"(+{measure['peak'] - measure['before']:6.1f} Mo)  réponse {measure['bytes'] / 1e6:5.1f} Mo"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Calibrage de la politique de hachage des mots de passe sur la machine courante.
+
+Usage (depuis backend/) :
+    python -m benchmarks.password_hashing [--scheme bcrypt|argon2] [--target-ms 250]
+
+Cherche le coût le plus élevé dont la vérification d'un mot de passe reste sous
+la durée visée, puis affiche les variables d'environnement correspondantes.
+Pour argon2, la mémoire (`--memory-kib`) est divisée par deux tant qu'un seul
+passage dépasse la cible, puis le nombre de passages est augmenté.
+À lancer sur le matériel de production : le résultat en dépend directement.
+"""
+import argparse
+import time
+from core.security import build_password_context
+
+BCRYPT_MIN_ROUNDS = 4
+BCRYPT_MAX_ROUNDS = 31
+ARGON2_MIN_MEMORY_KIB = 8192
+ARGON2_MAX_TIME_COST = 20
+
+def _verify_ms(context, repeat: int) -> float:
+    hashed = context.hash("calibration-password")
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        context.verify("calibration-password", hashed)
+        timings.append((time.perf_counter() - start) * 1000)
+    # Médiane : peu sensible aux interruptions ponctuelles
+    return sorted(timings)[len(timings) // 2]
+
+def calibrate_bcrypt(target_ms: float, repeat: int) -> dict:
+    best = {"BCRYPT_ROUNDS": BCRYPT_MIN_ROUNDS}
+    for rounds in range(BCRYPT_MIN_ROUNDS, BCRYPT_MAX_ROUNDS + 1):
+        elapsed = _verify_ms(build_password_context("bcrypt", bcrypt_rounds=rounds), repeat)
+        print(f"  rounds={rounds:<3} {elapsed:8.1f} ms")
+        if elapsed > target_ms:
+            break
+        best = {"BCRYPT_ROUNDS": rounds}
+    return best
+
+def calibrate_argon2(target_ms: float, repeat: int, memory_kib: int, parallelism: int) -> dict:
+    def measure(time_cost: int, memory: int) -> float:
+        context = build_password_context(
+            "argon2",
+            argon2_time_cost=time_cost,
+            argon2_memory_cost=memory,
+            argon2_parallelism=parallelism,
+        )
+        elapsed = _verify_ms(context, repeat)
+        print(f"  time_cost={time_cost:<3} memory={memory:>8} KiB {elapsed:8.1f} ms")
+        return elapsed
+
+    while memory_kib > ARGON2_MIN_MEMORY_KIB and measure(1, memory_kib) > target_ms:
+        memory_kib //= 2
+    time_cost = 1
+    while time_cost < ARGON2_MAX_TIME_COST and measure(time_cost + 1, memory_kib) <= target_ms:
+        time_cost += 1
+    return {
+        "ARGON2_TIME_COST": time_cost,
+        "ARGON2_MEMORY_COST_KIB": memory_kib,
+        "ARGON2_PARALLELISM": parallelism,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scheme", choices=("bcrypt", "argon2"), default="bcrypt")
+    parser.add_argument("--target-ms", type=float, default=250)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--memory-kib", type=int, default=65536)
+    parser.add_argument("--parallelism", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{args.scheme} : cible {args.target_ms:.0f} ms par vérification")
+    if args.scheme == "bcrypt":
+        settings = calibrate_bcrypt(args.target_ms, args.repeat)
+    else:
+        settings = calibrate_argon2(args.target_ms, args.repeat, args.memory_kib, args.parallelism)
+    print()
+    print(f"PASSWORD_HASH_SCHEME={args.scheme}")
+    for name, value in settings.items():
+        print(f"{name}={value}")
+
+if __name__ == "__main__":
+    main()
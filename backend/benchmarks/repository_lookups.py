@@ -0,0 +1,74 @@
+"""Coût par appel des recherches fréquentes : `db.query()` contre `core.repository`.
+
+Usage (depuis backend/) :
+    python -m benchmarks.repository_lookups [--url postgresql://...] [--iterations 20000]
+
+Sans `--url`, une base SQLite en mémoire est utilisée : la différence mesurée
+est alors essentiellement le coût de construction et de mise en cache de la
+requête côté Python. Sur PostgreSQL s'ajoute le gain des instructions préparées.
+"""
+import argparse
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from db import Base
+from core import repository
+from models import User, RoleEnum, CourseModule
+from models.module import ModuleType
+
+def _setup(url: str):
+    if url.startswith("sqlite"):
+        engine = create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        engine = create_engine(url)
+    repository.install_prepared_statements(engine)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    if repository.get_user_by_email(session, "bench@example.com") is None:
+        session.add(User(username="bench", email="bench@example.com", hashed_password="x", role=RoleEnum.student))
+        session.add(CourseModule(title="Bench", content="Contenu", type=ModuleType.text))
+        session.commit()
+    module_id = session.query(CourseModule.id).filter(CourseModule.title == "Bench").scalar()
+    return session, module_id
+
+def _measure(label: str, func, iterations: int) -> float:
+    for _ in range(min(iterations, 500)):
+        func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    per_call = (time.perf_counter() - start) / iterations * 1e6
+    print(f"  {label:<12} {per_call:8.1f} µs/appel")
+    return per_call
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite://")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    db, module_id = _setup(args.url)
+    cases = {
+        "user by email": (
+            lambda: db.query(User).filter(User.email == "bench@example.com").first(),
+            lambda: repository.get_user_by_email(db, "bench@example.com"),
+        ),
+        "user by login": (
+            lambda: db.query(User).filter((User.email == "bench") | (User.username == "bench")).first(),
+            lambda: repository.get_user_by_login(db, "bench"),
+        ),
+        "module by id": (
+            lambda: db.query(CourseModule).filter(CourseModule.id == module_id).first(),
+            lambda: repository.get_module(db, module_id),
+        ),
+    }
+    for name, (legacy, lookup) in cases.items():
+        print(name)
+        before = _measure("db.query", legacy, args.iterations)
+        after = _measure("repository", lookup, args.iterations)
+        print(f"  gain         {before - after:8.1f} µs/appel ({(1 - after / before) * 100:.0f} %)")
+    db.close()
+
+if __name__ == "__main__":
+    main()
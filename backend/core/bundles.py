@@ -0,0 +1,137 @@
+"""Paquets hors ligne d'un cours, précalculés sur disque.
+
+Après chaque modification d'un cours, un job rend le cours et toutes ses
+leçons en un seul document JSON (plus sa version gzip), nommé par son
+SHA-256 : `{COURSE_BUNDLE_DIR}/{course_id}/{hash}.json[.gz]`. Le fichier
+`current` du même répertoire contient le hachage du dernier rendu. La lecture
+ne fait que lire ce pointeur puis envoyer le fichier : aucune requête SQL.
+Un rendu identique au précédent ne crée rien ; les anciens paquets sont
+supprimés après le suivant, pour les clients qui les téléchargent encore.
+
+Les rendus d'un même cours sont sérialisés par un verrou de fichier
+(`{course_id}/.lock`), et le cours est lu une fois le verrou obtenu : un rendu
+plus ancien ne peut pas remplacer le pointeur ni supprimer les fichiers d'un
+rendu plus récent. Le premier rendu fait par une requête ne remplace jamais
+un pointeur écrit entre-temps par le job.
+"""
+import fcntl
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from core.jobs import enqueue
+from models.course import Course
+from models.lesson import Lesson
+
+COURSE_BUNDLE_DIR = os.getenv("COURSE_BUNDLE_DIR", "./bundles")
+# Préfixe interne du proxy (nginx : location interne) qui sert COURSE_BUNDLE_DIR
+# avec sendfile ; vide pour envoyer les fichiers depuis l'API
+COURSE_BUNDLE_ACCEL_PREFIX = os.getenv("COURSE_BUNDLE_ACCEL_PREFIX", "")
+
+RENDER_BUNDLE_JOB = "render_course_bundle"
+
+def schedule_render(db: Session, course_id: int, created_by: Optional[int] = None) -> None:
+    """Demander le rendu du paquet après le commit de la transaction courante"""
+    enqueue(db, RENDER_BUNDLE_JOB, {"course_id": course_id}, created_by=created_by)
+
+def _course_dir(course_id: int) -> str:
+    return os.path.join(COURSE_BUNDLE_DIR, str(int(course_id)))
+
+def bundle_path(course_id: int, digest: str, gzipped: bool = False) -> str:
+    return os.path.join(_course_dir(course_id), f"{digest}.json" + (".gz" if gzipped else ""))
+
+def current_hash(course_id: int) -> Optional[str]:
+    try:
+        with open(os.path.join(_course_dir(course_id), "current"), encoding="ascii") as pointer:
+            return pointer.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+@contextmanager
+def _render_lock(directory: str) -> Iterator[None]:
+    os.makedirs(directory, exist_ok=True)
+    # Verrou consultatif, libéré par le système si le processus meurt
+    with open(os.path.join(directory, ".lock"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _write_atomically(path: str, data: bytes) -> None:
+    # Fichier temporaire dans le même répertoire : os.replace reste atomique
+    fd, temporary = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+def _serialize(db: Session, course: Course) -> bytes:
+    lessons = db.execute(
+        select(Lesson.id, Lesson.title, Lesson.content)
+        .where(Lesson.course_id == course.id)
+        .order_by(Lesson.order_index)
+    )
+    # Sans order_index ni date de rendu : une renumérotation ne change pas le paquet
+    document = {
+        "course": {
+            "id": course.id,
+            "title": course.title,
+            "description": course.description,
+            "level": course.level.value,
+        },
+        "lessons": [row._asdict() for row in lessons],
+    }
+    return json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _prune(directory: str, keep: list[str]) -> None:
+    entries = [
+        entry for entry in os.scandir(directory)
+        if entry.name.endswith(".json") and entry.name[:-len(".json")] not in keep
+    ]
+    for entry in entries:
+        for path in (entry.path, entry.path + ".gz"):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+def render_bundle(db: Session, course_id: int, replace: bool = True) -> Optional[str]:
+    """Rendre le paquet du cours et retourner son hachage (None si le cours n'existe plus).
+
+    Avec `replace=False`, un paquet déjà rendu est gardé tel quel.
+    """
+    directory = _course_dir(course_id)
+    course = db.query(Course).filter(Course.id == course_id).first()
+    if course is None:
+        try:
+            os.unlink(os.path.join(directory, "current"))
+        except FileNotFoundError:
+            pass
+        return None
+    with _render_lock(directory):
+        previous = current_hash(course_id)
+        if previous is not None and not replace:
+            return previous
+        # Relu sous le verrou : le rendu reflète au moins l'état vu par le rendu précédent
+        db.refresh(course)
+        return _write_bundle(directory, course_id, _serialize(db, course), previous)
+
+def _write_bundle(directory: str, course_id: int, data: bytes, previous: Optional[str]) -> str:
+    digest = hashlib.sha256(data).hexdigest()
+    if digest == previous:
+        return digest
+    # Le paquet est écrit avant le pointeur : un lecteur ne voit jamais de fichier absent
+    _write_atomically(bundle_path(course_id, digest, gzipped=True), gzip.compress(data, mtime=0))
+    _write_atomically(bundle_path(course_id, digest), data)
+    _write_atomically(os.path.join(directory, "current"), digest.encode("ascii"))
+    _prune(directory, [digest, previous] if previous else [digest])
+    return digest
@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "60"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+
+class TTLCache:
+    """Cache LRU en mémoire avec expiration, partagé par les threads d'un worker"""
+
+    def __init__(self, maxsize: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+# Un cache par espace de noms ; les clés sont les identifiants des lignes
+caches: dict[str, TTLCache] = {
+    "users": TTLCache(),
+    "courses": TTLCache(),
+    "modules": TTLCache(),
+    # Comptes par facette du catalogue non filtré (voir core/catalogue.py)
+    "course_facets": TTLCache(maxsize=1),
+}
+
+def get_cache(namespace: str) -> TTLCache:
+    return caches[namespace]
+
+def evict(namespace: str, key: Optional[Hashable] = None) -> None:
+    """Supprimer une entrée (ou tout l'espace de noms si key est None)"""
+    cache = caches.get(namespace)
+    if cache is None:
+        return
+    if key is None:
+        cache.clear()
+    else:
+        cache.delete(key)
+
+def clear_all() -> None:
+    for cache in caches.values():
+        cache.clear()
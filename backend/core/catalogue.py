@@ -0,0 +1,110 @@
+"""Catalogue de cours filtrable, avec comptes par facette.
+
+Les comptes par niveau et par année de création sont obtenus par une seule
+requête groupée sur (level, année) : chaque facette compte les cours qui
+respectent tous les filtres sauf le sien, pour que l'utilisateur voie ce qu'il
+obtiendrait en changeant de niveau ou d'année. Les comptes du catalogue non
+filtré, demandés à chaque ouverture de la page, sont mis en cache et invalidés
+avec l'espace de noms "courses".
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Integer, cast, extract, func, or_, select
+from sqlalchemy.orm import Session
+from core.cache import evict, get_cache
+from core.invalidation import bus
+from models.course import Course, CourseLevel
+
+_UNFILTERED_KEY = "unfiltered"
+
+@dataclass(frozen=True)
+class CatalogueFilters:
+    level: Optional[CourseLevel] = None
+    year: Optional[int] = None
+    q: Optional[str] = None
+
+    def is_empty(self) -> bool:
+        return self.level is None and self.year is None and not self.q
+
+def _keyword_condition(q: Optional[str]):
+    if not q:
+        return None
+    # "%", "_" et la barre oblique inverse sont cherchés tels quels, pas comme jokers
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    pattern = f"%{escaped}%"
+    return or_(Course.title.ilike(pattern, escape="\\"), Course.description.ilike(pattern, escape="\\"))
+
+def _level_condition(level: Optional[CourseLevel]):
+    return None if level is None else Course.level == level
+
+def _year_condition(year: Optional[int]):
+    if year is None:
+        return None
+    # Intervalle sur created_at plutôt qu'extract() : l'index reste utilisable
+    return (Course.created_at >= datetime(year, 1, 1)) & (Course.created_at < datetime(year + 1, 1, 1))
+
+def _conditions(filters: CatalogueFilters) -> list:
+    conditions = [
+        _keyword_condition(filters.q),
+        _level_condition(filters.level),
+        _year_condition(filters.year),
+    ]
+    return [condition for condition in conditions if condition is not None]
+
+def _compute_facets(db: Session, filters: CatalogueFilters) -> dict:
+    level_condition = _level_condition(filters.level)
+    year_condition = _year_condition(filters.year)
+    year = cast(extract("year", Course.created_at), Integer)
+    statement = select(Course.level, year, func.count()).group_by(Course.level, year)
+    keyword = _keyword_condition(filters.q)
+    if keyword is not None:
+        statement = statement.where(keyword)
+    # Une ligne ne sert qu'à une facette dont elle respecte les autres filtres
+    if level_condition is not None and year_condition is not None:
+        statement = statement.where(or_(level_condition, year_condition))
+
+    levels = {level.value: 0 for level in CourseLevel}
+    years: dict[str, int] = {}
+    total = 0
+    for level, created_year, count in db.execute(statement):
+        level_matches = filters.level is None or level == filters.level
+        year_matches = filters.year is None or created_year == filters.year
+        if year_matches:
+            levels[level.value] += count
+        if level_matches and created_year is not None:
+            years[str(created_year)] = years.get(str(created_year), 0) + count
+        if level_matches and year_matches:
+            total += count
+    return {
+        "total": total,
+        "facets": {"level": levels, "year": dict(sorted(years.items(), reverse=True))},
+    }
+
+def facet_counts(db: Session, filters: CatalogueFilters) -> dict:
+    """Nombre de cours correspondant aux filtres et comptes par facette"""
+    if not filters.is_empty():
+        return _compute_facets(db, filters)
+    cache = get_cache("course_facets")
+    cached = cache.get(_UNFILTERED_KEY)
+    if cached is None:
+        cached = _compute_facets(db, filters)
+        cache.set(_UNFILTERED_KEY, cached)
+    return cached
+
+def search_courses(db: Session, filters: CatalogueFilters, limit: int, offset: int = 0) -> list:
+    """Page de cours correspondant aux filtres, les plus récents d'abord"""
+    statement = (
+        select(Course.id, Course.title, Course.description, Course.level)
+        .where(*_conditions(filters))
+        .order_by(Course.created_at.desc(), Course.id.desc())
+        .limit(limit)
+        .offset(offset)
+    )
+    return db.execute(statement).all()
+
+def _evict_facets(namespace, key=None) -> None:
+    if namespace == "courses":
+        evict("course_facets")
+
+bus.subscribe(_evict_facets)
@@ -0,0 +1,144 @@
+"""Export et import d'un cours sous forme d'archive NDJSON compressée (gzip).
+
+Une ligne JSON par enregistrement, dans cet ordre :
+    {"type": "header", "format": "elearning-course", "version": 1}
+    {"type": "course", "data": {...}}
+    {"type": "lesson", "data": {...}}   (une par leçon, par order_index croissant)
+
+L'export lit les leçons par un curseur côté serveur et compresse au fil de
+l'eau ; l'import décompresse et analyse l'archive ligne par ligne et insère
+les leçons par lots. Dans les deux sens, la mémoire utilisée ne dépend pas de
+la taille du cours. Les identifiants ne sont pas exportés : l'import crée un
+nouveau cours.
+"""
+import gzip
+import io
+import json
+import os
+import zlib
+from datetime import datetime
+from typing import IO, Iterator
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from models.course import Course
+from models.lesson import Lesson
+from schemas.course_archive import ArchivedCourse, ArchivedLesson
+
+ARCHIVE_FORMAT = "elearning-course"
+ARCHIVE_VERSION = 1
+COURSE_ARCHIVE_BATCH_SIZE = int(os.getenv("COURSE_ARCHIVE_BATCH_SIZE", "1000"))
+# Taille des blocs compressés envoyés au client
+_FLUSH_BYTES = 64 * 1024
+
+class ArchiveError(ValueError):
+    """Archive illisible ou invalide ; le message indique la ligne fautive"""
+
+def _line(record_type: str, data: dict) -> bytes:
+    return json.dumps({"type": record_type, "data": data}, ensure_ascii=False, default=_encode).encode("utf-8") + b"\n"
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def export_course(db: Session, course: Course, batch_size: int = COURSE_ARCHIVE_BATCH_SIZE) -> Iterator[bytes]:
+    """Blocs gzip de l'archive du cours, produits à mesure de la lecture des leçons"""
+    # wbits=31 : en-tête et somme de contrôle gzip
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    pending: list[bytes] = []
+    size = 0
+
+    def push(line: bytes):
+        nonlocal size
+        pending.append(line)
+        size += len(line)
+        if size < _FLUSH_BYTES:
+            return b""
+        block = compressor.compress(b"".join(pending))
+        pending.clear()
+        size = 0
+        return block
+
+    header = json.dumps({"type": "header", "format": ARCHIVE_FORMAT, "version": ARCHIVE_VERSION}).encode() + b"\n"
+    push(header)
+    push(_line("course", {
+        "title": course.title,
+        "description": course.description,
+        "level": course.level.value,
+        "created_at": course.created_at,
+    }))
+
+    # stream_results : curseur nommé sur PostgreSQL, les lignes arrivent par lots
+    result = db.execute(
+        select(Lesson.title, Lesson.content, Lesson.order_index, Lesson.created_at)
+        .where(Lesson.course_id == course.id)
+        .order_by(Lesson.order_index)
+        .execution_options(stream_results=True, yield_per=batch_size)
+    )
+    for rows in result.partitions():
+        for row in rows:
+            block = push(_line("lesson", row._asdict()))
+            if block:
+                yield block
+    block = compressor.compress(b"".join(pending)) + compressor.flush()
+    if block:
+        yield block
+
+def _records(binary: IO[bytes]) -> Iterator[tuple[int, dict]]:
+    try:
+        lines = io.TextIOWrapper(gzip.GzipFile(fileobj=binary, mode="rb"), encoding="utf-8")
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                raise ArchiveError(f"Line {line_number}: invalid JSON ({exc})")
+            if not isinstance(record, dict):
+                raise ArchiveError(f"Line {line_number}: each line must be a JSON object")
+            yield line_number, record
+    except (OSError, EOFError, UnicodeDecodeError, zlib.error) as exc:
+        raise ArchiveError(f"Unreadable archive: {exc}")
+
+def _validate(model, line_number: int, record: dict):
+    try:
+        return model(**(record.get("data") or {}))
+    except ValidationError as exc:
+        details = "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors())
+        raise ArchiveError(f"Line {line_number}: {details}")
+
+def import_course(db: Session, binary: IO[bytes], batch_size: int = COURSE_ARCHIVE_BATCH_SIZE) -> dict:
+    """Créer un cours et ses leçons depuis une archive (sans commiter)"""
+    records = _records(binary)
+    line_number, header = next(records, (1, {}))
+    if header.get("type") != "header" or header.get("format") != ARCHIVE_FORMAT:
+        raise ArchiveError(f"Line {line_number}: missing {ARCHIVE_FORMAT} header")
+    if header.get("version") != ARCHIVE_VERSION:
+        raise ArchiveError(f"Line {line_number}: unsupported archive version {header.get('version')}")
+
+    line_number, record = next(records, (line_number + 1, {}))
+    if record.get("type") != "course":
+        raise ArchiveError(f"Line {line_number}: expected the course record")
+    course = _validate(ArchivedCourse, line_number, record)
+    # Date d'origine conservée quand l'archive la fournit
+    imported_at = datetime.utcnow()
+    values = {**course.model_dump(), "created_at": course.created_at or imported_at}
+    course_id = db.execute(insert(Course).values(**values).returning(Course.id)).scalar_one()
+
+    count = 0
+    batch: list[dict] = []
+    for line_number, record in records:
+        if record.get("type") != "lesson":
+            raise ArchiveError(f"Line {line_number}: unexpected record type {record.get('type')!r}")
+        lesson = _validate(ArchivedLesson, line_number, record)
+        # Mêmes clés pour chaque ligne : le lot part en une seule exécution groupée
+        batch.append({**lesson.model_dump(), "course_id": course_id, "created_at": lesson.created_at or imported_at})
+        if len(batch) >= batch_size:
+            db.execute(insert(Lesson), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        db.execute(insert(Lesson), batch)
+        count += len(batch)
+    return {"course_id": course_id, "lessons": count}
@@ -0,0 +1,119 @@
+"""Diffusion des changements du catalogue aux clients connectés (Server-Sent Events).
+
+Le diffuseur s'abonne au bus d'invalidation : il reçoit donc, après commit,
+les changements faits par ce worker comme ceux relayés par `pg_notify` depuis
+les autres. Chaque événement est converti une seule fois puis distribué dans
+la boucle asyncio à une file par connexion ; aucune connexion n'occupe de
+thread. Un client trop lent pour vider sa file est déconnecté ; à la
+reconnexion il rattrape les événements manqués grâce à `Last-Event-ID`, ou
+reçoit un événement `reset` s'ils ne sont plus dans l'historique (ou s'il
+s'était connecté à un autre worker) et recharge tout.
+"""
+import asyncio
+import json
+import os
+import uuid
+from collections import deque
+from typing import AsyncIterator, Hashable, Optional
+from core.invalidation import bus
+
+# Espaces de noms visibles des clients (les autres, comme "users", restent internes)
+PUBLIC_NAMESPACES = {"modules", "courses", "dashboard"}
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "256"))
+EVENT_HISTORY_SIZE = int(os.getenv("EVENT_HISTORY_SIZE", "1000"))
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+
+# Les numéros d'événement n'ont de sens que pour le processus qui les a émis
+_EPOCH = uuid.uuid4().hex[:8]
+
+def format_event(event_id: int, name: str, data: dict) -> str:
+    payload = json.dumps(data, separators=(",", ":"))
+    return f"id: {_EPOCH}-{event_id}\nevent: {name}\ndata: {payload}\n\n"
+
+# Placé dans la file d'un client déconnecté pour terminer son flux
+_DISCONNECT = object()
+
+class ChangeBroadcaster:
+    """Distribue les changements à toutes les connexions ouvertes du worker"""
+
+    def __init__(self, queue_size: int = EVENT_QUEUE_SIZE, history_size: int = EVENT_HISTORY_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: set[asyncio.Queue] = set()
+        self._history: deque[tuple[int, str]] = deque(maxlen=history_size)
+        self._last_id = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, namespace: str, key: Optional[Hashable] = None) -> None:
+        """Handler du bus : appelé depuis n'importe quel thread"""
+        if namespace not in PUBLIC_NAMESPACES:
+            return
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._fan_out, namespace, key)
+
+    def _fan_out(self, namespace: str, key: Optional[Hashable]) -> None:
+        self._last_id += 1
+        message = format_event(self._last_id, "change", {"resource": namespace, "id": key})
+        self._history.append((self._last_id, message))
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Client trop lent : on libère sa file et on coupe le flux
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(_DISCONNECT)
+
+    def disconnect_all(self) -> None:
+        """Terminer tous les flux ouverts (arrêt du worker) ; à appeler depuis la boucle"""
+        for queue in list(self._subscribers):
+            self._subscribers.discard(queue)
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(_DISCONNECT)
+
+    def _replay(self, last_event_id: Optional[str]) -> list[str]:
+        if not last_event_id:
+            return []
+        epoch, _, number = last_event_id.partition("-")
+        if epoch != _EPOCH or not number.isdigit() or int(number) > self._last_id:
+            return [format_event(self._last_id, "reset", {})]
+        oldest = self._history[0][0] if self._history else self._last_id + 1
+        if int(number) < oldest - 1:
+            # Événements manqués déjà sortis de l'historique
+            return [format_event(self._last_id, "reset", {})]
+        return [message for event_id, message in self._history if event_id > int(number)]
+
+    async def stream(
+        self,
+        last_event_id: Optional[str] = None,
+        heartbeat: float = EVENT_HEARTBEAT_SECONDS,
+    ) -> AsyncIterator[str]:
+        """Flux SSE d'une connexion, jusqu'à sa fermeture"""
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            yield "retry: 3000\n\n"
+            for message in self._replay(last_event_id):
+                yield message
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    # Commentaire SSE : garde la connexion ouverte derrière les proxys
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is _DISCONNECT:
+                    return
+                yield message
+        finally:
+            self._subscribers.discard(queue)
+
+broadcaster = ChangeBroadcaster()
+bus.subscribe(broadcaster.publish)
@@ -0,0 +1,137 @@
+"""État de santé du worker, rafraîchi en arrière-plan.
+
+Un thread vérifie périodiquement la base sur sa propre connexion (hors du
+pool), lit la version de migration et mesure l'occupation du pool. Les
+endpoints de santé ne font que lire le dernier instantané : une sonde ne prend
+jamais de connexion aux requêtes des utilisateurs.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CHECK_INTERVAL_SECONDS = float(os.getenv("HEALTH_CHECK_INTERVAL_SECONDS", "5"))
+# Au-delà de cette part de connexions empruntées, le worker se déclare non prêt
+HEALTH_POOL_SATURATION_THRESHOLD = float(os.getenv("HEALTH_POOL_SATURATION_THRESHOLD", "0.9"))
+# Version Alembic attendue ; vide pour ne pas la vérifier
+EXPECTED_MIGRATION_VERSION = os.getenv("EXPECTED_MIGRATION_VERSION") or None
+
+class HealthMonitor:
+    def __init__(self, engine: Engine, interval: float = HEALTH_CHECK_INTERVAL_SECONDS):
+        self.engine = engine
+        self.interval = interval
+        self.snapshot: dict = {"ready": False, "reasons": ["starting"], "checked_at": None}
+        self._checked_at_monotonic: Optional[float] = None
+        self._connection = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _pool_stats(self) -> Optional[dict]:
+        pool = self.engine.pool
+        if not hasattr(pool, "checkedout") or not hasattr(pool, "size"):
+            return None
+        capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+        checked_out = pool.checkedout()
+        return {
+            "checked_out": checked_out,
+            "capacity": capacity,
+            "saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+        }
+
+    def _query(self, sql: str):
+        if self._connection is None:
+            # Connexion dédiée, sortie du pool : la sonde n'en consomme aucune
+            self._connection = self.engine.raw_connection()
+            self._connection.detach()
+        cursor = self._connection.cursor()
+        try:
+            cursor.execute(sql)
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+        # Pas de transaction laissée ouverte entre deux vérifications
+        self._connection.rollback()
+        return row
+
+    def _reset_connection(self) -> None:
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    def refresh(self) -> dict:
+        """Mesurer l'état courant et remplacer l'instantané"""
+        reasons = []
+        database = "connected"
+        migration = None
+        started = time.perf_counter()
+        try:
+            self._query("SELECT 1")
+        except Exception as exc:
+            logger.warning("Health check could not reach the database: %s", exc)
+            self._reset_connection()
+            database = "disconnected"
+            reasons.append("database unreachable")
+        latency_ms = round((time.perf_counter() - started) * 1000, 2)
+
+        if database == "connected":
+            try:
+                row = self._query("SELECT version_num FROM alembic_version")
+                migration = row[0] if row else None
+            except Exception:
+                # Base créée par create_all, sans table alembic_version
+                self._connection.rollback()
+        if EXPECTED_MIGRATION_VERSION and migration != EXPECTED_MIGRATION_VERSION:
+            reasons.append(f"migration {migration} != {EXPECTED_MIGRATION_VERSION}")
+
+        pool = self._pool_stats()
+        if pool and pool["saturation"] >= HEALTH_POOL_SATURATION_THRESHOLD:
+            reasons.append("connection pool saturated")
+
+        self.snapshot = {
+            "ready": not reasons,
+            "reasons": reasons,
+            "database": database,
+            "database_latency_ms": latency_ms if database == "connected" else None,
+            "migration": migration,
+            "pool": pool,
+            "checked_at": datetime.utcnow().isoformat(),
+        }
+        self._checked_at_monotonic = time.monotonic()
+        return self.snapshot
+
+    def readiness(self) -> dict:
+        """Dernier instantané ; non prêt si le thread de vérification s'est arrêté"""
+        snapshot = self.snapshot
+        checked = self._checked_at_monotonic
+        if checked is not None and time.monotonic() - checked > 3 * self.interval:
+            return {**snapshot, "ready": False, "reasons": snapshot["reasons"] + ["health check stale"]}
+        return snapshot
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Health check failed")
+            self._stop_event.wait(self.interval)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join(timeout=self.interval + 5)
+            self._thread = None
+        self._reset_connection()
@@ -0,0 +1,160 @@
+"""Bus d'invalidation des caches entre workers.
+
+Les écritures appellent `invalidate(db, namespace, key)` avant le commit. Au
+commit, les événements sont :
+- envoyés par `pg_notify` dans la même transaction sur PostgreSQL, donc livrés
+  aux autres workers uniquement si la transaction réussit ;
+- appliqués localement après le commit (bus en mémoire), ce qui suffit pour
+  SQLite et les tests.
+
+Chaque worker démarre un `InvalidationListener` qui écoute le canal avec
+`LISTEN` sur une connexion dédiée et évince les entrées correspondantes.
+"""
+import json
+import logging
+import select
+import threading
+import uuid
+from typing import Callable, Hashable, Optional
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from core import cache
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "cache_invalidation"
+# pg_notify refuse les payloads de plus de 8000 octets
+MAX_PAYLOAD_BYTES = 7900
+
+_PENDING_KEY = "pending_invalidations"
+_WORKER_ID = uuid.uuid4().hex
+
+Handler = Callable[[str, Optional[Hashable]], None]
+
+class LocalBus:
+    """Bus en mémoire : distribue les événements aux abonnés du worker"""
+
+    def __init__(self):
+        self._handlers: list[Handler] = []
+
+    def subscribe(self, handler: Handler) -> None:
+        self._handlers.append(handler)
+
+    def dispatch(self, namespace: str, key: Optional[Hashable] = None) -> None:
+        for handler in self._handlers:
+            try:
+                handler(namespace, key)
+            except Exception:
+                logger.exception("Invalidation handler failed for %s:%s", namespace, key)
+
+bus = LocalBus()
+bus.subscribe(cache.evict)
+
+def invalidate(db: Session, namespace: str, key: Optional[Hashable] = None) -> None:
+    """Programmer l'invalidation d'une entrée au commit de la session"""
+    db.info.setdefault(_PENDING_KEY, []).append((namespace, key))
+
+def _encode(events: list[tuple[str, Optional[Hashable]]]) -> str:
+    payload = json.dumps({"origin": _WORKER_ID, "events": events}, separators=(",", ":"))
+    if len(payload.encode()) <= MAX_PAYLOAD_BYTES:
+        return payload
+    # Trop de clés : on invalide les espaces de noms entiers
+    namespaces = sorted({namespace for namespace, _ in events})
+    return json.dumps({"origin": _WORKER_ID, "events": [[ns, None] for ns in namespaces]})
+
+@event.listens_for(Session, "before_commit")
+def _publish_pending(session: Session) -> None:
+    events = session.info.get(_PENDING_KEY)
+    if not events:
+        return
+    bind = session.get_bind()
+    if bind.dialect.name == "postgresql":
+        session.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": CHANNEL, "payload": _encode(events)},
+        )
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session: Session) -> None:
+    for namespace, key in session.info.pop(_PENDING_KEY, []):
+        bus.dispatch(namespace, key)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+class InvalidationListener(threading.Thread):
+    """Thread qui écoute le canal PostgreSQL et relaie les événements au bus local"""
+
+    def __init__(self, engine: Engine, poll_interval: float = 5.0):
+        super().__init__(name="cache-invalidation-listener", daemon=True)
+        self.engine = engine
+        self.poll_interval = poll_interval
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def run(self) -> None:
+        backoff = 1.0
+        while not self._stop_event.is_set():
+            try:
+                self._listen()
+                backoff = 1.0
+            except Exception:
+                logger.exception("Invalidation listener disconnected, retrying in %.0fs", backoff)
+                # Des notifications ont pu être perdues pendant la coupure
+                cache.clear_all()
+                self._stop_event.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    def _listen(self) -> None:
+        # Connexion sortie du pool : elle reste ouverte pendant toute la vie du worker
+        connection = self.engine.raw_connection()
+        connection.detach()
+        dbapi_connection = connection.driver_connection
+        try:
+            dbapi_connection.autocommit = True
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+            while not self._stop_event.is_set():
+                readable, _, _ = select.select([dbapi_connection], [], [], self.poll_interval)
+                if not readable:
+                    continue
+                dbapi_connection.poll()
+                while dbapi_connection.notifies:
+                    notify = dbapi_connection.notifies.pop(0)
+                    self._handle(notify.payload)
+        finally:
+            connection.close()
+
+    def _handle(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed invalidation payload: %r", payload)
+            return
+        # Les événements du worker courant ont déjà été appliqués au commit
+        if message.get("origin") == _WORKER_ID:
+            return
+        for namespace, key in message.get("events", []):
+            bus.dispatch(namespace, key)
+
+_listener: Optional[InvalidationListener] = None
+
+def start_listener(engine: Engine) -> Optional[InvalidationListener]:
+    """Démarrer l'écoute sur PostgreSQL ; sans effet avec les autres bases (bus local seul)"""
+    global _listener
+    if engine.dialect.name != "postgresql" or _listener is not None:
+        return _listener
+    _listener = InvalidationListener(engine)
+    _listener.start()
+    return _listener
+
+def stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener.join(timeout=_listener.poll_interval + 1)
+        _listener = None
@@ -0,0 +1,251 @@
+"""File de jobs persistante stockée dans la base.
+
+Les routeurs appellent `enqueue()` dans leur propre transaction : le job n'est
+visible des workers qu'une fois la requête commitée. Les workers réclament les
+jobs prêts avec `SELECT ... FOR UPDATE SKIP LOCKED`, ce qui permet d'en lancer
+plusieurs sur la même base sans broker externe ni double exécution.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, sessionmaker
+from models.job import Job, JobStatus
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1.0"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "5"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "3600"))
+# Un job "running" plus ancien est considéré comme abandonné (worker tué)
+JOB_LOCK_TIMEOUT_SECONDS = float(os.getenv("JOB_LOCK_TIMEOUT_SECONDS", "600"))
+
+JobHandler = Callable[[Session, dict], Optional[dict]]
+
+_handlers: dict[str, JobHandler] = {}
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Enregistrer la fonction qui exécute les jobs de type `kind`.
+
+    Le handler reçoit la session du worker et le payload du job. Il ne doit pas
+    commiter : le worker commite son travail en même temps que le statut du job.
+    """
+    def decorator(func: JobHandler) -> JobHandler:
+        _handlers[kind] = func
+        return func
+    return decorator
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: Optional[dict] = None,
+    *,
+    created_by: Optional[int] = None,
+    max_attempts: int = 5,
+    run_at: Optional[datetime] = None,
+) -> Job:
+    """Ajouter un job à la session courante (persisté au commit de l'appelant)"""
+    job = Job(
+        kind=kind,
+        payload=payload or {},
+        created_by=created_by,
+        max_attempts=max_attempts,
+        run_at=run_at or datetime.utcnow(),
+    )
+    db.add(job)
+    db.flush()
+    return job
+
+# Condition de l'index partiel uq_jobs_queued_dedupe_key, reprise telle quelle
+# dans ON CONFLICT (SQLite exige le même texte pour reconnaître l'index)
+_QUEUED = text("status = 'queued'")
+
+def enqueue_once(
+    db: Session,
+    kind: str,
+    dedupe_key: str,
+    payload: Optional[dict] = None,
+    *,
+    created_by: Optional[int] = None,
+    max_attempts: int = 5,
+    run_at: Optional[datetime] = None,
+) -> bool:
+    """Ajouter un job, sauf si un job de même clé attend déjà ; True s'il a été ajouté.
+
+    Un job déjà réclamé par un worker ne compte plus : ce qui change après le
+    début de son exécution programme un nouveau job.
+    """
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    statement = insert(Job).values(
+        kind=kind,
+        payload=payload or {},
+        created_by=created_by,
+        max_attempts=max_attempts,
+        run_at=run_at or datetime.utcnow(),
+        dedupe_key=dedupe_key,
+    ).on_conflict_do_nothing(index_elements=[Job.dedupe_key], index_where=_QUEUED)
+    return db.execute(statement).rowcount == 1
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff exponentiel avec un peu d'aléa pour étaler les reprises"""
+    delay = min(JOB_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), JOB_RETRY_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(1.0, 1.1))
+
+def claim_jobs(db: Session, worker_id: str, limit: int) -> list[int]:
+    """Réclamer jusqu'à `limit` jobs prêts et les marquer comme en cours"""
+    now = datetime.utcnow()
+    jobs = (
+        db.query(Job)
+        .filter(Job.status == JobStatus.queued, Job.run_at <= now)
+        .order_by(Job.run_at, Job.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for job in jobs:
+        job.status = JobStatus.running
+        job.locked_at = now
+        job.locked_by = worker_id
+        job.attempts += 1
+    job_ids = [job.id for job in jobs]
+    db.commit()
+    return job_ids
+
+def requeue_stale_jobs(db: Session, timeout: float = JOB_LOCK_TIMEOUT_SECONDS) -> int:
+    """Remettre en file les jobs dont le worker a disparu en cours d'exécution"""
+    deadline = datetime.utcnow() - timedelta(seconds=timeout)
+    jobs = (
+        db.query(Job)
+        .filter(Job.status == JobStatus.running, Job.locked_at < deadline)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for job in jobs:
+        _release(job, "Job lock expired")
+    db.commit()
+    return len(jobs)
+
+def _release(job: Job, error: str) -> None:
+    job.last_error = error
+    job.locked_at = None
+    job.locked_by = None
+    if job.attempts >= job.max_attempts:
+        job.status = JobStatus.failed
+    else:
+        job.status = JobStatus.queued
+        job.run_at = datetime.utcnow() + retry_delay(job.attempts)
+
+def run_job(session_factory: sessionmaker, job_id: int, worker_id: str) -> JobStatus:
+    """Exécuter un job réclamé et enregistrer son résultat"""
+    db = session_factory()
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        # Le job a pu être repris par un autre worker après expiration du verrou
+        if job is None or job.locked_by != worker_id or job.status != JobStatus.running:
+            return job.status if job else JobStatus.failed
+        kind, payload = job.kind, dict(job.payload or {})
+        handler = _handlers.get(kind)
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind '{kind}'")
+            result = handler(db, payload)
+        except Exception:
+            db.rollback()
+            logger.exception("Job %s (%s) failed", job_id, kind)
+            job = db.query(Job).filter(Job.id == job_id).first()
+            _release(job, traceback.format_exc(limit=5))
+            if handler is None:
+                job.status = JobStatus.failed
+            db.commit()
+            return job.status
+        job.status = JobStatus.succeeded
+        job.result = result
+        job.last_error = None
+        job.locked_at = None
+        db.commit()
+        return JobStatus.succeeded
+    finally:
+        db.close()
+
+class Worker:
+    """Boucle de traitement des jobs avec une limite de concurrence"""
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        concurrency: int = JOB_WORKER_CONCURRENCY,
+        poll_interval: float = JOB_POLL_INTERVAL_SECONDS,
+        worker_id: Optional[str] = None,
+    ):
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stop_event = threading.Event()
+        self._slots = threading.Semaphore(concurrency)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _claim(self, limit: int) -> list[int]:
+        db = self.session_factory()
+        try:
+            return claim_jobs(db, self.worker_id, limit)
+        finally:
+            db.close()
+
+    def run_once(self) -> list[JobStatus]:
+        """Réclamer et exécuter dans le thread courant les jobs prêts"""
+        return [
+            run_job(self.session_factory, job_id, self.worker_id)
+            for job_id in self._claim(self.concurrency)
+        ]
+
+    def run_forever(self) -> None:
+        logger.info("Job worker %s started (concurrency=%d)", self.worker_id, self.concurrency)
+        last_recovery = datetime.min
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="job") as executor:
+            while not self._stop_event.is_set():
+                # Ne réclamer que le nombre de jobs que l'on peut lancer immédiatement
+                free = 0
+                while free < self.concurrency and self._slots.acquire(blocking=False):
+                    free += 1
+                try:
+                    if datetime.utcnow() - last_recovery > timedelta(seconds=JOB_LOCK_TIMEOUT_SECONDS / 4):
+                        db = self.session_factory()
+                        try:
+                            requeue_stale_jobs(db)
+                        finally:
+                            db.close()
+                        last_recovery = datetime.utcnow()
+                    job_ids = self._claim(free) if free else []
+                except Exception:
+                    logger.exception("Job worker %s could not claim jobs", self.worker_id)
+                    job_ids = []
+                for _ in range(free - len(job_ids)):
+                    self._slots.release()
+                for job_id in job_ids:
+                    executor.submit(self._run, job_id)
+                if not job_ids:
+                    self._stop_event.wait(self.poll_interval)
+        logger.info("Job worker %s stopped", self.worker_id)
+
+    def _run(self, job_id: int) -> Any:
+        try:
+            return run_job(self.session_factory, job_id, self.worker_id)
+        except Exception:
+            logger.exception("Unexpected error while running job %s", job_id)
+        finally:
+            self._slots.release()
@@ -0,0 +1,154 @@
+"""Démarrage et arrêt du worker (lifespan de main.py).
+
+Au démarrage, avant la première requête : `POOL_PREWARM_CONNECTIONS`
+connexions du pool sont ouvertes (connexion, TLS, instructions préparées de
+core/repository.py), puis les requêtes fréquentes sont exécutées une fois pour
+remplir le cache de compilation de SQLAlchemy et les comptes du catalogue.
+
+À l'arrêt, uvicorn ferme ses sockets et attend la fin des connexions
+ouvertes (au plus `--timeout-graceful-shutdown`) avant d'envoyer l'arrêt du
+lifespan. Le drainage commence donc dès SIGTERM/SIGINT (`DrainingServer`,
+lancé par `python main.py`) : `drainer` refuse les nouvelles requêtes (503)
+et ferme les flux SSE (les clients se reconnectent à un autre worker), qui
+sinon retiendraient l'arrêt jusqu'au délai. Au lifespan, il attend encore les
+requêtes en cours, au plus `SHUTDOWN_DRAIN_TIMEOUT_SECONDS`, avant que main.py
+arrête les tâches de fond et ferme le pool.
+"""
+import asyncio
+import logging
+import os
+from types import FrameType
+from typing import Optional
+import uvicorn
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+from core.catalogue import CatalogueFilters, facet_counts, search_courses
+from core.events import broadcaster
+from core.repository import get_module, get_user_by_email, get_user_by_login
+
+logger = logging.getLogger(__name__)
+
+POOL_PREWARM_CONNECTIONS = int(os.getenv("POOL_PREWARM_CONNECTIONS", "5"))
+SHUTDOWN_DRAIN_TIMEOUT_SECONDS = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT_SECONDS", "25"))
+
+def prewarm_pool(engine: Engine, connections: int = POOL_PREWARM_CONNECTIONS) -> int:
+    """Ouvrir jusqu'à `connections` connexions permanentes du pool ; retourne leur nombre"""
+    size = engine.pool.size() if hasattr(engine.pool, "size") else 0
+    # Au-delà de la taille du pool, une connexion rendue serait aussitôt fermée
+    wanted = min(connections, size)
+    opened = []
+    try:
+        # Empruntées toutes en même temps : sinon le pool rendrait toujours la même
+        for _ in range(wanted):
+            connection = engine.connect()
+            opened.append(connection)
+            connection.execute(text("SELECT 1"))
+    except Exception as exc:
+        logger.warning("Could not prewarm the connection pool: %s", exc)
+    finally:
+        for connection in opened:
+            connection.close()
+    return len(opened)
+
+def warm_caches(session_factory: sessionmaker) -> None:
+    """Compiler les requêtes fréquentes et remplir les caches partagés du worker"""
+    db = session_factory()
+    try:
+        # Valeurs introuvables : seule la compilation est gardée
+        get_user_by_email(db, "")
+        get_user_by_login(db, "")
+        get_module(db, 0)
+        filters = CatalogueFilters()
+        facet_counts(db, filters)
+        search_courses(db, filters, limit=20)
+    except Exception as exc:
+        logger.warning("Could not warm caches: %s", exc)
+    finally:
+        db.close()
+
+class RequestDrainer:
+    """Compte les requêtes en cours ; pendant le drainage, refuse les nouvelles.
+
+    Utilisé seulement depuis la boucle asyncio : pas de verrou.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.draining = False
+        self._idle: Optional[asyncio.Event] = None
+
+    def finished(self) -> None:
+        self.in_flight -= 1
+        if self.in_flight == 0 and self._idle is not None:
+            self._idle.set()
+
+    def begin(self) -> None:
+        """Refuser les nouvelles requêtes et fermer les flux SSE, sans attendre"""
+        if not self.draining:
+            self.draining = True
+            broadcaster.disconnect_all()
+
+    async def drain(self, timeout: float = SHUTDOWN_DRAIN_TIMEOUT_SECONDS) -> bool:
+        """Refuser les nouvelles requêtes et attendre les autres ; False si le délai expire"""
+        self.begin()
+        if self.in_flight == 0:
+            return True
+        self._idle = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning("Shutting down with %d request(s) still in flight", self.in_flight)
+            return False
+
+    def reset(self) -> None:
+        self.in_flight = 0
+        self.draining = False
+        self._idle = None
+
+drainer = RequestDrainer()
+
+class DrainingServer(uvicorn.Server):
+    """Serveur uvicorn qui commence le drainage dès le signal d'arrêt.
+
+    Sans lui (`uvicorn main:app`), le drainage n'a lieu qu'à l'arrêt du
+    lifespan, une fois toutes les connexions terminées.
+    """
+
+    def __init__(self, config: uvicorn.Config, drainer: RequestDrainer = drainer):
+        super().__init__(config)
+        self.drainer = drainer
+
+    def handle_exit(self, sig: int, frame: Optional[FrameType]) -> None:
+        # Appelé par la boucle asyncio, comme les flux SSE qu'il ferme
+        self.drainer.begin()
+        super().handle_exit(sig, frame)
+
+class DrainMiddleware:
+    def __init__(self, app, drainer: RequestDrainer = drainer):
+        self.app = app
+        self.drainer = drainer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self.drainer.draining:
+            # Le répartiteur de charge renvoie la requête vers un autre worker
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"retry-after", b"1"),
+                    (b"connection", b"close"),
+                ],
+            })
+            await send({"type": "http.response.body", "body": b'{"detail":"Server is shutting down"}'})
+            return
+        self.drainer.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.drainer.finished()
@@ -0,0 +1,252 @@
+"""Métriques du worker au format texte de Prometheus (`GET /metrics`).
+
+Les compteurs et histogrammes sont répartis par thread : chaque thread écrit
+dans ses propres valeurs, sans verrou partagé, et `/metrics` additionne les
+parts de tous les threads au moment de la lecture. Une lecture concurrente
+d'une écriture peut voir une observation à moitié comptée (somme sans le
+compte, par exemple) ; la suivante sera juste. À la fin d'un thread, ses
+valeurs sont ajoutées à une part commune : le nombre de parts suit le nombre
+de threads vivants, pas le nombre de threads créés. Les jauges du pool de
+connexions et des caches sont lues seulement à la collecte.
+
+Chaque worker expose ses propres valeurs : avec plusieurs processus,
+Prometheus les agrège par instance.
+"""
+import bisect
+import threading
+import time
+import weakref
+from typing import Callable, Iterable
+from sqlalchemy.engine import Engine
+from core.cache import caches
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Autour du coût visé pour un hachage (voir benchmarks/password_hashing.py)
+HASHING_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class _ThreadEnd:
+    """Objet propre à un thread, libéré avec ses données locales à la fin du thread"""
+
+def _add_into(totals: dict[tuple, list[float]], shard: dict) -> None:
+    for key, values in list(shard.items()):
+        total = totals.setdefault(key, [0.0] * len(values))
+        for index, value in enumerate(values):
+            total[index] += value
+
+class _Shards:
+    """Un dictionnaire de valeurs par thread vivant ; seuls l'arrivée et la fin d'un thread prennent un verrou"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._live: dict[int, dict] = {}
+        # Valeurs des threads terminés : les compteurs ne reculent jamais
+        self._retired: dict[tuple, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def mine(self) -> dict:
+        values = getattr(self._local, "values", None)
+        if values is None:
+            values = self._local.values = {}
+            self._local.end = _ThreadEnd()
+            weakref.finalize(self._local.end, self._retire, values)
+            with self._lock:
+                self._live[id(values)] = values
+        return values
+
+    def _retire(self, values: dict) -> None:
+        with self._lock:
+            del self._live[id(values)]
+            _add_into(self._retired, values)
+
+    def merged(self) -> dict[tuple, list[float]]:
+        with self._lock:
+            shards = list(self._live.values())
+            totals = {key: list(values) for key, values in self._retired.items()}
+        for shard in shards:
+            _add_into(totals, shard)
+        return totals
+
+class Registry:
+    def __init__(self):
+        self.metrics: list = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), registry: Registry = registry):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._shards = _Shards()
+        registry.register(self)
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        values = self._shards.mine()
+        cell = values.get(labels)
+        if cell is None:
+            values[labels] = [amount]
+        else:
+            cell[0] += amount
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+            for labels, (value,) in sorted(self._shards.merged().items())
+        ]
+
+class Gauge(Counter):
+    """Jauge montante et descendante (requêtes en cours) ; chaque part peut être négative"""
+    type = "gauge"
+
+    def dec(self, labels: tuple = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (),
+                 buckets: tuple = DEFAULT_BUCKETS, registry: Registry = registry):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._shards = _Shards()
+        registry.register(self)
+
+    def observe(self, labels: tuple, value: float) -> None:
+        values = self._shards.mine()
+        # Comptes par tranche (non cumulés), puis somme et nombre d'observations
+        cell = values.get(labels)
+        if cell is None:
+            cell = values[labels] = [0.0] * (len(self.buckets) + 3)
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-2] += value
+        cell[-1] += 1
+
+    def samples(self) -> list[str]:
+        lines = []
+        for labels, cell in sorted(self._shards.merged().items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), cell):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {_number(cumulative)}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(cell[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {_number(cell[-1])}")
+        return lines
+
+class Collected:
+    """Valeurs lues à la collecte par `collect()` : {valeurs des labels: valeur}"""
+
+    def __init__(self, name: str, documentation: str, type: str, labelnames: tuple,
+                 collect: Callable[[], dict], registry: Registry = registry):
+        self.name = name
+        self.documentation = documentation
+        self.type = type
+        self.labelnames = labelnames
+        self.collect = collect
+        registry.register(self)
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+            for labels, value in sorted(self.collect().items())
+        ]
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Durée des requêtes HTTP jusqu'au dernier octet envoyé", ("method", "route"),
+)
+REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "Requêtes HTTP en cours de traitement", ("method",))
+REQUEST_ERRORS = Counter(
+    "http_request_errors_total", "Réponses HTTP en erreur (statut 4xx ou 5xx)", ("method", "route", "status"),
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds", "Durée des hachages et vérifications de mot de passe",
+    ("operation", "scheme"), buckets=HASHING_BUCKETS,
+)
+
+Collected("cache_hits_total", "Lectures servies par le cache", "counter", ("cache",),
+          lambda: {(name,): cache.hits for name, cache in caches.items()})
+Collected("cache_misses_total", "Lectures absentes ou expirées du cache", "counter", ("cache",),
+          lambda: {(name,): cache.misses for name, cache in caches.items()})
+Collected("cache_entries", "Entrées en cache", "gauge", ("cache",),
+          lambda: {(name,): len(cache) for name, cache in caches.items()})
+
+def register_pool_metrics(engine: Engine, registry: Registry = registry) -> None:
+    """Jauges du pool de connexions de `engine` (pools sans taille fixe : rien)"""
+    pool = engine.pool
+
+    def read(attribute: str) -> Callable[[], dict]:
+        def collect() -> dict:
+            method = getattr(pool, attribute, None)
+            return {(): method()} if method is not None else {}
+        return collect
+
+    Collected("db_pool_size", "Connexions permanentes du pool", "gauge", (), read("size"), registry)
+    Collected("db_pool_checked_out", "Connexions empruntées au pool", "gauge", (), read("checkedout"), registry)
+    # Négatif tant que le pool n'a pas ouvert toutes ses connexions permanentes (QueuePool)
+    Collected("db_pool_overflow", "Connexions ouvertes au-delà de la taille du pool", "gauge", (), read("overflow"), registry)
+
+class MetricsMiddleware:
+    """Durée, requêtes en cours et erreurs de chaque requête HTTP, par route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        # Exception avant l'envoi de la réponse : Starlette répondra 500
+        status = 500
+
+        async def measured_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc((method,))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, measured_send)
+        finally:
+            elapsed = time.perf_counter() - started
+            REQUESTS_IN_PROGRESS.dec((method,))
+            # Gabarit de la route : une série par route et non par URL
+            route = scope.get("route")
+            route_label = route.path if route is not None else "unmatched"
+            REQUEST_DURATION.observe((method, route_label), elapsed)
+            if status >= 400:
+                REQUEST_ERRORS.inc((method, route_label, str(status)))
@@ -0,0 +1,92 @@
+"""Clés d'ordre espacées pour les leçons.
+
+Les leçons sont numérotées avec un écart de `ORDER_GAP` entre deux voisines.
+Déplacer une leçon revient à lui donner une clé entre ses nouvelles voisines :
+une seule ligne est modifiée. Quand l'écart devient trop faible, le cours est
+renuméroté par un job en arrière-plan (ou immédiatement s'il n'y a plus de place) ;
+un seul job de renumérotation attend par cours. L'écart de la renumérotation
+est réduit pour les très longs cours afin de rester dans la colonne INTEGER.
+"""
+import os
+from typing import Optional
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from models.course import Course
+from models.lesson import Lesson
+
+ORDER_GAP = int(os.getenv("LESSON_ORDER_GAP", "65536"))
+# En dessous de cet écart, un rééquilibrage est programmé
+REBALANCE_THRESHOLD = int(os.getenv("LESSON_REBALANCE_THRESHOLD", "16"))
+
+# Bornes de la colonne INTEGER
+_MIN_KEY = -(2 ** 31)
+_MAX_KEY = 2 ** 31 - 1
+
+def key_between(previous: Optional[int], following: Optional[int]) -> Optional[int]:
+    """Clé strictement entre deux voisines, ou None s'il n'y a plus de place"""
+    if previous is None and following is None:
+        key = ORDER_GAP
+    elif previous is None:
+        # Près de la borne, on se rapproche de moitié au lieu de la dépasser
+        key = max(following - ORDER_GAP, (following + _MIN_KEY) // 2)
+    elif following is None:
+        key = min(previous + ORDER_GAP, (previous + _MAX_KEY + 1) // 2)
+    else:
+        key = (previous + following) // 2
+    if previous is not None and key <= previous or following is not None and key >= following:
+        return None
+    if not _MIN_KEY <= key <= _MAX_KEY:
+        return None
+    return key
+
+def needs_rebalance(key: int, previous: Optional[int], following: Optional[int]) -> bool:
+    gaps = [abs(key - neighbour) for neighbour in (previous, following) if neighbour is not None]
+    return any(gap < REBALANCE_THRESHOLD for gap in gaps)
+
+def lock_course(db: Session, course_id: int) -> None:
+    """Verrouiller la ligne du cours jusqu'à la fin de la transaction.
+
+    Sert de verrou par cours aux déplacements et à la renumérotation : une
+    renumérotation ne peut pas écraser un déplacement commité entre sa lecture
+    et son écriture, et un déplacement ne verrouille qu'une ligne quelle que
+    soit la longueur du cours. Sans effet sur SQLite (verrou de base).
+    """
+    db.query(Course.id).filter(Course.id == course_id).with_for_update().scalar()
+
+def neighbour_keys(db: Session, course_id: int, lesson_id: int, after_id: Optional[int]) -> tuple[Optional[int], Optional[int]]:
+    """Clés des leçons qui encadreront la leçon déplacée (parcours d'index)"""
+    previous = None
+    if after_id is not None:
+        previous = (
+            db.query(Lesson.order_index)
+            .filter(Lesson.course_id == course_id, Lesson.id == after_id)
+            .scalar()
+        )
+    following_query = db.query(Lesson.order_index).filter(
+        Lesson.course_id == course_id, Lesson.id != lesson_id
+    )
+    if previous is not None:
+        following_query = following_query.filter(Lesson.order_index > previous)
+    following = following_query.order_by(Lesson.order_index).limit(1).scalar()
+    return previous, following
+
+def rebalance_lessons(db: Session, course_id: int) -> int:
+    """Renuméroter les leçons d'un cours avec un écart régulier"""
+    lock_course(db, course_id)
+    lesson_ids = [
+        lesson_id
+        for (lesson_id,) in db.query(Lesson.id)
+        .filter(Lesson.course_id == course_id)
+        .order_by(Lesson.order_index, Lesson.id)
+    ]
+    if lesson_ids:
+        # Dernière clé au plus égale à la borne de la colonne
+        gap = min(ORDER_GAP, _MAX_KEY // len(lesson_ids))
+        db.execute(
+            update(Lesson),
+            [
+                {"id": lesson_id, "order_index": (position + 1) * gap}
+                for position, lesson_id in enumerate(lesson_ids)
+            ],
+        )
+    return len(lesson_ids)
@@ -0,0 +1,44 @@
+"""Application de modifications partielles au contenu d'un module.
+
+Une modification remplace `delete` caractères à partir de `offset` par le
+texte `insert`. Les positions se rapportent toutes au contenu de la version de
+départ ; elles doivent être triées et ne pas se chevaucher.
+
+Côté base, les modifications deviennent une seule expression `substr() || ...`
+évaluée dans l'UPDATE : le contenu n'est ni relu ni renvoyé par l'application.
+La révision enregistrée ne relit que les morceaux voisins des modifications
+(`core.revisions.patch_chunks`).
+"""
+from typing import Protocol
+from sqlalchemy import func, literal
+from sqlalchemy.sql.elements import ColumnElement
+
+class Edit(Protocol):
+    offset: int
+    delete: int
+    insert: str
+
+def patched_content(column, edits: list[Edit]) -> ColumnElement:
+    """Expression SQL du contenu une fois les modifications appliquées"""
+    pieces = []
+    position = 0
+    for edit in edits:
+        if edit.offset > position:
+            # substr() compte à partir de 1
+            pieces.append(func.substr(column, position + 1, edit.offset - position))
+        if edit.insert:
+            pieces.append(literal(edit.insert))
+        position = edit.offset + edit.delete
+    pieces.append(func.substr(column, position + 1))
+
+    expression = pieces[0]
+    for piece in pieces[1:]:
+        expression = expression.concat(piece)
+    return expression
+
+def required_length(edits: list[Edit]) -> int:
+    """Longueur minimale du contenu d'origine pour que les positions soient valides"""
+    return max(edit.offset + edit.delete for edit in edits)
+
+def length_delta(edits: list[Edit]) -> int:
+    return sum(len(edit.insert) - edit.delete for edit in edits)
@@ -0,0 +1,222 @@
+"""Ingestion groupée des événements de progression.
+
+Les événements reçus sont placés dans un tampon en mémoire et écrits par un
+thread dédié en INSERT multi-lignes, dès que le tampon atteint
+`PROGRESS_FLUSH_SIZE` événements ou toutes les `PROGRESS_FLUSH_INTERVAL_SECONDS`.
+Quand le tampon est plein, `add()` attend brièvement puis lève `BufferFull` :
+l'API répond 503 et le client réessaie plus tard.
+
+Un lot refusé par la base pour une ligne invalide (utilisateur supprimé
+entre-temps, par exemple) est coupé en deux jusqu'à isoler les lignes
+fautives, qui sont écartées ; seules les erreurs de connexion remettent le
+lot dans le tampon.
+
+Sur PostgreSQL, les partitions mensuelles couvrent de `PROGRESS_MAX_EVENT_AGE_DAYS`
+en arrière à `PROGRESS_PARTITION_MONTHS_AHEAD` mois en avant ; elles sont
+créées au démarrage puis chaque jour par le job `ensure_progress_partitions`.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+from core.jobs import enqueue_once
+from models.progress import ProgressEvent
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_FLUSH_SIZE = int(os.getenv("PROGRESS_FLUSH_SIZE", "5000"))
+PROGRESS_FLUSH_INTERVAL_SECONDS = float(os.getenv("PROGRESS_FLUSH_INTERVAL_SECONDS", "1.0"))
+PROGRESS_BUFFER_MAX_SIZE = int(os.getenv("PROGRESS_BUFFER_MAX_SIZE", "100000"))
+PROGRESS_ENQUEUE_TIMEOUT_SECONDS = float(os.getenv("PROGRESS_ENQUEUE_TIMEOUT_SECONDS", "0.5"))
+PROGRESS_PARTITION_MONTHS_AHEAD = int(os.getenv("PROGRESS_PARTITION_MONTHS_AHEAD", "3"))
+PROGRESS_PARTITION_CHECK_INTERVAL_HOURS = float(os.getenv("PROGRESS_PARTITION_CHECK_INTERVAL_HOURS", "24"))
+# Fenêtre acceptée pour la date fournie par le client, autour de la réception
+PROGRESS_MAX_EVENT_AGE_DAYS = int(os.getenv("PROGRESS_MAX_EVENT_AGE_DAYS", "30"))
+PROGRESS_MAX_CLOCK_SKEW_SECONDS = float(os.getenv("PROGRESS_MAX_CLOCK_SKEW_SECONDS", "300"))
+
+PARTITIONS_JOB = "ensure_progress_partitions"
+
+class BufferFull(Exception):
+    pass
+
+class ProgressBuffer:
+    """Tampon borné d'événements, vidé par lots dans `progress_events`"""
+
+    def __init__(
+        self,
+        engine: Engine,
+        flush_size: int = PROGRESS_FLUSH_SIZE,
+        flush_interval: float = PROGRESS_FLUSH_INTERVAL_SECONDS,
+        max_size: int = PROGRESS_BUFFER_MAX_SIZE,
+    ):
+        self.engine = engine
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self._events: list[dict] = []
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.flushed = 0
+        self.dropped = 0
+        self.rejected = 0
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def add(self, events: list[dict], timeout: float = PROGRESS_ENQUEUE_TIMEOUT_SECONDS) -> None:
+        """Ajouter des événements ; lève BufferFull si la place ne se libère pas à temps"""
+        if len(events) > self.max_size:
+            raise BufferFull()
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while len(self._events) + len(events) > self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise BufferFull()
+                self._condition.notify_all()
+                self._condition.wait(remaining)
+            self._events.extend(events)
+            if len(self._events) >= self.flush_size:
+                self._condition.notify_all()
+
+    def flush(self) -> int:
+        """Écrire tout le contenu du tampon ; retourne le nombre d'événements écrits"""
+        with self._flush_lock:
+            with self._condition:
+                events, self._events = self._events, []
+                # Des producteurs attendent peut-être de la place
+                self._condition.notify_all()
+            if not events:
+                return 0
+            written = 0
+            pending = [events]
+            while pending:
+                chunk = pending.pop()
+                try:
+                    with self.engine.begin() as connection:
+                        # executemany : SQLAlchemy regroupe les lignes en INSERT ... VALUES multi-lignes
+                        connection.execute(ProgressEvent.__table__.insert(), chunk)
+                except (IntegrityError, DataError) as exc:
+                    if len(chunk) == 1:
+                        # Ligne refusée par la base : la réessayer bloquerait le tampon
+                        logger.warning("Discarding progress event rejected by the database: %s", exc.orig)
+                        self.rejected += 1
+                    else:
+                        middle = len(chunk) // 2
+                        pending += [chunk[middle:], chunk[:middle]]
+                    continue
+                except Exception:
+                    remaining = [event for part in reversed(pending) for event in part]
+                    logger.exception("Failed to flush %d progress events", len(chunk) + len(remaining))
+                    self._requeue(chunk + remaining)
+                    break
+                written += len(chunk)
+            self.flushed += written
+            return written
+
+    def _requeue(self, events: list[dict]) -> None:
+        with self._condition:
+            room = self.max_size - len(self._events)
+            kept = events[:max(room, 0)]
+            self._events[:0] = kept
+            self.dropped += len(events) - len(kept)
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: len(self._events) >= self.flush_size or self._stop_event.is_set(),
+                    timeout=self.flush_interval,
+                )
+            if self._events and not self.flush():
+                # Échec d'écriture : on laisse la base respirer avant de réessayer
+                self._stop_event.wait(self.flush_interval)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="progress-flusher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Arrêter le thread et écrire les événements restants"""
+        if self._thread is not None:
+            self._stop_event.set()
+            with self._condition:
+                self._condition.notify_all()
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        self.flush()
+
+def event_time(occurred_at: datetime, received_at: datetime) -> Optional[datetime]:
+    """Date à stocker pour un événement, ou None s'il est trop ancien.
+
+    Une date dans le futur vient d'une horloge client décalée : elle est
+    ramenée à la réception. Sans borne, elle tomberait hors des partitions.
+    """
+    if occurred_at < received_at - timedelta(days=PROGRESS_MAX_EVENT_AGE_DAYS):
+        return None
+    if occurred_at > received_at + timedelta(seconds=PROGRESS_MAX_CLOCK_SKEW_SECONDS):
+        return received_at
+    return occurred_at
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+def _create_partition(connection: Connection, name: str, start: date, end: date) -> None:
+    bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    misplaced = connection.execute(text(
+        "SELECT count(*) FROM progress_events_default WHERE occurred_at >= :start AND occurred_at < :end"
+    ), {"start": start, "end": end}).scalar()
+    if not misplaced:
+        connection.execute(text(f"CREATE TABLE {name} PARTITION OF progress_events FOR VALUES {bounds}"))
+        return
+    # PostgreSQL refuse de créer la partition tant que la partition par défaut
+    # contient des lignes de cet intervalle : on la détache le temps de les déplacer
+    logger.warning("Moving %d progress events from the default partition to %s", misplaced, name)
+    connection.execute(text("ALTER TABLE progress_events DETACH PARTITION progress_events_default"))
+    connection.execute(text(f"CREATE TABLE {name} PARTITION OF progress_events FOR VALUES {bounds}"))
+    connection.execute(text(
+        f"WITH moved AS (DELETE FROM progress_events_default "
+        f"WHERE occurred_at >= :start AND occurred_at < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), {"start": start, "end": end})
+    connection.execute(text("ALTER TABLE progress_events ATTACH PARTITION progress_events_default DEFAULT"))
+
+def ensure_partitions(engine: Engine, months_ahead: int = PROGRESS_PARTITION_MONTHS_AHEAD) -> int:
+    """Créer les partitions mensuelles manquantes (PostgreSQL uniquement) ; retourne leur nombre"""
+    if engine.dialect.name != "postgresql":
+        return 0
+    now = datetime.utcnow()
+    first = (now - timedelta(days=PROGRESS_MAX_EVENT_AGE_DAYS)).date().replace(day=1)
+    last = _add_months(now.date().replace(day=1), months_ahead)
+    created = 0
+    with engine.begin() as connection:
+        # Filet de sécurité pour les dates hors des partitions créées
+        connection.execute(text(
+            "CREATE TABLE IF NOT EXISTS progress_events_default PARTITION OF progress_events DEFAULT"
+        ))
+        start = first
+        while start <= last:
+            end = _add_months(start, 1)
+            name = f"progress_events_y{start.year}m{start.month:02d}"
+            if connection.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None:
+                _create_partition(connection, name, start, end)
+                created += 1
+            start = end
+    return created
+
+def schedule_partition_check(db: Session, run_at: Optional[datetime] = None) -> None:
+    """Programmer la prochaine création de partitions (un seul job en attente)"""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    enqueue_once(db, PARTITIONS_JOB, PARTITIONS_JOB, run_at=run_at)
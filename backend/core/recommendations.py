@@ -0,0 +1,210 @@
+"""Recommandations item-item par co-occurrence.
+
+Chaque index construit une matrice creuse utilisateurs × items (inscriptions
+pour les cours, événements de progression pour les modules), calcule la
+similarité cosinus entre items par produit matriciel et garde les `k` plus
+proches voisins de chaque item. Les lectures ne consultent que cette table de
+voisins, remplacée atomiquement à chaque rafraîchissement.
+"""
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterable, Optional
+import numpy as np
+from scipy.sparse import csc_matrix
+from sqlalchemy import func
+from sqlalchemy.orm import Session, sessionmaker
+from models.enrollment import Enrollment
+from models.progress import ProgressEvent
+
+logger = logging.getLogger(__name__)
+
+RECOMMENDATION_TOP_K = int(os.getenv("RECOMMENDATION_TOP_K", "20"))
+RECOMMENDATION_REFRESH_SECONDS = float(os.getenv("RECOMMENDATION_REFRESH_SECONDS", "60"))
+# Reconstruction complète périodique (prend en compte les suppressions)
+RECOMMENDATION_REBUILD_SECONDS = float(os.getenv("RECOMMENDATION_REBUILD_SECONDS", "3600"))
+
+Neighbours = list[tuple[int, float]]
+
+class ItemSimilarityIndex:
+    """Table des k plus proches voisins de chaque item"""
+
+    def __init__(self, k: int = RECOMMENDATION_TOP_K):
+        self.k = k
+        self.neighbours: dict[int, Neighbours] = {}
+        self.popular: list[int] = []
+        self.user_items: dict[int, frozenset[int]] = {}
+        self._user_index: dict[int, int] = {}
+        self._item_index: dict[int, int] = {}
+        self._item_ids: list[int] = []
+        self._rows: list[int] = []
+        self._cols: list[int] = []
+        self._write_lock = threading.Lock()
+
+    def update(self, pairs: Iterable[tuple[int, int]]) -> int:
+        """Ajouter des paires (utilisateur, item) et recalculer les items concernés"""
+        with self._write_lock:
+            user_items = dict(self.user_items)
+            touched_users = set()
+            for user_id, item_id in pairs:
+                items = user_items.get(user_id, frozenset())
+                if item_id in items:
+                    continue
+                user_items[user_id] = items | {item_id}
+                touched_users.add(user_id)
+                self._rows.append(self._user_index.setdefault(user_id, len(self._user_index)))
+                if item_id not in self._item_index:
+                    self._item_index[item_id] = len(self._item_ids)
+                    self._item_ids.append(item_id)
+                self._cols.append(self._item_index[item_id])
+            if not touched_users:
+                return 0
+
+            # Seuls les items des utilisateurs concernés voient leurs co-occurrences changer
+            affected = set()
+            for user_id in touched_users:
+                affected.update(user_items[user_id])
+            self._recompute(sorted(self._item_index[item_id] for item_id in affected))
+            self.user_items = user_items
+            return len(affected)
+
+    def _recompute(self, columns: list[int]) -> None:
+        matrix = csc_matrix(
+            (np.ones(len(self._rows), dtype=np.float32), (self._rows, self._cols)),
+            shape=(len(self._user_index), len(self._item_ids)),
+        )
+        counts = np.asarray(matrix.sum(axis=0)).ravel()
+        norms = 1.0 / np.sqrt(np.maximum(counts, 1.0))
+
+        # Co-occurrences des items concernés avec tous les items, normalisées en cosinus
+        cooccurrence = (matrix[:, columns].T @ matrix).tocsr()
+        similarity = cooccurrence.multiply(norms[columns][:, None]).multiply(norms[None, :]).tocsr()
+
+        item_ids = np.asarray(self._item_ids)
+        neighbours = dict(self.neighbours)
+        for row, column in enumerate(columns):
+            start, end = similarity.indptr[row], similarity.indptr[row + 1]
+            indices = similarity.indices[start:end]
+            scores = similarity.data[start:end]
+            keep = indices != column
+            indices, scores = indices[keep], scores[keep]
+            if len(scores) > self.k:
+                top = np.argpartition(-scores, self.k)[:self.k]
+                indices, scores = indices[top], scores[top]
+            order = np.argsort(-scores, kind="stable")
+            neighbours[int(item_ids[column])] = [
+                (int(item_id), round(float(score), 6))
+                for item_id, score in zip(item_ids[indices[order]], scores[order])
+            ]
+
+        top = np.argsort(-counts, kind="stable")[:self.k]
+        self.popular = [int(item_id) for item_id in item_ids[top]]
+        # Remplacement atomique : les lecteurs voient l'ancienne ou la nouvelle table
+        self.neighbours = neighbours
+
+    def similar(self, item_id: int, limit: int) -> Neighbours:
+        return self.neighbours.get(item_id, [])[:limit]
+
+    def recommend(self, user_id: int, limit: int) -> Neighbours:
+        """Items à suggérer : somme des similarités avec les items déjà suivis"""
+        seen = self.user_items.get(user_id, frozenset())
+        neighbours = self.neighbours
+        scores: dict[int, float] = defaultdict(float)
+        for item_id in seen:
+            for neighbour_id, score in neighbours.get(item_id, ()):
+                if neighbour_id not in seen:
+                    scores[neighbour_id] += score
+        if not scores:
+            # Démarrage à froid : items les plus suivis
+            return [(item_id, 0.0) for item_id in self.popular if item_id not in seen][:limit]
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(item_id, round(score, 6)) for item_id, score in ranked[:limit]]
+
+class Recommender:
+    """Index des cours (inscriptions) et des modules (événements de progression)"""
+
+    def __init__(self, k: int = RECOMMENDATION_TOP_K):
+        self.k = k
+        self.courses = ItemSimilarityIndex(k)
+        self.modules = ItemSimilarityIndex(k)
+        self.refreshed_at: Optional[datetime] = None
+        self._last_enrollment_id = 0
+        self._last_event_received_at: Optional[datetime] = None
+        self._refresh_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.refreshed_at is not None
+
+    def refresh(self, db: Session) -> None:
+        """Intégrer les inscriptions et événements arrivés depuis le dernier passage"""
+        with self._refresh_lock:
+            enrollments = (
+                db.query(Enrollment.id, Enrollment.user_id, Enrollment.course_id)
+                .filter(Enrollment.id > self._last_enrollment_id)
+                .filter(Enrollment.user_id.isnot(None), Enrollment.course_id.isnot(None))
+                .order_by(Enrollment.id)
+                .all()
+            )
+            if enrollments:
+                self._last_enrollment_id = enrollments[-1].id
+                self.courses.update((row.user_id, row.course_id) for row in enrollments)
+
+            # Une ligne par paire (utilisateur, module) plutôt qu'une par événement
+            events_query = db.query(
+                ProgressEvent.user_id,
+                ProgressEvent.module_id,
+                func.max(ProgressEvent.received_at).label("received_at"),
+            ).filter(ProgressEvent.module_id.isnot(None))
+            if self._last_event_received_at is not None:
+                # >= : des événements peuvent partager la même date ; les doublons sont ignorés
+                events_query = events_query.filter(ProgressEvent.received_at >= self._last_event_received_at)
+            events = events_query.group_by(ProgressEvent.user_id, ProgressEvent.module_id).all()
+            if events:
+                self._last_event_received_at = max(row.received_at for row in events)
+                self.modules.update((row.user_id, row.module_id) for row in events)
+            self.refreshed_at = datetime.utcnow()
+
+    def rebuild(self, db: Session) -> None:
+        """Reconstruire les index depuis zéro puis les substituer aux anciens"""
+        fresh = Recommender(self.k)
+        fresh.refresh(db)
+        with self._refresh_lock:
+            self.courses, self.modules = fresh.courses, fresh.modules
+            self._last_enrollment_id = fresh._last_enrollment_id
+            self._last_event_received_at = fresh._last_event_received_at
+            self.refreshed_at = fresh.refreshed_at
+
+    def _run(self, session_factory: sessionmaker) -> None:
+        last_rebuild = time.monotonic()
+        while not self._stop_event.wait(RECOMMENDATION_REFRESH_SECONDS):
+            db = session_factory()
+            try:
+                if time.monotonic() - last_rebuild > RECOMMENDATION_REBUILD_SECONDS:
+                    self.rebuild(db)
+                    last_rebuild = time.monotonic()
+                else:
+                    self.refresh(db)
+            except Exception:
+                logger.exception("Failed to refresh recommendations")
+            finally:
+                db.close()
+
+    def start(self, session_factory: sessionmaker) -> None:
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(session_factory,), name="recommendations", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -0,0 +1,101 @@
+"""Requêtes les plus fréquentes, construites une seule fois.
+
+Les recherches d'utilisateur (authentification, connexion) et de module par id
+sont déclarées ici sous forme d'instructions `select()` figées avec des
+paramètres nommés : SQLAlchemy les retrouve dans son cache de compilation sans
+avoir à reconstruire la requête à chaque appel.
+
+Sur PostgreSQL, chaque connexion prépare en plus ces requêtes côté serveur
+(`PREPARE`) et les exécute avec `EXECUTE`, ce qui évite l'analyse et la
+planification à chaque requête. `DB_PREPARED_STATEMENTS=false` désactive ce
+mode, par exemple derrière PgBouncer en mode transaction.
+"""
+import os
+import re
+from typing import Optional
+from sqlalchemy import event, select, bindparam, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from models.module import CourseModule
+from models.user import User
+
+DB_PREPARED_STATEMENTS = os.getenv("DB_PREPARED_STATEMENTS", "true").lower() in ("1", "true", "yes")
+
+_PREPARED_FLAG = "repository_prepared"
+_PYFORMAT_PARAM = re.compile(r"%\((\w+)\)s")
+
+class Lookup:
+    """Requête figée, exécutable telle quelle ou via une instruction préparée"""
+
+    def __init__(self, name: str, entity, statement, params: tuple[str, ...]):
+        self.name = name
+        self.statement = statement
+        self.params = params
+        placeholders = ", ".join(f":{param}" for param in params)
+        self.prepared = select(entity).from_statement(
+            text(f"EXECUTE {name}({placeholders})").columns(*entity.__table__.columns)
+        )
+
+    def prepare_sql(self, dialect) -> str:
+        """Texte du PREPARE : paramètres nommés convertis en $1, $2..."""
+        sql = str(self.statement.compile(dialect=dialect))
+        sql = _PYFORMAT_PARAM.sub(lambda match: f"${self.params.index(match.group(1)) + 1}", sql)
+        return f"PREPARE {self.name} AS {sql.replace('%%', '%')}"
+
+    def first(self, db: Session, **values):
+        connection = db.connection()
+        statement = self.prepared if connection.connection.info.get(_PREPARED_FLAG) else self.statement
+        return db.execute(statement, values).scalars().first()
+
+# Les recherches portent sur des colonnes uniques : pas besoin de LIMIT
+USER_BY_EMAIL = Lookup(
+    "user_by_email",
+    User,
+    select(User).where(User.email == bindparam("email")),
+    ("email",),
+)
+USER_BY_LOGIN = Lookup(
+    "user_by_login",
+    User,
+    select(User).where((User.email == bindparam("login")) | (User.username == bindparam("login"))),
+    ("login",),
+)
+MODULE_BY_ID = Lookup(
+    "module_by_id",
+    CourseModule,
+    select(CourseModule).where(CourseModule.id == bindparam("module_id")),
+    ("module_id",),
+)
+
+LOOKUPS = (USER_BY_EMAIL, USER_BY_LOGIN, MODULE_BY_ID)
+
+def get_user_by_email(db: Session, email: str) -> Optional[User]:
+    return USER_BY_EMAIL.first(db, email=email)
+
+def get_user_by_login(db: Session, login: str) -> Optional[User]:
+    """Utilisateur dont l'email ou le username correspond"""
+    return USER_BY_LOGIN.first(db, login=login)
+
+def get_module(db: Session, module_id: int) -> Optional[CourseModule]:
+    return MODULE_BY_ID.first(db, module_id=module_id)
+
+def install_prepared_statements(engine: Engine) -> None:
+    """Préparer les requêtes sur chaque nouvelle connexion PostgreSQL du moteur.
+
+    Les connexions ouvertes avant l'appel continuent d'utiliser les requêtes
+    compilées classiques.
+    """
+    if not DB_PREPARED_STATEMENTS or engine.dialect.name != "postgresql":
+        return
+
+    @event.listens_for(engine, "connect")
+    def prepare(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for lookup in LOOKUPS:
+                cursor.execute(lookup.prepare_sql(engine.dialect))
+        finally:
+            cursor.close()
+        # Les instructions préparées survivent à la transaction : on la clôt tout de suite
+        dbapi_connection.commit()
+        connection_record.info[_PREPARED_FLAG] = True
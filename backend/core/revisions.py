@@ -0,0 +1,253 @@
+"""Historique des modules avec stockage dédupliqué des contenus.
+
+Le contenu est découpé en morceaux aux fins de ligne, une coupure étant placée
+après les lignes dont l'empreinte vérifie un masque (découpage défini par le
+contenu). Une modification locale ne déplace donc que les frontières voisines :
+les autres morceaux gardent le même SHA-256 et ne sont stockés qu'une fois.
+Une révision n'est qu'une liste de hachages ; restaurer une version ne crée
+aucun nouveau morceau. Après une modification partielle, seuls les morceaux
+autour des modifications sont relus et redécoupés, jusqu'à retomber sur une
+frontière de la révision précédente.
+"""
+import bisect
+import difflib
+import hashlib
+import zlib
+from typing import Iterable, Iterator, Optional
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from core.patching import Edit
+from models.module import CourseModule
+from models.revision import ContentChunk, ModuleRevision
+
+CHUNK_MIN_SIZE = 1024
+CHUNK_MAX_SIZE = 16384
+# Une ligne sur 8 en moyenne termine un morceau (une fois CHUNK_MIN_SIZE atteint)
+_BOUNDARY_MASK = 0x7
+
+def _lines(parts: Iterable[str]) -> Iterator[tuple[str, int]]:
+    """Lignes du texte formé par `parts`, avec la position de leur début"""
+    pending, position = "", 0
+    for part in parts:
+        lines = (pending + part).splitlines(keepends=True)
+        # La dernière ligne peut continuer dans la partie suivante ("\r" puis "\n" compris)
+        pending = lines.pop() if lines else ""
+        for line in lines:
+            yield line, position
+            position += len(line)
+    if pending:
+        yield pending, position
+
+def _iter_chunks(parts: Iterable[str]) -> Iterator[tuple[str, int]]:
+    """Morceaux du texte formé par `parts`, avec le début de la ligne de leur dernier fragment"""
+    current: list[str] = []
+    size = 0
+    last_line = 0
+    for line, line_start in _lines(parts):
+        # Les lignes très longues (contenu sans retour à la ligne) sont coupées à taille fixe
+        for start in range(0, len(line), CHUNK_MAX_SIZE):
+            piece = line[start:start + CHUNK_MAX_SIZE]
+            if size + len(piece) > CHUNK_MAX_SIZE and current:
+                yield "".join(current), last_line
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece)
+            last_line = line_start
+            if size >= CHUNK_MIN_SIZE and zlib.crc32(piece.encode("utf-8")) & _BOUNDARY_MASK == 0:
+                yield "".join(current), last_line
+                current, size = [], 0
+    if current:
+        yield "".join(current), last_line
+
+def split_chunks(content: str) -> list[str]:
+    """Découper le contenu en morceaux dont les frontières dépendent du texte"""
+    return [chunk for chunk, _ in _iter_chunks([content])]
+
+def chunk_hash(data: str) -> str:
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+def _insert_ignore(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(ContentChunk).on_conflict_do_nothing()
+    if dialect == "sqlite":
+        return sqlite.insert(ContentChunk).on_conflict_do_nothing()
+    return insert(ContentChunk)
+
+def store_chunks(db: Session, content: str) -> list[str]:
+    """Enregistrer les morceaux absents et retourner la liste des hachages"""
+    return _store(db, split_chunks(content))
+
+def _store(db: Session, pieces: list[str]) -> list[str]:
+    hashes = [chunk_hash(data) for data in pieces]
+    chunks = dict(zip(hashes, pieces))
+    if not chunks:
+        return hashes
+    existing = {
+        value for (value,) in db.query(ContentChunk.hash).filter(ContentChunk.hash.in_(chunks)).all()
+    }
+    missing = [
+        {"hash": value, "data": data, "size": len(data)}
+        for value, data in chunks.items() if value not in existing
+    ]
+    if missing:
+        # Une transaction concurrente a pu insérer le même morceau entre-temps
+        db.execute(_insert_ignore(db), missing)
+    return hashes
+
+def record_revision(
+    db: Session,
+    module: CourseModule,
+    created_by: Optional[int] = None,
+    chunk_hashes: Optional[list[str]] = None,
+    content_length: Optional[int] = None,
+) -> ModuleRevision:
+    """Enregistrer l'état courant du module (sans commiter).
+
+    `module` peut aussi être une ligne de résultat portant les mêmes attributs ;
+    avec `chunk_hashes` et `content_length`, son contenu n'est pas lu.
+    """
+    if chunk_hashes is None:
+        chunk_hashes = store_chunks(db, module.content)
+    if content_length is None:
+        content_length = len(module.content)
+    revision = ModuleRevision(
+        module_id=module.id,
+        version=module.version,
+        title=module.title,
+        type=module.type,
+        chunk_hashes=chunk_hashes,
+        content_length=content_length,
+        created_by=created_by,
+    )
+    db.add(revision)
+    return revision
+
+def has_history(db: Session, module_id: int) -> bool:
+    return (
+        db.query(ModuleRevision.id)
+        .filter(ModuleRevision.module_id == module_id)
+        .first()
+    ) is not None
+
+def ensure_baseline(db: Session, module: CourseModule) -> None:
+    """Conserver l'état d'un module antérieur à l'historique avant de le modifier"""
+    if not has_history(db, module.id):
+        record_revision(db, module)
+
+def get_revision(db: Session, module_id: int, version: int) -> Optional[ModuleRevision]:
+    return (
+        db.query(ModuleRevision)
+        .filter(ModuleRevision.module_id == module_id, ModuleRevision.version == version)
+        .first()
+    )
+
+def _chunks(db: Session, hashes, columns) -> dict:
+    if not hashes:
+        return {}
+    rows = db.query(ContentChunk.hash, *columns).filter(ContentChunk.hash.in_(set(hashes)))
+    return {row.hash: row for row in rows}
+
+def load_content(db: Session, revision: ModuleRevision) -> str:
+    chunks = _chunks(db, revision.chunk_hashes, (ContentChunk.data,))
+    return "".join(chunks[value].data for value in revision.chunk_hashes)
+
+def _apply_edits(text: str, start: int, edits: list[Edit]) -> str:
+    """Appliquer à `text`, qui commence à la position `start`, les modifications qu'il contient"""
+    pieces = []
+    position = 0
+    for edit in edits:
+        pieces.append(text[position:edit.offset - start])
+        pieces.append(edit.insert)
+        position = edit.offset - start + edit.delete
+    pieces.append(text[position:])
+    return "".join(pieces)
+
+def patch_chunks(db: Session, previous: ModuleRevision, edits: list[Edit], batch: int = 8) -> list[str]:
+    """Hachages du contenu de `previous` une fois les modifications appliquées.
+
+    Le découpage reprend une frontière avant la première modification (une de
+    plus : la coupure à taille fixe dépend du fragment suivant) et s'arrête
+    dès qu'une frontière, sur une ligne commencée après la dernière
+    modification, coïncide avec une frontière de `previous` : la suite du
+    découpage est alors identique. Seuls ces morceaux sont lus.
+    """
+    hashes = previous.chunk_hashes
+    if not hashes:
+        return store_chunks(db, _apply_edits("", 0, edits))
+    sizes = _chunks(db, hashes, (ContentChunk.size,))
+    ends = []
+    for value in hashes:
+        ends.append((ends[-1] if ends else 0) + sizes[value].size)
+    # Morceau contenant la première modification (le dernier pour un ajout en fin), puis le précédent
+    first = max(min(bisect.bisect_right(ends, edits[0].offset), len(hashes) - 1) - 1, 0)
+    last = min(bisect.bisect_left(ends, edits[-1].offset + edits[-1].delete), len(hashes) - 1)
+    start = ends[first - 1] if first > 0 else 0
+    delta = sum(len(edit.insert) - edit.delete for edit in edits)
+    # Fin de la dernière modification dans le nouveau contenu
+    edited_end = edits[-1].offset + edits[-1].delete + delta
+
+    def parts():
+        # Morceaux modifiés d'un bloc, puis les suivants par lots, tant que le découpage les demande
+        data = _chunks(db, hashes[first:last + 1], (ContentChunk.data,))
+        yield _apply_edits("".join(data[value].data for value in hashes[first:last + 1]), start, edits)
+        for index in range(last + 1, len(hashes), batch):
+            data = _chunks(db, hashes[index:index + batch], (ContentChunk.data,))
+            for value in hashes[index:index + batch]:
+                yield data[value].data
+
+    boundaries = {end: index for index, end in enumerate(ends)}
+    pieces = []
+    position = start
+    for chunk, line_start in _iter_chunks(parts()):
+        pieces.append(chunk)
+        position += len(chunk)
+        index = boundaries.get(position - delta)
+        if start + line_start > edited_end and index is not None:
+            return hashes[:first] + _store(db, pieces) + hashes[index + 1:]
+    return hashes[:first] + _store(db, pieces)
+
+def diff_revisions(db: Session, old: ModuleRevision, new: ModuleRevision) -> list[dict]:
+    """Modifications (offset, delete, insert) qui transforment `old` en `new`.
+
+    Les morceaux communs en début et en fin de liste ne sont pas chargés : seul
+    l'intervalle qui diffère est comparé ligne par ligne.
+    """
+    old_hashes, new_hashes = old.chunk_hashes, new.chunk_hashes
+    prefix = 0
+    while prefix < min(len(old_hashes), len(new_hashes)) and old_hashes[prefix] == new_hashes[prefix]:
+        prefix += 1
+    suffix = 0
+    while (
+        suffix < min(len(old_hashes), len(new_hashes)) - prefix
+        and old_hashes[-1 - suffix] == new_hashes[-1 - suffix]
+    ):
+        suffix += 1
+    old_middle = old_hashes[prefix:len(old_hashes) - suffix]
+    new_middle = new_hashes[prefix:len(new_hashes) - suffix]
+    if not old_middle and not new_middle:
+        return []
+
+    sizes = _chunks(db, old_hashes[:prefix], (ContentChunk.size,))
+    offset = sum(sizes[value].size for value in old_hashes[:prefix])
+    chunks = _chunks(db, old_middle + new_middle, (ContentChunk.data,))
+    old_lines = "".join(chunks[value].data for value in old_middle).splitlines(keepends=True)
+    new_lines = "".join(chunks[value].data for value in new_middle).splitlines(keepends=True)
+
+    # Position de début de chaque ligne de l'ancienne version
+    starts = [offset]
+    for line in old_lines:
+        starts.append(starts[-1] + len(line))
+
+    edits = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        edits.append({
+            "offset": starts[i1],
+            "delete": starts[i2] - starts[i1],
+            "insert": "".join(new_lines[j1:j2]),
+        })
+    return edits
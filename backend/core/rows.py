@@ -0,0 +1,49 @@
+"""Réponses de liste sans instances ORM.
+
+`db.query(Model).all()` crée pour chaque ligne une instance avec son état
+d'attributs et son entrée dans l'identity map, que FastAPI recopie ensuite
+dans un modèle Pydantic avant de l'encoder. Pour les longues listes, on lit
+seulement les colonnes du schéma de réponse en lignes simples (tuples de
+SQLAlchemy), par lots, et on encode chaque lot en JSON aussitôt : la mémoire
+dépend de la taille d'un lot, plus du nombre de lignes.
+"""
+import enum
+import json
+import os
+from datetime import date, datetime
+from typing import Iterator, Type
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+
+LIST_BATCH_SIZE = int(os.getenv("LIST_BATCH_SIZE", "1000"))
+
+def lean_select(schema: Type[BaseModel], model) -> Select:
+    """SELECT des seules colonnes de `model` exposées par `schema`"""
+    return select(*(getattr(model, field) for field in schema.model_fields))
+
+def _encode(value):
+    # Même rendu que Pydantic pour les types présents dans les schémas
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def iter_json_array(db: Session, statement: Select, batch_size: int = LIST_BATCH_SIZE) -> Iterator[bytes]:
+    """Tableau JSON des lignes de `statement`, produit lot par lot"""
+    result = db.execute(statement.execution_options(stream_results=True, yield_per=batch_size))
+    fields = list(result.keys())
+    separator = b"["
+    for rows in result.partitions():
+        chunk = ",".join(
+            json.dumps(dict(zip(fields, row)), default=_encode, ensure_ascii=False) for row in rows
+        )
+        yield separator + chunk.encode("utf-8")
+        separator = b","
+    yield b"]" if separator == b"," else b"[]"
+
+def json_list_response(db: Session, statement: Select) -> StreamingResponse:
+    """Réponse JSON en flux ; la session reste ouverte jusqu'à la fin de l'envoi"""
+    return StreamingResponse(iter_json_array(db, statement), media_type="application/json")
@@ -1,9 +1,13 @@
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Optional, Union
 from jose import jwt
 from passlib.context import CryptContext
 import os
 from dotenv import load_dotenv
+from core.metrics import PASSWORD_HASH_DURATION
+from core.tracing import tracer
 
 load_dotenv()
 
@@ -11,13 +15,65 @@ SECRET_KEY = os.getenv("SECRET_KEY", "changeme123")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Politique de hachage des mots de passe (calibrage : python -m benchmarks.password_hashing).
+# Un hachage produit avec un autre algorithme ou un autre coût est remplacé à la
+# connexion suivante, le mot de passe en clair étant alors connu.
+PASSWORD_HASH_SCHEME = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST_KIB = int(os.getenv("ARGON2_MEMORY_COST_KIB", "65536"))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+
+SUPPORTED_SCHEMES = ("argon2", "bcrypt")
+
+def build_password_context(
+    scheme: str = PASSWORD_HASH_SCHEME,
+    bcrypt_rounds: int = BCRYPT_ROUNDS,
+    argon2_time_cost: int = ARGON2_TIME_COST,
+    argon2_memory_cost: int = ARGON2_MEMORY_COST_KIB,
+    argon2_parallelism: int = ARGON2_PARALLELISM,
+) -> CryptContext:
+    if scheme not in SUPPORTED_SCHEMES:
+        raise ValueError(f"Unsupported password hash scheme: {scheme}")
+    # Les autres algorithmes restent vérifiables pour migrer les hachages existants ;
+    # min/max égaux au coût voulu : un coût plus faible comme plus élevé est à refaire
+    return CryptContext(
+        schemes=[scheme] + [other for other in SUPPORTED_SCHEMES if other != scheme],
+        default=scheme,
+        deprecated="auto",
+        bcrypt__rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        bcrypt__max_rounds=bcrypt_rounds,
+        argon2__type="ID",
+        argon2__rounds=argon2_time_cost,
+        argon2__min_rounds=argon2_time_cost,
+        argon2__max_rounds=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
+
+pwd_context = build_password_context()
+
+@contextmanager
+def _hash_span(operation: str, hashed_password: Optional[str] = None):
+    scheme = pwd_context.identify(hashed_password) if hashed_password else pwd_context.default_scheme()
+    started = time.perf_counter()
+    with tracer.span(f"password.{operation}", **{"password.scheme": scheme}):
+        yield
+    PASSWORD_HASH_DURATION.observe((operation, scheme or "unknown"), time.perf_counter() - started)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    with _hash_span("verify", hashed_password):
+        return pwd_context.verify(plain_password, hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """Vérifier le mot de passe ; retourne aussi un nouveau hachage si la politique a changé"""
+    with _hash_span("verify", hashed_password):
+        return pwd_context.verify_and_update(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    with _hash_span("hash"):
+        return pwd_context.hash(password)
 
 def create_access_token(data: dict, expires_delta: Union[timedelta, None] = None):
     to_encode = data.copy()
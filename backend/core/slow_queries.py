@@ -0,0 +1,154 @@
+"""Journal des requêtes SQL lentes.
+
+Les événements du moteur mesurent chaque instruction ; au-delà de
+`SLOW_QUERY_THRESHOLD_MS`, l'instruction est journalisée (logger
+`core.slow_queries`) et gardée dans un tampon circulaire des
+`SLOW_QUERY_BUFFER_SIZE` dernières, lu par `GET /api/diagnostics/slow-queries`.
+Les valeurs des paramètres ne sont jamais conservées, seulement leur type.
+
+Avec `SLOW_QUERY_EXPLAIN=1` (PostgreSQL uniquement), un SELECT lent est
+rejoué sous `EXPLAIN (ANALYZE, BUFFERS)` sur la même connexion, dans un
+savepoint, et le plan est joint à l'échantillon. Le rejeu double le coût de
+la requête lente : à réserver au diagnostic.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Optional
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "500"))
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "100"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "0") == "1"
+
+_STATEMENT_MAX_LENGTH = 5000
+
+# Scope ASGI de la requête en cours ; la route y est ajoutée par le routeur
+_request_scope: ContextVar[Optional[dict]] = ContextVar("request_scope", default=None)
+
+class RequestScopeMiddleware:
+    """Rend la requête en cours visible des événements SQL (route appelante)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_scope.reset(token)
+
+def _current_route() -> Optional[str]:
+    scope = _request_scope.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return f"{scope['method']} {route.path if route is not None else scope['path']}"
+
+def _redact_one(parameters: Any) -> Any:
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+def redact_parameters(parameters: Any, executemany: bool) -> Any:
+    """Types des paramètres à la place de leurs valeurs (premier jeu seulement pour un executemany)"""
+    if executemany:
+        rows = list(parameters or [])
+        return {"rows": len(rows), "first": _redact_one(rows[0]) if rows else None}
+    return _redact_one(parameters)
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float = SLOW_QUERY_THRESHOLD_MS,
+                 maxlen: int = SLOW_QUERY_BUFFER_SIZE, explain: bool = SLOW_QUERY_EXPLAIN):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self._samples: deque = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def install(self, engine: Engine) -> "SlowQueryLog":
+        """Mesurer les instructions de `engine` (sans effet si déjà installé)"""
+        if not event.contains(engine, "before_cursor_execute", self._before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        return self
+
+    def samples(self) -> list[dict]:
+        """Échantillons du plus récent au plus ancien"""
+        with self._lock:
+            return list(reversed(self._samples))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slow_query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_slow_query_started", None)
+        if started is None:
+            return
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms < self.threshold_ms:
+            return
+        sample = {
+            "statement": statement[:_STATEMENT_MAX_LENGTH],
+            "parameters": redact_parameters(parameters, executemany),
+            "route": _current_route(),
+            "duration_ms": round(duration_ms, 2),
+            "recorded_at": datetime.utcnow(),
+            "explain": None,
+        }
+        if self.explain and conn.dialect.name == "postgresql" and not executemany and _is_select(statement):
+            sample["explain"] = _explain(cursor.connection, statement, parameters)
+        logger.warning(
+            "Slow query (%.0f ms) in %s: %s",
+            duration_ms, sample["route"] or "background task", " ".join(statement.split())[:500],
+        )
+        with self._lock:
+            self._samples.append(sample)
+
+def _is_select(statement: str) -> bool:
+    # EXPLAIN ANALYZE exécute l'instruction : jamais pour une écriture
+    return statement.lstrip().upper().startswith("SELECT")
+
+def _explain(dbapi_connection, statement: str, parameters) -> Optional[str]:
+    """Plan réel de l'instruction, rejouée dans un savepoint sur la même connexion"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        except Exception as exc:
+            # Une erreur annulerait la transaction de la requête : on revient au savepoint
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            logger.warning("Could not explain slow query: %s", exc)
+            plan = None
+        cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return plan
+    except Exception as exc:
+        logger.warning("Could not explain slow query: %s", exc)
+        return None
+    finally:
+        cursor.close()
+
+# Installé sur le moteur de db.py par main.py
+slow_query_log = SlowQueryLog()
@@ -0,0 +1,97 @@
+"""Agrégats des tableaux de bord.
+
+Les GROUP BY sont exécutés par le job `refresh_dashboard_stats` et leur
+résultat est stocké dans `stat_rollups`. L'endpoint des statistiques ne lit
+que cette table et programme un rafraîchissement quand elle est trop ancienne
+ou quand le catalogue a changé. Chaque rafraîchissement publie un événement
+"dashboard" pour que les tableaux de bord ouverts rechargent leurs chiffres.
+"""
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from core.invalidation import bus, invalidate
+from models.course import Course
+from models.enrollment import Enrollment
+from models.module import CourseModule, ModuleType
+from models.progress import ProgressEvent
+from models.stats import StatRollup
+from models.user import User, RoleEnum
+
+DASHBOARD_STATS_MAX_AGE_SECONDS = float(os.getenv("DASHBOARD_STATS_MAX_AGE_SECONDS", "60"))
+RECENT_MODULES_LIMIT = 5
+TOP_COURSES_LIMIT = 20
+REFRESH_JOB = "refresh_dashboard_stats"
+
+_catalogue_changed = threading.Event()
+
+def _mark_catalogue_changed(namespace: str, key=None) -> None:
+    if namespace in ("modules", "courses"):
+        _catalogue_changed.set()
+
+bus.subscribe(_mark_catalogue_changed)
+
+def consume_catalogue_change() -> bool:
+    """Indiquer (une seule fois) si le catalogue a changé depuis le dernier appel"""
+    changed = _catalogue_changed.is_set()
+    _catalogue_changed.clear()
+    return changed
+
+def compute_rollups(db: Session) -> dict[str, object]:
+    now = datetime.utcnow()
+    modules_by_type = {module_type.value: 0 for module_type in ModuleType}
+    for module_type, count in db.query(CourseModule.type, func.count()).group_by(CourseModule.type):
+        modules_by_type[module_type.value] = count
+
+    users_by_role = {role.value: 0 for role in RoleEnum}
+    for role, count in db.query(User.role, func.count()).group_by(User.role):
+        users_by_role[role.value] = count
+
+    enrollments_by_course = [
+        {"course_id": course_id, "title": title, "enrollments": count}
+        for course_id, title, count in db.query(Course.id, Course.title, func.count(Enrollment.id))
+        .join(Enrollment, Enrollment.course_id == Course.id)
+        .group_by(Course.id, Course.title)
+        .order_by(func.count(Enrollment.id).desc(), Course.id)
+        .limit(TOP_COURSES_LIMIT)
+    ]
+
+    recent_modules = [
+        {"id": module_id, "title": title, "type": module_type.value, "created_at": created_at.isoformat()}
+        for module_id, title, module_type, created_at in db.query(
+            CourseModule.id, CourseModule.title, CourseModule.type, CourseModule.created_at
+        )
+        .order_by(CourseModule.created_at.desc(), CourseModule.id.desc())
+        .limit(RECENT_MODULES_LIMIT)
+    ]
+
+    # Filtre sur la clé de partition : seules les partitions récentes sont lues
+    active_users_7d = (
+        db.query(func.count(func.distinct(ProgressEvent.user_id)))
+        .filter(ProgressEvent.occurred_at >= now - timedelta(days=7))
+        .scalar()
+    )
+
+    return {
+        "modules_by_type": modules_by_type,
+        "users_by_role": users_by_role,
+        "enrollments_by_course": enrollments_by_course,
+        "recent_modules": recent_modules,
+        "active_users_7d": active_users_7d,
+    }
+
+def refresh_rollups(db: Session) -> datetime:
+    """Recalculer et enregistrer tous les agrégats (sans commit)"""
+    refreshed_at = datetime.utcnow()
+    for name, payload in compute_rollups(db).items():
+        db.merge(StatRollup(name=name, payload=payload, refreshed_at=refreshed_at))
+    invalidate(db, "dashboard")
+    return refreshed_at
+
+def read_rollups(db: Session) -> tuple[dict[str, object], Optional[datetime]]:
+    rows = db.query(StatRollup).all()
+    if not rows:
+        return {}, None
+    return {row.name: row.payload for row in rows}, min(row.refreshed_at for row in rows)
@@ -0,0 +1,69 @@
+"""Handlers des jobs exécutés en arrière-plan par `worker.py`"""
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from core.bundles import RENDER_BUNDLE_JOB, render_bundle
+from core.invalidation import invalidate
+from core.jobs import job_handler
+from core.ordering import rebalance_lessons
+from core.progress import (
+    PARTITIONS_JOB, PROGRESS_PARTITION_CHECK_INTERVAL_HOURS, ensure_partitions, schedule_partition_check,
+)
+from core.stats import REFRESH_JOB, refresh_rollups
+from models.enrollment import Enrollment
+from models.job import Job
+from models.progress import ProgressEvent
+from models.revision import ModuleRevision
+from models.user import User
+
+@job_handler("delete_user")
+def delete_user_data(db: Session, payload: dict) -> dict:
+    """Supprimer un utilisateur et toutes ses données"""
+    user_id = payload["user_id"]
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is None:
+        # Déjà supprimé par un job précédent : rien à faire
+        return {"deleted": False}
+
+    enrollments = (
+        db.query(Enrollment)
+        .filter(Enrollment.user_id == user_id)
+        .delete(synchronize_session=False)
+    )
+    progress_events = (
+        db.query(ProgressEvent)
+        .filter(ProgressEvent.user_id == user_id)
+        .delete(synchronize_session=False)
+    )
+    db.query(Job).filter(Job.created_by == user_id).update(
+        {Job.created_by: None}, synchronize_session=False
+    )
+    db.query(ModuleRevision).filter(ModuleRevision.created_by == user_id).update(
+        {ModuleRevision.created_by: None}, synchronize_session=False
+    )
+    db.delete(user)
+    invalidate(db, "users", user_id)
+    return {"deleted": True, "enrollments": enrollments, "progress_events": progress_events}
+
+@job_handler("rebalance_lessons")
+def rebalance_course_lessons(db: Session, payload: dict) -> dict:
+    """Renuméroter les leçons d'un cours dont les clés d'ordre sont trop serrées"""
+    return {"lessons": rebalance_lessons(db, payload["course_id"])}
+
+@job_handler(REFRESH_JOB)
+def refresh_dashboard_stats(db: Session, payload: dict) -> dict:
+    """Recalculer les agrégats des tableaux de bord"""
+    return {"refreshed_at": refresh_rollups(db).isoformat()}
+
+@job_handler(RENDER_BUNDLE_JOB)
+def render_course_bundle(db: Session, payload: dict) -> dict:
+    """Rendre le paquet hors ligne d'un cours après une modification"""
+    return {"hash": render_bundle(db, payload["course_id"])}
+
+@job_handler(PARTITIONS_JOB)
+def ensure_progress_partitions(db: Session, payload: dict) -> dict:
+    """Créer les partitions de progression à venir, puis reprogrammer la vérification"""
+    created = ensure_partitions(db.get_bind())
+    schedule_partition_check(
+        db, run_at=datetime.utcnow() + timedelta(hours=PROGRESS_PARTITION_CHECK_INTERVAL_HOURS)
+    )
+    return {"created": created}
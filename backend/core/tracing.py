@@ -0,0 +1,366 @@
+"""Traces des requêtes : spans exportés au format OTLP/JSON, sans service externe.
+
+Chaque requête HTTP ouvre un span racine (`TracingMiddleware`) ; le décodage
+du JWT, le chargement de l'utilisateur, le hachage des mots de passe, chaque
+instruction SQL (événements du moteur) et la sérialisation de la réponse y
+ajoutent leurs spans (les requêtes SQL hors trace, comme celles des threads
+d'arrière-plan, ne sont pas tracées). Quand le span racine se termine, la trace complète est
+exportée :
+- `TRACING_EXPORTER=file` : une ligne JSON par trace dans `TRACING_FILE`,
+  au format `ExportTraceServiceRequest` d'OTLP (celui de l'exportateur
+  fichier du collecteur OpenTelemetry, relisible par ses outils), écrite par
+  un thread dédié hors de la boucle asyncio ;
+- `TRACING_EXPORTER=memory` : les spans restent en mémoire
+  (`tracer.exporter.spans`), pour les tests ou une session interactive.
+Sans exportateur (par défaut), `tracer.span()` ne crée rien.
+
+Un en-tête W3C `traceparent` reçu rattache la requête à la trace de l'appelant.
+
+Le span `response.serialize` s'appuie sur `fastapi.routing.serialize_response`,
+une fonction interne de FastAPI : vérifié avec la version de requirements.txt
+(0.104.1). Si elle disparaît, ce span manque et le reste de la trace est inchangé.
+"""
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+from dotenv import load_dotenv
+import fastapi.routing
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "")
+TRACING_FILE = os.getenv("TRACING_FILE", "./traces.jsonl")
+TRACING_MEMORY_MAX_SPANS = int(os.getenv("TRACING_MEMORY_MAX_SPANS", "10000"))
+# Traces en attente d'écriture ; au-delà, les nouvelles sont perdues
+TRACING_FILE_QUEUE_SIZE = int(os.getenv("TRACING_FILE_QUEUE_SIZE", "10000"))
+SERVICE_NAME = os.getenv("SERVICE_NAME", "elearning-api")
+
+# Valeurs de SpanKind et StatusCode d'OTLP
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+STATUS_ERROR = 2
+
+_STATEMENT_MAX_LENGTH = 2000
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+class Span:
+    __slots__ = ("trace", "trace_id", "span_id", "parent_span_id", "name", "kind",
+                 "attributes", "start_ns", "end_ns", "error")
+
+    def __init__(self, trace: "_Trace", name: str, kind: int, parent_span_id: Optional[str], attributes: dict):
+        self.trace = trace
+        self.trace_id = trace.trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, exc: BaseException) -> None:
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.trace.finish(self)
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            # Entiers 64 bits : chaînes en JSON, comme le prévoit OTLP
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.error:
+            span["status"] = {"code": STATUS_ERROR, "message": self.error}
+        return span
+
+class _Trace:
+    """Spans d'une trace locale, exportés ensemble à la fin du span racine"""
+
+    def __init__(self, tracer: "Tracer", trace_id: Optional[str] = None):
+        self.tracer = tracer
+        self.trace_id = trace_id or os.urandom(16).hex()
+        self.root: Optional[Span] = None
+        self.finished: list[Span] = []
+        self._lock = threading.Lock()
+
+    def finish(self, span: Span) -> None:
+        with self._lock:
+            self.finished.append(span)
+            if span is not self.root and (self.root is None or self.root.end_ns is None):
+                return
+            spans, self.finished = self.finished, []
+        # Un span terminé après sa racine (tâche en arrière-plan) part seul
+        self.tracer.export(spans)
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def _otlp_attributes(attributes: dict) -> list[dict]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+def _otlp_request(spans: list[Span]) -> dict:
+    return {"resourceSpans": [{
+        "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+        "scopeSpans": [{"scope": {"name": __name__}, "spans": [span.to_otlp() for span in spans]}],
+    }]}
+
+class FileExporter:
+    """Une ligne OTLP/JSON par trace, ajoutée à un fichier local.
+
+    `export()` dépose seulement la trace dans une file bornée : l'encodage et
+    l'écriture sont faits par le thread `trace-exporter`.
+    """
+
+    def __init__(self, path: str = TRACING_FILE, max_pending: int = TRACING_FILE_QUEUE_SIZE):
+        self.path = path
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def export(self, spans: list[Span]) -> None:
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        """Écrire les traces en attente puis arrêter le thread"""
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            # Tout ce qui attend déjà part dans la même écriture
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            traces = [spans for spans in batch if spans is not None]
+            try:
+                if traces:
+                    with open(self.path, "a", encoding="utf-8") as file:
+                        file.writelines(
+                            json.dumps(_otlp_request(spans), separators=(",", ":")) + "\n" for spans in traces
+                        )
+            except Exception:
+                logger.exception("Could not write %d trace(s) to %s", len(traces), self.path)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if len(traces) < len(batch):
+                return
+
+class InMemoryExporter:
+    """Derniers spans exportés, au format OTLP (un dict par span)"""
+
+    def __init__(self, maxlen: int = TRACING_MEMORY_MAX_SPANS):
+        self.spans: deque = deque(maxlen=maxlen)
+
+    def export(self, spans: list[Span]) -> None:
+        self.spans.extend(span.to_otlp() for span in spans)
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+def exporter_from_env():
+    if TRACING_EXPORTER == "file":
+        return FileExporter(TRACING_FILE)
+    if TRACING_EXPORTER == "memory":
+        return InMemoryExporter()
+    if TRACING_EXPORTER:
+        raise ValueError(f"Unsupported tracing exporter: {TRACING_EXPORTER}")
+    return None
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+class Tracer:
+    def __init__(self, exporter=None):
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def export(self, spans: list[Span]) -> None:
+        exporter = self.exporter
+        if exporter is not None:
+            exporter.export(spans)
+
+    def shutdown(self) -> None:
+        """Écrire les traces encore en attente (arrêt du worker)"""
+        close = getattr(self.exporter, "close", None)
+        if close is not None:
+            close()
+
+    def start_span(self, name: str, kind: int = KIND_INTERNAL, trace_id: Optional[str] = None,
+                   parent_span_id: Optional[str] = None, **attributes) -> Optional[Span]:
+        """Span enfant du span courant (sans en faire le span courant) ; None si désactivé"""
+        if self.exporter is None:
+            return None
+        parent = _current_span.get()
+        if parent is not None and parent.end_ns is None:
+            return Span(parent.trace, name, kind, parent.span_id, attributes)
+        trace = _Trace(self, trace_id)
+        trace.root = Span(trace, name, kind, parent_span_id, attributes)
+        return trace.root
+
+    @contextmanager
+    def span(self, name: str, kind: int = KIND_INTERNAL, **attributes) -> Iterator[Optional[Span]]:
+        span = self.start_span(name, kind, **attributes)
+        if span is None:
+            yield None
+            return
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.record_error(exc)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+tracer = Tracer(exporter_from_env())
+
+def _parse_traceparent(headers: list[tuple[bytes, bytes]]) -> tuple[Optional[str], Optional[str]]:
+    for name, value in headers:
+        if name == b"traceparent":
+            match = _TRACEPARENT.match(value.decode("latin-1").strip())
+            if match and match.group(1) != "0" * 32:
+                return match.group(1), match.group(2)
+    return None, None
+
+class TracingMiddleware:
+    """Span racine de chaque requête HTTP, terminé après l'envoi du dernier octet"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+        trace_id, parent_span_id = _parse_traceparent(scope.get("headers", []))
+        span = tracer.start_span(
+            scope["method"], KIND_SERVER, trace_id=trace_id, parent_span_id=parent_span_id,
+            **{"http.method": scope["method"], "url.path": scope["path"]},
+        )
+        token = _current_span.set(span)
+
+        async def traced_send(message):
+            if message["type"] == "http.response.start":
+                span.set_attribute("http.status_code", message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, traced_send)
+        except BaseException as exc:
+            span.record_error(exc)
+            raise
+        finally:
+            # Route résolue par le routeur FastAPI pendant l'appel
+            route = scope.get("route")
+            if route is not None:
+                span.name = f"{scope['method']} {route.path}"
+                span.set_attribute("http.route", route.path)
+            _current_span.reset(token)
+            span.end()
+
+class TracedJSONResponse(JSONResponse):
+    """Réponse JSON dont l'encodage apparaît dans la trace"""
+
+    def render(self, content: Any) -> bytes:
+        with tracer.span("response.render"):
+            return super().render(content)
+
+# Validation et conversion par le response_model : FastAPI appelle cette
+# fonction du module `fastapi.routing`, qui n'offre pas d'autre point d'accroche
+_serialize_response = getattr(fastapi.routing, "serialize_response", None)
+
+async def _traced_serialize_response(*args, **kwargs):
+    if not tracer.enabled:
+        return await _serialize_response(*args, **kwargs)
+    with tracer.span("response.serialize"):
+        return await _serialize_response(*args, **kwargs)
+
+if _serialize_response is None:
+    logger.warning("fastapi.routing.serialize_response not found: response serialization is not traced")
+else:
+    fastapi.routing.serialize_response = _traced_serialize_response
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Seulement dans une trace : pas une trace par sonde du moniteur de santé
+    if _current_span.get() is None:
+        return
+    span = tracer.start_span(
+        "db.query", KIND_CLIENT,
+        **{"db.system": conn.dialect.name, "db.statement": statement[:_STATEMENT_MAX_LENGTH]},
+    )
+    if span is not None and context is not None:
+        if executemany:
+            span.set_attribute("db.executemany", True)
+        context._tracing_span = span
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    span = getattr(context, "_tracing_span", None)
+    if span is not None:
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            span.set_attribute("db.rowcount", cursor.rowcount)
+        span.end()
+
+def _handle_error(exception_context):
+    span = getattr(exception_context.execution_context, "_tracing_span", None)
+    if span is not None:
+        span.record_error(exception_context.original_exception)
+        span.end()
+
+# Tous les moteurs, comme le comptage des requêtes des tests
+event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+event.listen(Engine, "handle_error", _handle_error)
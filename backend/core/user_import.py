@@ -0,0 +1,249 @@
+"""Import en masse d'utilisateurs depuis un fichier CSV ou NDJSON.
+
+Le fichier est lu ligne par ligne et traité par lots : validation avec
+`UserCreateAdmin`, vérification d'unicité en une requête par lot, hachage des
+mots de passe en parallèle puis insertion groupée (COPY sur PostgreSQL).
+"""
+import csv
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import IO, Iterable, Iterator, Optional
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from core.security import get_password_hash
+from models.user import User, RoleEnum
+from schemas.user import UserCreateAdmin
+
+IMPORT_BATCH_SIZE = int(os.getenv("USER_IMPORT_BATCH_SIZE", "1000"))
+# bcrypt relâche le GIL : des threads suffisent pour occuper tous les cœurs
+IMPORT_HASH_WORKERS = int(os.getenv("USER_IMPORT_HASH_WORKERS", str(os.cpu_count() or 1)))
+
+_COLUMNS = (
+    "username", "email", "firstname", "lastname", "picture_profile",
+    "hashed_password", "role", "created_at", "updated_at",
+)
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.errors: list[dict] = []
+
+    def fail(self, row: int, email: Optional[str], detail: str) -> None:
+        self.errors.append({"row": row, "email": email, "detail": detail})
+
+    def as_dict(self) -> dict:
+        return {"created": self.created, "failed": len(self.errors), "errors": self.errors}
+
+_INVALID_ENCODING = "Invalid UTF-8 encoding"
+
+class _DecodedLines:
+    """Lignes du fichier décodées en UTF-8 ; une ligne invalide est notée, pas fatale.
+
+    Le fichier est lu au fil de l'import, après l'insertion des premiers lots :
+    une erreur de décodage devient l'erreur des seules lignes concernées.
+    """
+
+    def __init__(self, binary: IO[bytes]):
+        self.binary = binary
+        # Numéros (à partir de 1) des lignes physiques mal encodées
+        self.invalid_lines: set[int] = set()
+
+    def __iter__(self) -> Iterator[str]:
+        for index, raw in enumerate(self.binary):
+            encoding = "utf-8-sig" if index == 0 else "utf-8"
+            try:
+                yield raw.decode(encoding)
+            except UnicodeDecodeError:
+                self.invalid_lines.add(index + 1)
+                yield raw.decode(encoding, errors="replace")
+
+def _read_csv(stream: _DecodedLines) -> Iterator[tuple[int, Optional[dict], Optional[str]]]:
+    reader = csv.DictReader(stream)
+    if reader.fieldnames is None:
+        return
+    # En-tête illisible : aucune ligne ne peut être interprétée
+    header_invalid = bool(stream.invalid_lines)
+    previous_end = reader.line_num
+    for row_number, row in enumerate(reader, start=1):
+        # Un enregistrement CSV peut couvrir plusieurs lignes (champ entre guillemets)
+        lines = range(previous_end + 1, reader.line_num + 1)
+        previous_end = reader.line_num
+        if header_invalid or any(line in stream.invalid_lines for line in lines):
+            yield row_number, None, _INVALID_ENCODING
+            continue
+        # Les cellules vides correspondent aux champs optionnels absents
+        yield row_number, {key: value for key, value in row.items() if key and value not in ("", None)}, None
+
+def _read_ndjson(stream: _DecodedLines) -> Iterator[tuple[int, Optional[dict], Optional[str]]]:
+    row_number = 0
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        row_number += 1
+        if line_number in stream.invalid_lines:
+            yield row_number, None, _INVALID_ENCODING
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield row_number, None, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(data, dict):
+            yield row_number, None, "Each line must be a JSON object"
+            continue
+        yield row_number, data, None
+
+def read_rows(binary: IO[bytes], fmt: str) -> Iterator[tuple[int, Optional[dict], Optional[str]]]:
+    """Itérer sur (numéro de ligne, données, erreur de parsing) sans charger le fichier"""
+    stream = _DecodedLines(binary)
+    if fmt == "csv":
+        return _read_csv(stream)
+    return _read_ndjson(stream)
+
+def _batches(rows: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+    )
+
+def _existing(db: Session, column, values: set) -> set:
+    if not values:
+        return set()
+    return {value for (value,) in db.query(column).filter(column.in_(values)).all()}
+
+def _copy_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, RoleEnum):
+        return value.name
+    return value
+
+def _copy_users(db: Session, rows: list[dict]) -> None:
+    """Insérer les lignes avec COPY ... FROM STDIN (PostgreSQL)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row[column]) for column in _COLUMNS])
+    buffer.seek(0)
+    dbapi_connection = db.connection().connection.driver_connection
+    with dbapi_connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY users ({', '.join(_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+
+def _insert_batch(db: Session, rows: list[dict], report: ImportReport) -> None:
+    values = [row["values"] for row in rows]
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            _copy_users(db, values)
+        else:
+            db.execute(insert(User), values)
+        db.commit()
+        report.created += len(rows)
+        return
+    except IntegrityError:
+        db.rollback()
+
+    # Un compte concurrent a pris un email ou un username entre la vérification
+    # et l'insertion : on rejoue le lot ligne par ligne pour isoler les conflits
+    for row in rows:
+        try:
+            with db.begin_nested():
+                db.execute(insert(User), [row["values"]])
+            report.created += 1
+        except IntegrityError:
+            report.fail(row["row"], row["values"]["email"], "Email or username already registered")
+    db.commit()
+
+def import_users(
+    db: Session,
+    rows: Iterable[tuple[int, Optional[dict], Optional[str]]],
+    default_role: RoleEnum = RoleEnum.student,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> dict:
+    """Créer les utilisateurs valides et retourner le rapport d'erreurs par ligne"""
+    report = ImportReport()
+    seen_emails: set[str] = set()
+    seen_usernames: set[str] = set()
+
+    with ThreadPoolExecutor(max_workers=IMPORT_HASH_WORKERS) as executor:
+        for batch in _batches(rows, batch_size):
+            candidates = []
+            for row_number, data, error in batch:
+                if error is not None:
+                    report.fail(row_number, None, error)
+                    continue
+                data.setdefault("role", default_role)
+                try:
+                    user = UserCreateAdmin(**data)
+                except ValidationError as exc:
+                    report.fail(row_number, data.get("email"), _format_validation_error(exc))
+                    continue
+                if user.role == RoleEnum.admin:
+                    report.fail(row_number, user.email, "Admin users cannot be bulk imported")
+                    continue
+                if user.email in seen_emails:
+                    report.fail(row_number, user.email, "Duplicate email in file")
+                    continue
+                if user.username and user.username in seen_usernames:
+                    report.fail(row_number, user.email, "Duplicate username in file")
+                    continue
+                seen_emails.add(user.email)
+                if user.username:
+                    seen_usernames.add(user.username)
+                candidates.append((row_number, user))
+
+            # Une requête par lot et par contrainte d'unicité
+            taken_emails = _existing(db, User.email, {user.email for _, user in candidates})
+            taken_usernames = _existing(
+                db, User.username, {user.username for _, user in candidates if user.username}
+            )
+            accepted = []
+            for row_number, user in candidates:
+                if user.email in taken_emails:
+                    report.fail(row_number, user.email, "Email already registered")
+                elif user.username and user.username in taken_usernames:
+                    report.fail(row_number, user.email, "Username already taken")
+                else:
+                    accepted.append((row_number, user))
+            if not accepted:
+                continue
+
+            hashes = executor.map(get_password_hash, [user.password for _, user in accepted])
+            now = datetime.utcnow()
+            rows_to_insert = [
+                {
+                    "row": row_number,
+                    "values": {
+                        "username": user.username,
+                        "email": user.email,
+                        "firstname": user.firstname,
+                        "lastname": user.lastname,
+                        "picture_profile": user.picture_profile,
+                        "hashed_password": hashed_password,
+                        "role": user.role,
+                        "created_at": now,
+                        "updated_at": now,
+                    },
+                }
+                for (row_number, user), hashed_password in zip(accepted, hashes)
+            ]
+            _insert_batch(db, rows_to_insert, report)
+
+    report.errors.sort(key=lambda error: error["row"])
+    return report.as_dict()
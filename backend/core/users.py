@@ -0,0 +1,75 @@
+"""Écritures sur les utilisateurs en un seul aller-retour.
+
+Plutôt que de vérifier l'email, le username et l'admin existant par des SELECT
+avant d'écrire, on laisse les contraintes d'unicité de la base trancher :
+`INSERT ... RETURNING` / `UPDATE ... RETURNING`, puis traduction de la
+violation éventuelle en `UserConflict`. L'unicité de l'admin repose sur
+l'index partiel `uq_users_single_admin`.
+"""
+from typing import Optional
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models.user import User
+
+class UserConflict(Exception):
+    """Violation d'unicité : `field` vaut "email", "username" ou "admin" """
+
+    def __init__(self, field: str):
+        super().__init__(field)
+        self.field = field
+
+# Contraintes d'unicité sur PostgreSQL (create_all nomme les index ix_*, les migrations *_key)
+_CONSTRAINT_FIELDS = {
+    "uq_users_single_admin": "admin",
+    "ix_users_email": "email",
+    "users_email_key": "email",
+    "ix_users_username": "username",
+    "users_username_key": "username",
+}
+# Colonnes citées par SQLite
+_COLUMN_FIELDS = {"users.role": "admin", "users.email": "email", "users.username": "username"}
+_SQLITE_UNIQUE_PREFIX = "UNIQUE constraint failed: "
+
+def conflicting_field(exc: IntegrityError) -> Optional[str]:
+    orig = exc.orig
+    diag = getattr(orig, "diag", None)
+    if diag is not None:
+        # Le message de PostgreSQL cite la valeur fautive : seul le nom de la contrainte est fiable
+        return _CONSTRAINT_FIELDS.get(diag.constraint_name)
+    message = str(orig)
+    if not message.startswith(_SQLITE_UNIQUE_PREFIX):
+        return None
+    for column in message[len(_SQLITE_UNIQUE_PREFIX):].split(","):
+        field = _COLUMN_FIELDS.get(column.strip())
+        if field is not None:
+            return field
+    return None
+
+def _execute(db: Session, statement) -> Optional[User]:
+    try:
+        return db.execute(statement).scalars().first()
+    except IntegrityError as exc:
+        db.rollback()
+        field = conflicting_field(exc)
+        if field is None:
+            raise
+        raise UserConflict(field) from exc
+
+def insert_user(db: Session, **values) -> User:
+    """Créer l'utilisateur (sans commit) ; lève UserConflict"""
+    return _execute(db, insert(User).values(**values).returning(User))
+
+def update_user(db: Session, user_id: int, values: dict, *conditions) -> Optional[User]:
+    """Modifier l'utilisateur si les conditions sont remplies (sans commit).
+
+    Retourne None si aucune ligne ne correspond ; lève UserConflict.
+    """
+    statement = (
+        update(User)
+        .where(User.id == user_id, *conditions)
+        .values(**values)
+        .returning(User)
+        .execution_options(synchronize_session="fetch")
+    )
+    return _execute(db, statement)
@@ -1,6 +1,8 @@
+from contextvars import ContextVar
+from typing import Optional
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 import os
 from dotenv import load_dotenv
 
@@ -13,7 +15,15 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Session de la requête groupée en cours (routers/batch.py), prêtée à ses sous-requêtes
+shared_session: ContextVar[Optional[Session]] = ContextVar("shared_session", default=None)
+
 def get_db():
+    shared = shared_session.get()
+    if shared is not None:
+        # Fermée par la requête groupée, pas par la sous-requête
+        yield shared
+        return
     db = SessionLocal()
     try:
         yield db
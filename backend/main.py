@@ -1,18 +1,66 @@
-from fastapi import FastAPI, Depends
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
 import uvicorn
-from db import get_db, engine, Base
-from routers import courses, auth, modules
+from db import engine, Base, SessionLocal
+from core.invalidation import start_listener, stop_listener
+from core.lifecycle import (
+    DrainMiddleware, DrainingServer, SHUTDOWN_DRAIN_TIMEOUT_SECONDS, drainer, prewarm_pool, warm_caches,
+)
+from core.metrics import MetricsMiddleware
+from core.progress import ensure_partitions, schedule_partition_check
+from core.repository import install_prepared_statements
+from core.slow_queries import RequestScopeMiddleware, slow_query_log
+from core.tracing import TracedJSONResponse, TracingMiddleware, tracer
+from routers import (
+    courses, bundles, auth, modules, jobs, progress, recommendations, dashboard, events, health, metrics, diagnostics,
+    batch,
+)
 # Import all models so SQLAlchemy can discover them
-from models import User, Course, Lesson, Enrollment, CourseModule
+from models import User, Course, Lesson, Enrollment, CourseModule, Job, ProgressEvent, StatRollup, ContentChunk, ModuleRevision
 
+# Avant la première connexion, pour que toutes les connexions du pool en profitent
+install_prepared_statements(engine)
+slow_query_log.install(engine)
 Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    ensure_partitions(engine)
+    # Puis chaque jour, par un worker : le processus peut tourner des mois
+    db = SessionLocal()
+    try:
+        schedule_partition_check(db)
+        db.commit()
+    finally:
+        db.close()
+    # Connexions, instructions préparées et caches prêts avant le premier client
+    prewarm_pool(engine)
+    warm_caches(SessionLocal)
+    # Premier instantané avant d'accepter du trafic, puis rafraîchi en arrière-plan
+    health.monitor.refresh()
+    health.monitor.start()
+    # Écoute des invalidations publiées par les autres workers (PostgreSQL uniquement)
+    start_listener(engine)
+    progress.progress_buffer.start()
+    recommendations.recommender.start(SessionLocal)
+    yield
+    await drainer.drain()
+    recommendations.recommender.stop()
+    # Écrit les événements encore en mémoire avant l'arrêt
+    progress.progress_buffer.stop()
+    stop_listener()
+    health.monitor.stop()
+    tracer.shutdown()
+    # Ferme les connexions du pool au lieu de les laisser couper par la fin du processus
+    engine.dispose()
+
 app = FastAPI(
     title="E-Learning Platform API",
     description="API pour une plateforme d'e-learning adaptatif",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=TracedJSONResponse,
+    lifespan=lifespan,
 )
 
 # Configuration CORS
@@ -23,22 +71,32 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(DrainMiddleware)
+app.add_middleware(RequestScopeMiddleware)
+app.add_middleware(MetricsMiddleware)
+# Ajouté en dernier : le span racine englobe aussi CORS et la mesure des métriques
+app.add_middleware(TracingMiddleware)
 
+app.include_router(health.router, tags=["health"])
+app.include_router(metrics.router, tags=["metrics"])
 app.include_router(courses.router, prefix="/api", tags=["courses"])
+app.include_router(bundles.router, prefix="/api/courses", tags=["courses"])
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(modules.router, prefix="/api/modules", tags=["modules"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
+app.include_router(progress.router, prefix="/api/progress", tags=["progress"])
+app.include_router(recommendations.router, prefix="/api/recommendations", tags=["recommendations"])
+app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
+app.include_router(events.router, prefix="/api/events", tags=["events"])
+app.include_router(diagnostics.router, prefix="/api/diagnostics", tags=["diagnostics"])
+app.include_router(batch.router, prefix="/api/batch", tags=["batch"])
 
 @app.get("/")
 async def root():
     return {"message": "Bienvenue sur la plateforme d'e-learning adaptatif"}
 
-@app.get("/health")
-async def health_check(db: Session = Depends(get_db)):
-    try:
-        db.execute("SELECT 1")
-        return {"status": "ok", "database": "connected"}
-    except Exception:
-        return {"status": "ok", "database": "disconnected"}
-
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    # Uvicorn attend lui-même la fin des réponses en cours avant le lifespan : délai borné
+    config = uvicorn.Config(app, host="0.0.0.0", port=8000, timeout_graceful_shutdown=int(SHUTDOWN_DRAIN_TIMEOUT_SECONDS))
+    # Drainage dès SIGTERM, avant que uvicorn n'attende les connexions (flux SSE compris)
+    DrainingServer(config).run() 
\ No newline at end of file
@@ -3,5 +3,9 @@ from .course import Course, CourseLevel
 from .lesson import Lesson
 from .enrollment import Enrollment
 from .module import CourseModule, ModuleType
+from .job import Job, JobStatus
+from .progress import ProgressEvent, ProgressEventType
+from .stats import StatRollup
+from .revision import ContentChunk, ModuleRevision
 
-__all__ = ["User", "RoleEnum", "Course", "CourseLevel", "Lesson", "Enrollment", "CourseModule", "ModuleType"] 
\ No newline at end of file
+__all__ = ["User", "RoleEnum", "Course", "CourseLevel", "Lesson", "Enrollment", "CourseModule", "ModuleType", "Job", "JobStatus", "ProgressEvent", "ProgressEventType", "StatRollup", "ContentChunk", "ModuleRevision"] 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -18,5 +18,11 @@ class Course(Base):
     level = Column(Enum(CourseLevel), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        # Filtres et facettes du catalogue (voir core/catalogue.py)
+        Index("ix_courses_level_created_at", "level", "created_at"),
+        Index("ix_courses_created_at", "created_at"),
+    )
+    
     lessons = relationship("Lesson", back_populates="course")
     enrollments = relationship("Enrollment", back_populates="course") 
\ No newline at end of file
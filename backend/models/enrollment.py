@@ -1,15 +1,42 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index, Sequence, DDL, event
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from db import Base
 
+# Nombre de partitions par hachage de course_id (PostgreSQL). Le modifier impose
+# de reconstruire la table : c'est le diviseur de chaque partition.
+ENROLLMENT_PARTITIONS = 16
+
+enrollment_id_seq = Sequence("enrollments_id_seq")
+
 class Enrollment(Base):
+    """Inscription d'un utilisateur à un cours (partitionnée par hachage de course_id sur PostgreSQL)"""
     __tablename__ = "enrollments"
-    
-    id = Column(Integer, primary_key=True, index=True)
+
+    # La clé de partition doit faire partie de la clé primaire
+    id = Column(Integer, enrollment_id_seq, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    course_id = Column(Integer, ForeignKey("courses.id"))
+    course_id = Column(Integer, ForeignKey("courses.id"), primary_key=True)
     enrolled_at = Column(DateTime, default=datetime.utcnow)
-    
+
     user = relationship("User", back_populates="enrollments")
-    course = relationship("Course", back_populates="enrollments") 
\ No newline at end of file
+    course = relationship("Course", back_populates="enrollments")
+
+    __table_args__ = (
+        # Liste des inscrits d'un cours : une seule partition est lue
+        Index("ix_enrollments_course_id_user_id", "course_id", "user_id"),
+        # Cours d'un utilisateur : un parcours d'index par partition
+        Index("ix_enrollments_user_id", "user_id"),
+        {"postgresql_partition_by": "HASH (course_id)"},
+    )
+
+# Les partitions sont créées avec la table, par create_all comme par la migration 011
+for remainder in range(ENROLLMENT_PARTITIONS):
+    event.listen(
+        Enrollment.__table__,
+        "after_create",
+        DDL(
+            f"CREATE TABLE IF NOT EXISTS enrollments_p{remainder:02d} PARTITION OF enrollments "
+            f"FOR VALUES WITH (MODULUS {ENROLLMENT_PARTITIONS}, REMAINDER {remainder})"
+        ).execute_if(dialect="postgresql"),
+    )
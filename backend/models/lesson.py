@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from db import Base
@@ -13,4 +13,9 @@ class Lesson(Base):
     order_index = Column(Integer, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     
-    course = relationship("Course", back_populates="lessons") 
\ No newline at end of file
+    course = relationship("Course", back_populates="lessons")
+    
+    # Lecture ordonnée des leçons d'un cours en un seul parcours d'index
+    __table_args__ = (
+        Index("ix_lessons_course_id_order_index", "course_id", "order_index"),
+    ) 
\ No newline at end of file
@@ -14,5 +14,7 @@ class CourseModule(Base):
     title = Column(String(255), index=True, nullable=False)
     content = Column(Text, nullable=False)
     type = Column(Enum(ModuleType), default=ModuleType.text, nullable=False)
+    # Incrémentée à chaque modification : précondition des mises à jour partielles
+    version = Column(Integer, default=1, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False) 
\ No newline at end of file
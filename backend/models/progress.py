@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, DateTime, Enum, ForeignKey, Index, Uuid
+from datetime import datetime
+from db import Base
+import enum
+import uuid
+
+class ProgressEventType(str, enum.Enum):
+    viewed = "viewed"
+    completed = "completed"
+    time_spent = "time_spent"
+
+class ProgressEvent(Base):
+    """Événement d'apprentissage (table en ajout seul, partitionnée par mois sur PostgreSQL)"""
+    __tablename__ = "progress_events"
+
+    # La clé de partition doit faire partie de la clé primaire
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    occurred_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    module_id = Column(Integer, ForeignKey("course_modules.id", ondelete="CASCADE"), nullable=True)
+    lesson_id = Column(Integer, ForeignKey("lessons.id", ondelete="CASCADE"), nullable=True)
+    event_type = Column(Enum(ProgressEventType), nullable=False)
+    duration_seconds = Column(Integer, nullable=True)
+    received_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_progress_events_user_id_occurred_at", "user_id", "occurred_at"),
+        {"postgresql_partition_by": "RANGE (occurred_at)"},
+    )
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, JSON, ForeignKey, UniqueConstraint
+from datetime import datetime
+from db import Base
+from models.module import ModuleType
+
+class ContentChunk(Base):
+    """Morceau de contenu stocké une seule fois, identifié par son SHA-256"""
+    __tablename__ = "content_chunks"
+
+    hash = Column(String(64), primary_key=True)
+    data = Column(Text, nullable=False)
+    size = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class ModuleRevision(Base):
+    """État d'un module à une version donnée, sous forme de liste de morceaux"""
+    __tablename__ = "module_revisions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    module_id = Column(Integer, ForeignKey("course_modules.id", ondelete="CASCADE"), nullable=False)
+    version = Column(Integer, nullable=False)
+    title = Column(String(255), nullable=False)
+    type = Column(Enum(ModuleType), nullable=False)
+    chunk_hashes = Column(JSON, nullable=False)
+    content_length = Column(Integer, nullable=False)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Sert aussi d'index pour lister l'historique d'un module
+    __table_args__ = (
+        UniqueConstraint("module_id", "version", name="uq_module_revisions_module_id_version"),
+    )
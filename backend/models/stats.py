@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, DateTime, JSON
+from datetime import datetime
+from db import Base
+
+class StatRollup(Base):
+    """Agrégat précalculé pour les tableaux de bord (une ligne par indicateur)"""
+    __tablename__ = "stat_rollups"
+
+    name = Column(String(100), primary_key=True)
+    payload = Column(JSON, nullable=False)
+    refreshed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum, DateTime
+from sqlalchemy import Column, Integer, String, Enum, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from db import Base
@@ -22,5 +22,13 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
+    __table_args__ = (
+        # Un seul admin : l'insertion ou la promotion d'un second est refusée par la base
+        Index(
+            "uq_users_single_admin", "role", unique=True,
+            postgresql_where=text("role = 'admin'"), sqlite_where=text("role = 'admin'"),
+        ),
+    )
+    
     # Relations
     enrollments = relationship("Enrollment", back_populates="user") 
\ No newline at end of file
@@ -1,48 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from core.security import get_password_hash, verify_password, create_access_token
+from core.security import get_password_hash, verify_and_update_password, create_access_token
+from core.cache import get_cache
+from core.invalidation import invalidate
+from core.jobs import enqueue
+from core.repository import get_user_by_login
+from core.rows import json_list_response, lean_select
+from core.user_import import import_users, read_rows
+from core.users import UserConflict, insert_user, update_user
 from db import get_db
 from models.user import User, RoleEnum
-from schemas.user import UserCreate, UserCreateAdmin, UserRead, UserUpdate, UserPublic, Token
+from schemas.user import UserCreate, UserCreateAdmin, UserRead, UserUpdate, UserPublic, Token, UserImportReport
+from schemas.job import JobAccepted
 from routers.dependencies import get_current_user, get_current_admin
 
 router = APIRouter()
 
-@router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    # Vérifier si l'email existe déjà
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
+_CONFLICT_DETAILS = {
+    "email": "Email already registered",
+    "username": "Username already taken",
+    "admin": "An admin user already exists. Only one admin is allowed.",
+}
+
+def _conflict_error(conflict: UserConflict, admin_detail: str = _CONFLICT_DETAILS["admin"]) -> HTTPException:
+    detail = admin_detail if conflict.field == "admin" else _CONFLICT_DETAILS[conflict.field]
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+def _create_user(db: Session, user: UserCreate, role: RoleEnum, admin_detail: str = _CONFLICT_DETAILS["admin"]) -> UserRead:
+    # Les contraintes d'unicité (email, username, admin unique) sont vérifiées
+    # par l'INSERT lui-même : aucun SELECT préalable
+    try:
+        db_user = insert_user(
+            db,
+            username=user.username,
+            email=user.email,
+            firstname=user.firstname,
+            lastname=user.lastname,
+            picture_profile=user.picture_profile,
+            hashed_password=get_password_hash(user.password),
+            role=role
         )
-    
-    # Vérifier si le username existe déjà (si fourni)
-    if user.username:
-        db_user_username = db.query(User).filter(User.username == user.username).first()
-        if db_user_username:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username already taken"
-            )
-    
-    # Créer le nouvel utilisateur avec tous les champs
-    hashed_password = get_password_hash(user.password)
-    db_user = User(
-        username=user.username,
-        email=user.email,
-        firstname=user.firstname,
-        lastname=user.lastname,
-        picture_profile=user.picture_profile,
-        hashed_password=hashed_password
-    )
-    db.add(db_user)
+    except UserConflict as conflict:
+        raise _conflict_error(conflict, admin_detail)
+    # Sérialisé avant le commit, qui expirerait l'objet et forcerait un SELECT
+    created = UserRead.model_validate(db_user)
     db.commit()
-    db.refresh(db_user)
-    
-    return db_user
+    return created
+
+@router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
+def register(user: UserCreate, db: Session = Depends(get_db)):
+    return _create_user(db, user, RoleEnum.student)
 
 @router.post("/register-admin", response_model=UserRead, status_code=status.HTTP_201_CREATED)
 def register_admin(
@@ -51,62 +59,12 @@ def register_admin(
     current_admin: User = Depends(get_current_admin)
 ):
     """Créer un utilisateur avec un rôle spécifique (admin uniquement)"""
-    
-    # Si on essaie de créer un admin, vérifier qu'il n'y en a pas déjà un
-    if user.role == RoleEnum.admin:
-        existing_admin = db.query(User).filter(User.role == RoleEnum.admin).first()
-        if existing_admin:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="An admin user already exists. Only one admin is allowed."
-            )
-    
-    # Vérifier si l'email existe déjà
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    # Vérifier si le username existe déjà (si fourni)
-    if user.username:
-        db_user_username = db.query(User).filter(User.username == user.username).first()
-        if db_user_username:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username already taken"
-            )
-    
-    # Créer le nouvel utilisateur avec le rôle spécifié
-    hashed_password = get_password_hash(user.password)
-    db_user = User(
-        username=user.username,
-        email=user.email,
-        firstname=user.firstname,
-        lastname=user.lastname,
-        picture_profile=user.picture_profile,
-        hashed_password=hashed_password,
-        role=user.role
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    
-    return db_user
+    return _create_user(db, user, user.role)
 
 @router.post("/create-first-admin", response_model=UserRead, status_code=status.HTTP_201_CREATED)
 def create_first_admin(user: UserCreateAdmin, db: Session = Depends(get_db)):
     """Créer le premier admin - endpoint sans authentification"""
     
-    # Vérifier qu'il n'y a aucun admin existant
-    existing_admin = db.query(User).filter(User.role == RoleEnum.admin).first()
-    if existing_admin:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="An admin user already exists. Use /register-admin endpoint instead."
-        )
-    
     # Forcer le rôle admin
     if user.role != RoleEnum.admin:
         raise HTTPException(
@@ -114,48 +72,19 @@ def create_first_admin(user: UserCreateAdmin, db: Session = Depends(get_db)):
             detail="This endpoint is only for creating admin users."
         )
     
-    # Vérifier si l'email existe déjà
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    # Vérifier si le username existe déjà (si fourni)
-    if user.username:
-        db_user_username = db.query(User).filter(User.username == user.username).first()
-        if db_user_username:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username already taken"
-            )
-    
-    # Créer le premier admin
-    hashed_password = get_password_hash(user.password)
-    db_user = User(
-        username=user.username,
-        email=user.email,
-        firstname=user.firstname,
-        lastname=user.lastname,
-        picture_profile=user.picture_profile,
-        hashed_password=hashed_password,
-        role=RoleEnum.admin
+    # L'index uq_users_single_admin refuse l'insertion si un admin existe déjà
+    return _create_user(
+        db, user, RoleEnum.admin,
+        admin_detail="An admin user already exists. Use /register-admin endpoint instead."
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    
-    return db_user
 
 @router.post("/login", response_model=Token)
 def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     # Vérifier les identifiants (support email ou username)
-    user = db.query(User).filter(
-        (User.email == form_data.username) | (User.username == form_data.username)
-    ).first()
+    user = get_user_by_login(db, form_data.username)
+    valid, new_hash = verify_and_update_password(form_data.password, user.hashed_password) if user else (False, None)
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email/username or password",
@@ -164,6 +93,17 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     
     # Créer le token d'accès
     access_token = create_access_token(data={"sub": user.email})
+    
+    # Hachage produit par une ancienne politique (algorithme ou coût) : on le
+    # remplace, sauf si le mot de passe a changé entre-temps
+    if new_hash:
+        update_user(
+            db, user.id,
+            {"hashed_password": new_hash, "updated_at": User.updated_at},
+            User.hashed_password == user.hashed_password
+        )
+        db.commit()
+    
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserRead)
@@ -178,36 +118,39 @@ def update_current_user_profile(
     db: Session = Depends(get_db)
 ):
     """Mettre à jour le profil de l'utilisateur connecté"""
-    
-    # Vérifier l'unicité du username si modifié
-    if user_update.username and user_update.username != current_user.username:
-        existing_user = db.query(User).filter(User.username == user_update.username).first()
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username already taken"
-            )
-    
-    # Mettre à jour les champs fournis
     update_data = user_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(current_user, field, value)
+    if not update_data:
+        return current_user
+    
+    # L'unicité du username est vérifiée par l'UPDATE lui-même
+    try:
+        user = update_user(db, current_user.id, update_data)
+    except UserConflict as conflict:
+        raise _conflict_error(conflict)
     
+    updated = UserRead.model_validate(user)
+    invalidate(db, "users", current_user.id)
     db.commit()
-    db.refresh(current_user)
     
-    return current_user
+    return updated
 
 @router.get("/users/{user_id}", response_model=UserPublic)
 def get_user_public_profile(user_id: int, db: Session = Depends(get_db)):
     """Récupérer le profil public d'un utilisateur"""
+    cache = get_cache("users")
+    cached = cache.get(user_id)
+    if cached is not None:
+        return cached
+    
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    return user
+    profile = UserPublic.model_validate(user).model_dump()
+    cache.set(user_id, profile)
+    return profile
 
 # Endpoints admin uniquement
 @router.get("/admin/users", response_model=list[UserRead])
@@ -216,16 +159,38 @@ def get_all_users(
     db: Session = Depends(get_db)
 ):
     """Récupérer tous les utilisateurs (admin uniquement)"""
-    users = db.query(User).all()
-    return users
+    # Lignes simples encodées par lots, sans instances ORM (voir core/rows.py)
+    return json_list_response(db, lean_select(UserRead, User).order_by(User.id))
+
+@router.post("/admin/users/import", response_model=UserImportReport)
+def import_users_bulk(
+    file: UploadFile = File(..., description="Fichier CSV ou NDJSON (une ligne par utilisateur)"),
+    default_role: RoleEnum = RoleEnum.student,
+    current_admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Importer des utilisateurs en masse (admin uniquement)"""
+    filename = (file.filename or "").lower()
+    content_type = (file.content_type or "").split(";")[0]
+    if filename.endswith(".csv") or content_type == "text/csv":
+        fmt = "csv"
+    elif filename.endswith((".ndjson", ".jsonl")) or content_type in ("application/x-ndjson", "application/jsonl"):
+        fmt = "ndjson"
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unsupported file format. Use CSV or NDJSON."
+        )
+    
+    return import_users(db, read_rows(file.file, fmt), default_role=default_role)
 
-@router.delete("/admin/users/{user_id}")
+@router.delete("/admin/users/{user_id}", response_model=JobAccepted, status_code=status.HTTP_202_ACCEPTED)
 def delete_user(
     user_id: int,
     current_admin: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
-    """Supprimer un utilisateur (admin uniquement)"""
+    """Supprimer un utilisateur et ses données en arrière-plan (admin uniquement)"""
     # Vérifier que l'utilisateur existe
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
@@ -243,10 +208,12 @@ def delete_user(
                 detail="Cannot delete the last admin user"
             )
     
-    db.delete(user)
+    # La suppression des données est faite par le worker (voir core/tasks.py)
+    job = enqueue(db, "delete_user", {"user_id": user_id}, created_by=current_admin.id)
+    job_id = job.id
     db.commit()
     
-    return {"message": "User deleted successfully"}
+    return {"message": "User deletion scheduled", "job_id": job_id}
 
 @router.put("/admin/users/{user_id}/role", response_model=UserRead)
 def update_user_role(
@@ -256,34 +223,30 @@ def update_user_role(
     db: Session = Depends(get_db)
 ):
     """Changer le rôle d'un utilisateur (admin uniquement)"""
-    # Vérifier que l'utilisateur existe
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    # Si on essaie de promouvoir quelqu'un admin, vérifier qu'il n'y en a pas déjà un
-    if new_role == RoleEnum.admin and user.role != RoleEnum.admin:
-        existing_admin = db.query(User).filter(User.role == RoleEnum.admin).first()
-        if existing_admin:
+    # Un seul UPDATE ... RETURNING : l'index uq_users_single_admin refuse une
+    # seconde promotion, et la condition sur le rôle empêche de rétrograder
+    # l'admin (il n'y en a qu'un, c'est donc le dernier)
+    conditions = () if new_role == RoleEnum.admin else (User.role != RoleEnum.admin,)
+    try:
+        user = update_user(db, user_id, {"role": new_role}, *conditions)
+    except UserConflict as conflict:
+        raise _conflict_error(conflict)
+    
+    if user is None:
+        # Aucune ligne modifiée : utilisateur absent ou admin à rétrograder
+        if db.query(User.id).filter(User.id == user_id).first() is None:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="An admin user already exists. Only one admin is allowed."
-            )
-    
-    # Empêcher la rétrogradation du dernier admin
-    if user.role == RoleEnum.admin and new_role != RoleEnum.admin:
-        admin_count = db.query(User).filter(User.role == RoleEnum.admin).count()
-        if admin_count <= 1:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Cannot demote the last admin user"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
             )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot demote the last admin user"
+        )
     
-    user.role = new_role
+    updated = UserRead.model_validate(user)
+    invalidate(db, "users", user_id)
     db.commit()
-    db.refresh(user)
     
-    return user 
\ No newline at end of file
+    return updated
+
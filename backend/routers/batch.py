@@ -0,0 +1,122 @@
+"""Requêtes groupées : plusieurs lectures en un seul aller-retour.
+
+Les sous-requêtes passent par l'application complète (middlewares, routes,
+validation), mais partagent l'authentification et la session de la requête
+groupée : le token est décodé et l'utilisateur chargé une seule fois, et une
+seule connexion est empruntée au pool. Une session ne pouvant servir qu'une
+instruction à la fois, les sous-requêtes s'exécutent l'une après l'autre,
+dans l'ordre ; chacune retourne son propre statut, 500 compris quand elle
+lève une exception.
+"""
+import asyncio
+import json
+import logging
+import os
+from urllib.parse import urlsplit
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from db import get_db, shared_session
+from models.user import User
+from routers.dependencies import authenticated_user, get_current_user, oauth2_scheme
+from schemas.batch import BatchRequest, BatchResponse, BatchSubRequest
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+
+# Réponses sans fin (flux SSE) ou récursion
+_EXCLUDED_PREFIXES = ("/api/batch", "/api/events/")
+
+async def _dispatch(request: Request, sub_request: BatchSubRequest) -> dict:
+    url = urlsplit(sub_request.path)
+    scope = {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": request.scope.get("http_version", "1.1"),
+        "method": sub_request.method,
+        "scheme": request.scope.get("scheme", "http"),
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "root_path": request.scope.get("root_path", ""),
+        "query_string": url.query.encode(),
+        "headers": [
+            (name, value) for name, value in request.scope["headers"]
+            if name in (b"authorization", b"accept-language", b"traceparent")
+        ] + [(b"accept", b"application/json")],
+        "client": request.scope.get("client"),
+        "server": request.scope.get("server"),
+    }
+    finished = asyncio.Event()
+    request_sent = False
+    response = {"status": 500, "content_type": b"", "body": []}
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Les réponses en flux surveillent la déconnexion : seulement après le dernier octet
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["content_type"] = dict(message.get("headers", [])).get(b"content-type", b"")
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+            if not message.get("more_body", False):
+                finished.set()
+
+    try:
+        await request.app(scope, receive, send)
+    except Exception:
+        # ServerErrorMiddleware a envoyé un 500 puis relancé : seule cette sous-requête échoue
+        logger.exception("Batch sub-request %s %s failed", sub_request.method, url.path)
+        return {"status": 500, "body": None}
+    finally:
+        finished.set()
+    body = b"".join(response["body"])
+    if response["content_type"].startswith(b"application/json") and body:
+        content = json.loads(body)
+    else:
+        content = body.decode("utf-8", errors="replace") or None
+    return {"status": response["status"], "body": content}
+
+@router.post("", response_model=BatchResponse)
+async def batch(
+    payload: BatchRequest,
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Exécuter des lectures (GET) sur les routes existantes et renvoyer toutes les réponses"""
+    if len(payload.requests) > BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {BATCH_MAX_REQUESTS} requests per batch",
+        )
+    for sub_request in payload.requests:
+        if urlsplit(sub_request.path).path.startswith(_EXCLUDED_PREFIXES):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{sub_request.path} cannot be batched",
+            )
+
+    session_token = shared_session.set(db)
+    user_token = authenticated_user.set((token, current_user))
+    try:
+        responses = []
+        for sub_request in payload.requests:
+            responses.append(await _dispatch(request, sub_request))
+            if responses[-1]["status"] >= 400:
+                # Pas de transaction en échec transmise à la sous-requête suivante ; hors de la boucle
+                await run_in_threadpool(db.rollback)
+        return {"responses": responses}
+    finally:
+        authenticated_user.reset(user_token)
+        shared_session.reset(session_token)
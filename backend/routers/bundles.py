@@ -0,0 +1,79 @@
+import os
+import re
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse, Response
+from sqlalchemy.orm import Session
+from core.bundles import COURSE_BUNDLE_ACCEL_PREFIX, bundle_path, current_hash, render_bundle
+from db import get_db
+from routers.dependencies import get_token_data
+from schemas.user import TokenData
+
+router = APIRouter()
+
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+# L'URL contient le hachage : son contenu ne change jamais
+IMMUTABLE = "private, max-age=31536000, immutable"
+
+class SendfileResponse(FileResponse):
+    """FileResponse sans copie en espace utilisateur quand le serveur ASGI le permet"""
+
+    async def __call__(self, scope, receive, send) -> None:
+        if "http.response.zerocopy" not in scope.get("extensions", {}):
+            await super().__call__(scope, receive, send)
+            return
+        with open(self.path, "rb") as file:
+            self.set_stat_headers(os.fstat(file.fileno()))
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            await send({"type": "http.response.zerocopy", "file": file, "more_body": False})
+
+def _bundle_response(request: Request, course_id: int, digest: str, cache_control: str) -> Response:
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    gzipped = "gzip" in request.headers.get("accept-encoding", "")
+    path = bundle_path(course_id, digest, gzipped=gzipped)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Bundle not found")
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+    if COURSE_BUNDLE_ACCEL_PREFIX:
+        # Le proxy envoie lui-même le fichier (sendfile) ; l'API ne lit rien
+        headers["X-Accel-Redirect"] = f"{COURSE_BUNDLE_ACCEL_PREFIX.rstrip('/')}/{course_id}/{os.path.basename(path)}"
+        return Response(media_type="application/json", headers=headers)
+    return SendfileResponse(path, media_type="application/json", headers=headers)
+
+@router.get("/{course_id}/bundle")
+def get_course_bundle(
+    course_id: int,
+    request: Request,
+    token: TokenData = Depends(get_token_data),
+    db: Session = Depends(get_db)
+):
+    """Cours et leçons en un seul document, servi depuis le disque.
+
+    La session n'est utilisée que si le paquet n'a encore jamais été rendu.
+    """
+    digest = current_hash(course_id)
+    if digest is None:
+        # Un job a pu rendre le paquet entre-temps : il n'est pas remplacé
+        digest = render_bundle(db, course_id, replace=False)
+        if digest is None:
+            raise HTTPException(status_code=404, detail="Course not found")
+    response = _bundle_response(request, course_id, digest, "private, no-cache")
+    # Adresse immuable du même contenu, à mettre en cache sans limite
+    response.headers["Content-Location"] = f"{request.url.path}/{digest}"
+    return response
+
+@router.get("/{course_id}/bundle/{digest}")
+def get_course_bundle_version(
+    course_id: int,
+    digest: str,
+    request: Request,
+    token: TokenData = Depends(get_token_data)
+):
+    """Version précise d'un paquet (adresse immuable)"""
+    if not _DIGEST.match(digest):
+        raise HTTPException(status_code=404, detail="Bundle not found")
+    return _bundle_response(request, course_id, digest, IMMUTABLE)
@@ -1,22 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from core.bundles import schedule_render
+from core.cache import get_cache
+from core.catalogue import CatalogueFilters, facet_counts, search_courses
+from core.course_archive import ArchiveError, export_course, import_course
+from core.invalidation import invalidate
+from core.jobs import enqueue_once
+from core.ordering import key_between, lock_course, needs_rebalance, neighbour_keys, rebalance_lessons
 from db import get_db
-from models import Course
-from typing import List
+from models import Course, CourseLevel, Lesson, User
+from schemas.course_archive import CourseImportResult
+from schemas.lesson import LessonRead, LessonMove
+from routers.dependencies import get_current_instructor_or_admin
+from typing import List, Optional
 
 router = APIRouter()
 
 @router.get("/courses")
-async def get_courses(db: Session = Depends(get_db)):
-    courses = db.query(Course).all()
-    if not courses:
+async def get_courses(
+    level: Optional[CourseLevel] = None,
+    year: Optional[int] = Query(None, ge=1970, le=9999, description="Année de création"),
+    q: Optional[str] = Query(None, min_length=1, max_length=100, description="Mot-clé (titre ou description)"),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    filters = CatalogueFilters(level=level, year=year, q=q)
+    counts = facet_counts(db, filters)
+    if counts["total"] == 0 and filters.is_empty():
         return {
             "courses": [
                 {"id": 1, "title": "Introduction à Python", "level": "beginner"},
                 {"id": 2, "title": "Développement Web avec FastAPI", "level": "intermediate"}
-            ]
+            ],
+            "total": 2,
+            "facets": counts["facets"]
         }
     
+    # Page au-delà du dernier résultat : pas besoin d'interroger la base
+    courses = search_courses(db, filters, limit, offset) if offset < counts["total"] else []
     return {
         "courses": [
             {
@@ -26,18 +49,125 @@ async def get_courses(db: Session = Depends(get_db)):
                 "level": course.level.value if course.level else "beginner"
             }
             for course in courses
-        ]
+        ],
+        "total": counts["total"],
+        "facets": counts["facets"]
     }
 
 @router.get("/courses/{course_id}")
 async def get_course(course_id: int, db: Session = Depends(get_db)):
+    cache = get_cache("courses")
+    cached = cache.get(course_id)
+    if cached is not None:
+        return cached
+    
     course = db.query(Course).filter(Course.id == course_id).first()
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     
-    return {
+    data = {
         "id": course.id,
         "title": course.title,
         "description": course.description,
         "level": course.level.value if course.level else "beginner"
-    } 
\ No newline at end of file
+    }
+    cache.set(course_id, data)
+    return data 
+
+@router.get("/courses/{course_id}/export")
+def export_course_archive(
+    course_id: int,
+    db: Session = Depends(get_db),
+    current_instructor: User = Depends(get_current_instructor_or_admin)
+):
+    """Exporter un cours et ses leçons en NDJSON compressé (instructeur ou admin uniquement)"""
+    course = db.query(Course).filter(Course.id == course_id).first()
+    if not course:
+        raise HTTPException(status_code=404, detail="Course not found")
+    # La session reste ouverte jusqu'à la fin de la réponse (dépendance à yield)
+    return StreamingResponse(
+        export_course(db, course),
+        media_type="application/gzip",
+        headers={"Content-Disposition": f'attachment; filename="course-{course_id}.ndjson.gz"'},
+    )
+
+@router.post("/courses/import", response_model=CourseImportResult, status_code=status.HTTP_201_CREATED)
+def import_course_archive(
+    file: UploadFile = File(..., description="Archive produite par l'export (.ndjson.gz)"),
+    db: Session = Depends(get_db),
+    current_instructor: User = Depends(get_current_instructor_or_admin)
+):
+    """Créer un cours depuis une archive d'export (instructeur ou admin uniquement)"""
+    try:
+        result = import_course(db, file.file)
+    except ArchiveError as exc:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    invalidate(db, "courses", result["course_id"])
+    schedule_render(db, result["course_id"], created_by=current_instructor.id)
+    db.commit()
+    return result
+
+@router.get("/courses/{course_id}/lessons", response_model=List[LessonRead])
+def get_course_lessons(course_id: int, db: Session = Depends(get_db)):
+    """Récupérer les leçons d'un cours dans l'ordre"""
+    return (
+        db.query(Lesson)
+        .filter(Lesson.course_id == course_id)
+        .order_by(Lesson.order_index)
+        .all()
+    )
+
+@router.post("/courses/{course_id}/lessons/{lesson_id}/move", response_model=LessonRead)
+def move_lesson(
+    course_id: int,
+    lesson_id: int,
+    move: LessonMove,
+    db: Session = Depends(get_db),
+    current_instructor: User = Depends(get_current_instructor_or_admin)
+):
+    """Déplacer une leçon après une autre (instructeur ou admin uniquement)"""
+    lesson = db.query(Lesson).filter(Lesson.id == lesson_id, Lesson.course_id == course_id).first()
+    if not lesson:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lesson not found"
+        )
+    if move.after_id == lesson_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A lesson cannot be moved after itself"
+        )
+    
+    lock_course(db, course_id)
+    previous, following = neighbour_keys(db, course_id, lesson_id, move.after_id)
+    if move.after_id is not None and previous is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lesson not found"
+        )
+    
+    new_key = key_between(previous, following)
+    if new_key is None:
+        # Plus aucune place entre les voisines : renumérotation immédiate du cours
+        rebalance_lessons(db, course_id)
+        db.expire_all()
+        previous, following = neighbour_keys(db, course_id, lesson_id, move.after_id)
+        new_key = key_between(previous, following)
+        if new_key is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="No room left to move this lesson"
+            )
+    elif needs_rebalance(new_key, previous, following):
+        enqueue_once(
+            db, "rebalance_lessons", f"rebalance_lessons:{course_id}",
+            {"course_id": course_id}, created_by=current_instructor.id,
+        )
+    
+    lesson.order_index = new_key
+    invalidate(db, "courses", course_id)
+    schedule_render(db, course_id, created_by=current_instructor.id)
+    db.commit()
+    db.refresh(lesson)
+    return lesson
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from core.jobs import enqueue_once
+from core.stats import (
+    DASHBOARD_STATS_MAX_AGE_SECONDS, REFRESH_JOB, consume_catalogue_change, read_rollups, refresh_rollups,
+)
+from db import get_db
+from models.user import User
+from schemas.dashboard import DashboardStats
+from routers.dependencies import get_current_instructor_or_admin
+
+router = APIRouter()
+
+@router.get("/stats", response_model=DashboardStats)
+def get_dashboard_stats(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_instructor_or_admin)
+):
+    """Statistiques des tableaux de bord (instructeur ou admin uniquement)"""
+    rollups, refreshed_at = read_rollups(db)
+    catalogue_changed = consume_catalogue_change()
+    if refreshed_at is None:
+        # Premier appel : aucun agrégat n'a encore été calculé
+        try:
+            refresh_rollups(db)
+            db.commit()
+        except IntegrityError:
+            # Un autre worker vient de les calculer
+            db.rollback()
+        rollups, refreshed_at = read_rollups(db)
+    elif catalogue_changed or datetime.utcnow() - refreshed_at > timedelta(seconds=DASHBOARD_STATS_MAX_AGE_SECONDS):
+        # On sert les agrégats existants et on délègue le recalcul au worker ;
+        # la clé de dédoublonnage garantit un seul recalcul en attente
+        if enqueue_once(db, REFRESH_JOB, REFRESH_JOB, created_by=current_user.id, max_attempts=1):
+            db.commit()
+    
+    modules_by_type = rollups.get("modules_by_type", {})
+    users_by_role = rollups.get("users_by_role", {})
+    return {
+        "total_modules": sum(modules_by_type.values()),
+        "modules_by_type": modules_by_type,
+        "total_users": sum(users_by_role.values()),
+        "users_by_role": users_by_role,
+        "active_users_7d": rollups.get("active_users_7d", 0),
+        "enrollments_by_course": rollups.get("enrollments_by_course", []),
+        "recent_modules": rollups.get("recent_modules", []),
+        "refreshed_at": refreshed_at,
+    }
@@ -1,31 +1,50 @@
+from contextvars import ContextVar
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
+from core.repository import get_user_by_email
 from core.security import SECRET_KEY, ALGORITHM
+from core.tracing import tracer
 from db import get_db
 from models.user import User, RoleEnum
 from schemas.user import TokenData
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# (token, utilisateur) déjà authentifiés par la requête groupée en cours (routers/batch.py)
+authenticated_user: ContextVar[Optional[tuple[str, User]]] = ContextVar("authenticated_user", default=None)
+
 credentials_exception = HTTPException(
     status_code=status.HTTP_401_UNAUTHORIZED,
     detail="Could not validate credentials",
     headers={"WWW-Authenticate": "Bearer"},
 )
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+def decode_access_token(token: str) -> TokenData:
+    """Vérifier la signature et l'expiration du token (sans accès à la base)"""
+    with tracer.span("auth.decode_token"):
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            email: str = payload.get("sub")
+            if email is None:
+                raise credentials_exception
+            return TokenData(email=email)
+        except JWTError:
             raise credentials_exception
-        token_data = TokenData(email=email)
-    except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.email == token_data.email).first()
+
+def get_token_data(token: str = Depends(oauth2_scheme)) -> TokenData:
+    """Identité portée par le token, pour les lectures qui ne touchent pas la base"""
+    return decode_access_token(token)
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    authenticated = authenticated_user.get()
+    if authenticated is not None and authenticated[0] == token:
+        return authenticated[1]
+    token_data = decode_access_token(token)
+    with tracer.span("auth.load_user"):
+        user = get_user_by_email(db, token_data.email)
     if user is None:
         raise credentials_exception
     return user
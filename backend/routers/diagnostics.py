@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends, Query
+from core import slow_queries
+from models.user import User
+from routers.dependencies import get_current_admin
+from schemas.diagnostics import SlowQuery
+
+router = APIRouter()
+
+@router.get("/slow-queries", response_model=list[SlowQuery])
+def get_slow_queries(
+    limit: int = Query(50, ge=1, le=1000),
+    current_user: User = Depends(get_current_admin)
+):
+    """Dernières requêtes SQL lentes de ce worker, les plus récentes d'abord (admin uniquement)"""
+    return slow_queries.slow_query_log.samples()[:limit]
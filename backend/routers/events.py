@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from core.events import broadcaster
+from routers.dependencies import decode_access_token, credentials_exception
+
+router = APIRouter()
+
+@router.get("/stream")
+async def stream_changes(
+    token: Optional[str] = Query(None, description="Token d'accès (EventSource ne permet pas d'en-têtes)"),
+    authorization: Optional[str] = Header(None),
+    last_event_id: Optional[str] = Header(None),
+):
+    """Flux Server-Sent Events des changements de modules et de cours.
+
+    Le token est seulement vérifié (signature, expiration) : aucune session de
+    base n'est gardée ouverte pendant toute la durée de la connexion.
+    """
+    if token is None and authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    if not token:
+        raise credentials_exception
+    decode_access_token(token)
+    return StreamingResponse(
+        broadcaster.stream(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
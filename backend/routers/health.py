@@ -0,0 +1,26 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from core.health import HealthMonitor
+from db import engine
+
+router = APIRouter()
+
+# Démarré et arrêté par main.py
+monitor = HealthMonitor(engine)
+
+@router.get("/health")
+async def health_check():
+    """État résumé (utilisé par le frontend), lu depuis le dernier instantané"""
+    snapshot = monitor.readiness()
+    return {"status": "ok", "database": snapshot.get("database", "unknown")}
+
+@router.get("/health/live")
+async def liveness():
+    """Le processus répond : aucune dépendance n'est vérifiée"""
+    return {"status": "ok"}
+
+@router.get("/health/ready")
+async def readiness():
+    """Prêt à recevoir du trafic ; 503 sinon, avec les raisons"""
+    snapshot = monitor.readiness()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from db import get_db
+from models.job import Job
+from models.user import User, RoleEnum
+from schemas.job import JobRead
+from routers.dependencies import get_current_user
+
+router = APIRouter()
+
+@router.get("/{job_id}", response_model=JobRead)
+def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Suivre l'état d'un job (créateur ou admin uniquement)"""
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job or (current_user.role != RoleEnum.admin and job.created_by != current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
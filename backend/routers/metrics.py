@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Response
+from core.metrics import CONTENT_TYPE, register_pool_metrics, registry
+from db import engine
+
+router = APIRouter()
+
+register_pool_metrics(engine)
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métriques du worker au format texte de Prometheus"""
+    # En en-tête : media_type ajouterait un second charset
+    return Response(registry.render(), headers={"Content-Type": CONTENT_TYPE})
@@ -1,10 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import func, update
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime
+from typing import List, Optional
+from core.cache import get_cache
+from core.invalidation import invalidate
+from core import repository
+from core.patching import patched_content, required_length, length_delta
+from core.revisions import (
+    diff_revisions, ensure_baseline, get_revision, has_history, load_content, patch_chunks, record_revision,
+    store_chunks,
+)
+from core.rows import json_list_response, lean_select
 from db import get_db
 from models.module import CourseModule
+from models.revision import ModuleRevision
 from models.user import User
-from schemas.module import ModuleCreate, ModuleUpdate, ModuleRead, ModuleList
+from schemas.module import (
+    ModuleCreate, ModuleUpdate, ModuleRead, ModuleList, ModuleContentPatch, ModulePatchResult,
+    ModuleRevisionSummary, ModuleRevisionRead, ModuleRevisionDiff,
+)
 from routers.dependencies import get_current_user, get_current_instructor_or_admin
 
 router = APIRouter()
@@ -17,8 +32,8 @@ def get_modules(
     current_user: User = Depends(get_current_user)
 ):
     """Récupérer la liste paginée des modules"""
-    modules = db.query(CourseModule).offset(skip).limit(limit).all()
-    return modules
+    # Lignes simples encodées directement, sans instances ORM (voir core/rows.py)
+    return json_list_response(db, lean_select(ModuleList, CourseModule).offset(skip).limit(limit))
 
 @router.get("/{module_id}", response_model=ModuleRead)
 def get_module(
@@ -27,13 +42,20 @@ def get_module(
     current_user: User = Depends(get_current_user)
 ):
     """Récupérer un module par son ID"""
-    module = db.query(CourseModule).filter(CourseModule.id == module_id).first()
+    cache = get_cache("modules")
+    cached = cache.get(module_id)
+    if cached is not None:
+        return cached
+    
+    module = repository.get_module(db, module_id)
     if not module:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Module not found"
         )
-    return module
+    data = ModuleRead.model_validate(module).model_dump()
+    cache.set(module_id, data)
+    return data
 
 @router.post("/", response_model=ModuleRead, status_code=status.HTTP_201_CREATED)
 def create_module(
@@ -48,6 +70,9 @@ def create_module(
         type=module.type
     )
     db.add(db_module)
+    db.flush()
+    record_revision(db, db_module, current_instructor.id)
+    invalidate(db, "modules", db_module.id)
     db.commit()
     db.refresh(db_module)
     return db_module
@@ -61,7 +86,7 @@ def update_module(
 ):
     """Mettre à jour un module (instructeur ou admin uniquement)"""
     # Vérifier que le module existe
-    db_module = db.query(CourseModule).filter(CourseModule.id == module_id).first()
+    db_module = repository.get_module(db, module_id)
     if not db_module:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -70,9 +95,197 @@ def update_module(
     
     # Mettre à jour les champs fournis
     update_data = module_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_module, field, value)
+    if update_data:
+        ensure_baseline(db, db_module)
+        updated = _write_next_version(db, module_id, db_module.version, update_data)
+        record_revision(db, updated, current_instructor.id)
     
+    invalidate(db, "modules", module_id)
+    db.commit()
+    db.refresh(db_module)
+    return db_module
+
+def _write_next_version(db: Session, module_id: int, expected_version: int, values: dict):
+    """Écrire `values` et passer à la version suivante, si personne ne l'a fait entre-temps.
+
+    Même UPDATE conditionnel que PATCH : deux écritures concurrentes ne peuvent
+    pas produire la même version ; la perdante reçoit 409.
+    """
+    updated = db.execute(
+        update(CourseModule)
+        .where(CourseModule.id == module_id, CourseModule.version == expected_version)
+        .values(**values, version=CourseModule.version + 1, updated_at=datetime.utcnow())
+        .returning(
+            CourseModule.id, CourseModule.version, CourseModule.title,
+            CourseModule.type, CourseModule.content,
+        )
+        .execution_options(synchronize_session=False)
+    ).first()
+    if updated is None:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Module has been modified concurrently, retry"
+        )
+    return updated
+
+@router.patch("/{module_id}/content", response_model=ModulePatchResult)
+def patch_module_content(
+    module_id: int,
+    patch: ModuleContentPatch,
+    db: Session = Depends(get_db),
+    current_instructor: User = Depends(get_current_instructor_or_admin)
+):
+    """Appliquer des modifications partielles au contenu (instructeur ou admin uniquement)"""
+    edits = patch.edits
+    updated_at = datetime.utcnow()
+    previous = get_revision(db, module_id, patch.version)
+    if previous is None and not has_history(db, module_id):
+        module = repository.get_module(db, module_id)
+        if module is not None:
+            # Module antérieur à l'historique : son état sert de révision de départ
+            previous = record_revision(db, module)
+    # Le nouveau contenu est calculé par la base dans un seul UPDATE conditionnel
+    result = db.execute(
+        update(CourseModule)
+        .where(
+            CourseModule.id == module_id,
+            CourseModule.version == patch.version,
+            func.length(CourseModule.content) >= max(required_length(edits), 1 - length_delta(edits)),
+        )
+        .values(
+            content=patched_content(CourseModule.content, edits),
+            version=CourseModule.version + 1,
+            updated_at=updated_at,
+        )
+        .returning(CourseModule.id, CourseModule.version, CourseModule.title, CourseModule.type)
+        .execution_options(synchronize_session=False)
+    )
+    updated = result.first()
+    if updated is None:
+        db.rollback()
+        current = db.query(CourseModule.version).filter(CourseModule.id == module_id).first()
+        if current is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Module not found"
+            )
+        if current.version != patch.version:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Module has been modified (current version: {current.version})"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Edits are out of range or would leave the content empty"
+        )
+
+    if previous is not None:
+        # Seuls les morceaux autour des modifications sont relus et redécoupés
+        chunk_hashes = patch_chunks(db, previous, edits)
+        content_length = previous.content_length + length_delta(edits)
+    else:
+        # Révision de départ absente : le contenu est relu en entier
+        content = db.query(CourseModule.content).filter(CourseModule.id == module_id).scalar()
+        chunk_hashes, content_length = store_chunks(db, content), len(content)
+    record_revision(db, updated, current_instructor.id, chunk_hashes=chunk_hashes, content_length=content_length)
+    invalidate(db, "modules", module_id)
+    db.commit()
+    return {"id": module_id, "version": patch.version + 1, "updated_at": updated_at}
+
+@router.get("/{module_id}/revisions", response_model=List[ModuleRevisionSummary])
+def list_module_revisions(
+    module_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_instructor: User = Depends(get_current_instructor_or_admin)
+):
+    """Historique des versions d'un module, de la plus récente à la plus ancienne"""
+    if db.query(CourseModule.id).filter(CourseModule.id == module_id).first() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Module not found"
+        )
+    return (
+        db.query(ModuleRevision)
+        .filter(ModuleRevision.module_id == module_id)
+        .order_by(ModuleRevision.version.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+def _get_revision_or_404(db: Session, module_id: int, version: int) -> ModuleRevision:
+    revision = get_revision(db, module_id, version)
+    if revision is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Revision not found"
+        )
+    return revision
+
+@router.get("/{module_id}/revisions/{version}", response_model=ModuleRevisionRead)
+def get_module_revision(
+    module_id: int,
+    version: int,
+    db: Session = Depends(get_db),
+    current_instructor: User = Depends(get_current_instructor_or_admin)
+):
+    """Contenu complet d'une version"""
+    revision = _get_revision_or_404(db, module_id, version)
+    data = ModuleRevisionSummary.model_validate(revision).model_dump()
+    return {**data, "content": load_content(db, revision)}
+
+@router.get("/{module_id}/revisions/{version}/diff", response_model=ModuleRevisionDiff)
+def diff_module_revision(
+    module_id: int,
+    version: int,
+    from_version: Optional[int] = Query(None, ge=1, description="Version de départ (par défaut la précédente)"),
+    db: Session = Depends(get_db),
+    current_instructor: User = Depends(get_current_instructor_or_admin)
+):
+    """Différences entre deux versions, au format des modifications partielles"""
+    new = _get_revision_or_404(db, module_id, version)
+    if from_version is None:
+        old = (
+            db.query(ModuleRevision)
+            .filter(ModuleRevision.module_id == module_id, ModuleRevision.version < version)
+            .order_by(ModuleRevision.version.desc())
+            .first()
+        ) or new
+    else:
+        old = _get_revision_or_404(db, module_id, from_version)
+    return {
+        "from_version": old.version,
+        "to_version": new.version,
+        "edits": diff_revisions(db, old, new),
+    }
+
+@router.post("/{module_id}/revisions/{version}/restore", response_model=ModuleRead)
+def restore_module_revision(
+    module_id: int,
+    version: int,
+    db: Session = Depends(get_db),
+    current_instructor: User = Depends(get_current_instructor_or_admin)
+):
+    """Revenir à une version antérieure (crée une nouvelle version)"""
+    db_module = repository.get_module(db, module_id)
+    if not db_module:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Module not found"
+        )
+    revision = _get_revision_or_404(db, module_id, version)
+
+    updated = _write_next_version(db, module_id, db_module.version, {
+        "content": load_content(db, revision),
+        "title": revision.title,
+        "type": revision.type,
+    })
+    # Les morceaux existent déjà : la nouvelle version ne stocke que la liste des hachages
+    record_revision(db, updated, current_instructor.id, chunk_hashes=revision.chunk_hashes)
+    invalidate(db, "modules", module_id)
     db.commit()
     db.refresh(db_module)
     return db_module
@@ -85,14 +298,16 @@ def delete_module(
 ):
     """Supprimer un module (instructeur ou admin uniquement)"""
     # Vérifier que le module existe
-    db_module = db.query(CourseModule).filter(CourseModule.id == module_id).first()
+    db_module = repository.get_module(db, module_id)
     if not db_module:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Module not found"
         )
     
+    db.query(ModuleRevision).filter(ModuleRevision.module_id == module_id).delete(synchronize_session=False)
     db.delete(db_module)
+    invalidate(db, "modules", module_id)
     db.commit()
     
     return {"message": "Module deleted successfully"}
@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from core.progress import ProgressBuffer, BufferFull, event_time
+from db import engine, get_db
+from models.lesson import Lesson
+from models.module import CourseModule
+from models.user import User
+from schemas.progress import ProgressEventBatch, ProgressEventsAccepted
+from routers.dependencies import get_current_user
+
+router = APIRouter()
+
+progress_buffer = ProgressBuffer(engine)
+
+def get_progress_buffer() -> ProgressBuffer:
+    return progress_buffer
+
+def _as_utc(value: Optional[datetime], default: datetime) -> datetime:
+    # Les dates sont stockées en UTC sans fuseau, comme le reste du schéma
+    if value is None:
+        return default
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _existing_ids(db: Session, column, ids: set[int]) -> set[int]:
+    if not ids:
+        return set()
+    return {value for (value,) in db.query(column).filter(column.in_(ids))}
+
+@router.post("/events", response_model=ProgressEventsAccepted, status_code=status.HTTP_202_ACCEPTED)
+def record_progress_events(
+    batch: ProgressEventBatch,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    buffer: ProgressBuffer = Depends(get_progress_buffer)
+):
+    """Enregistrer des événements de progression (écrits par lots en arrière-plan).
+
+    Les événements visant un module ou une leçon inconnus, ou datés d'avant la
+    fenêtre acceptée, sont écartés et comptés dans `rejected`.
+    """
+    received_at = datetime.utcnow()
+    # Vérifiés ici : une clé étrangère invalide ferait échouer tout le lot en base
+    modules = _existing_ids(db, CourseModule.id, {event.module_id for event in batch.events} - {None})
+    lessons = _existing_ids(db, Lesson.id, {event.lesson_id for event in batch.events} - {None})
+    events = []
+    for event in batch.events:
+        occurred_at = event_time(_as_utc(event.occurred_at, received_at), received_at)
+        if occurred_at is None:
+            continue
+        if event.module_id is not None and event.module_id not in modules:
+            continue
+        if event.lesson_id is not None and event.lesson_id not in lessons:
+            continue
+        events.append({
+            "user_id": current_user.id,
+            "module_id": event.module_id,
+            "lesson_id": event.lesson_id,
+            "event_type": event.event_type,
+            "duration_seconds": event.duration_seconds,
+            "occurred_at": occurred_at,
+            "received_at": received_at,
+        })
+    try:
+        buffer.add(events)
+    except BufferFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Progress event buffer is full, retry later",
+            headers={"Retry-After": "1"},
+        )
+    return {"accepted": len(events), "rejected": len(batch.events) - len(events)}
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from core.recommendations import Recommender, Neighbours
+from db import get_db
+from models.user import User
+from schemas.recommendation import RecommendationList
+from routers.dependencies import get_current_user
+
+router = APIRouter()
+
+recommender = Recommender()
+
+def get_recommender(db: Session = Depends(get_db)) -> Recommender:
+    # Premier appel avant le rafraîchissement en arrière-plan : construction immédiate
+    if not recommender.ready:
+        recommender.refresh(db)
+    return recommender
+
+def _as_list(items: Neighbours, engine: Recommender) -> dict:
+    return {
+        "items": [{"id": item_id, "score": score} for item_id, score in items],
+        "refreshed_at": engine.refreshed_at,
+    }
+
+@router.get("/courses", response_model=RecommendationList)
+def recommend_courses(
+    limit: int = Query(5, ge=1, le=50, description="Nombre maximum de cours suggérés"),
+    current_user: User = Depends(get_current_user),
+    engine: Recommender = Depends(get_recommender)
+):
+    """Suggérer les prochains cours à l'utilisateur connecté"""
+    return _as_list(engine.courses.recommend(current_user.id, limit), engine)
+
+@router.get("/courses/{course_id}/similar", response_model=RecommendationList)
+def similar_courses(
+    course_id: int,
+    limit: int = Query(5, ge=1, le=50, description="Nombre maximum de cours similaires"),
+    current_user: User = Depends(get_current_user),
+    engine: Recommender = Depends(get_recommender)
+):
+    """Cours le plus souvent suivis avec ce cours"""
+    return _as_list(engine.courses.similar(course_id, limit), engine)
+
+@router.get("/modules", response_model=RecommendationList)
+def recommend_modules(
+    limit: int = Query(5, ge=1, le=50, description="Nombre maximum de modules suggérés"),
+    current_user: User = Depends(get_current_user),
+    engine: Recommender = Depends(get_recommender)
+):
+    """Suggérer les prochains modules à l'utilisateur connecté"""
+    return _as_list(engine.modules.recommend(current_user.id, limit), engine)
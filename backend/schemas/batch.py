@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+from typing import Any, Literal
+
+class BatchSubRequest(BaseModel):
+    """Lecture à exécuter : chemin d'une route existante, chaîne de requête comprise"""
+    method: Literal["GET"] = "GET"
+    path: str = Field(..., pattern=r"^/")
+
+class BatchRequest(BaseModel):
+    requests: list[BatchSubRequest] = Field(..., min_length=1)
+
+class BatchSubResponse(BaseModel):
+    status: int
+    # JSON décodé, ou texte si la réponse n'est pas du JSON
+    body: Any
+
+class BatchResponse(BaseModel):
+    responses: list[BatchSubResponse]
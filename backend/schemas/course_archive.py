@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional
+from models.course import CourseLevel
+
+class ArchivedCourse(BaseModel):
+    title: str = Field(..., min_length=1, max_length=255)
+    description: Optional[str] = None
+    level: CourseLevel
+    created_at: Optional[datetime] = None
+
+class ArchivedLesson(BaseModel):
+    title: str = Field(..., min_length=1, max_length=255)
+    content: Optional[str] = None
+    order_index: int
+    created_at: Optional[datetime] = None
+
+class CourseImportResult(BaseModel):
+    course_id: int
+    lessons: int
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+from schemas.module import ModuleList
+
+class CourseEnrollmentCount(BaseModel):
+    course_id: int
+    title: str
+    enrollments: int
+
+class DashboardStats(BaseModel):
+    """Statistiques précalculées des tableaux de bord"""
+    total_modules: int
+    modules_by_type: dict[str, int]
+    total_users: int
+    users_by_role: dict[str, int]
+    active_users_7d: int
+    enrollments_by_course: list[CourseEnrollmentCount]
+    recent_modules: list[ModuleList]
+    refreshed_at: Optional[datetime]
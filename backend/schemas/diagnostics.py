@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Optional
+
+class SlowQuery(BaseModel):
+    """Instruction SQL lente ; les paramètres sont remplacés par leur type"""
+    statement: str
+    parameters: Any
+    route: Optional[str]
+    duration_ms: float
+    recorded_at: datetime
+    explain: Optional[str]
@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Optional
+from models.job import JobStatus
+
+class JobRead(BaseModel):
+    id: int
+    kind: str
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    last_error: Optional[str]
+    result: Optional[dict[str, Any]]
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class JobAccepted(BaseModel):
+    """Réponse des endpoints qui délèguent leur travail à un job"""
+    message: str
+    job_id: int
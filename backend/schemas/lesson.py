@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional
+
+class LessonRead(BaseModel):
+    id: int
+    course_id: int
+    title: str
+    content: Optional[str]
+    order_index: int
+    created_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+class LessonMove(BaseModel):
+    after_id: Optional[int] = Field(None, description="Leçon après laquelle placer la leçon (null pour la placer en premier)")
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from models.module import ModuleType
 
 class ModuleCreate(BaseModel):
@@ -13,11 +13,37 @@ class ModuleUpdate(BaseModel):
     content: Optional[str] = Field(None, min_length=1, description="Contenu du module")
     type: Optional[ModuleType] = Field(None, description="Type de module (text ou video)")
 
+class ContentEdit(BaseModel):
+    """Remplacer `delete` caractères à partir de `offset` par `insert`"""
+    offset: int = Field(..., ge=0, description="Position dans le contenu de la version de départ")
+    delete: int = Field(0, ge=0, description="Nombre de caractères supprimés")
+    insert: str = Field("", description="Texte inséré")
+
+class ModuleContentPatch(BaseModel):
+    version: int = Field(..., ge=1, description="Version du module sur laquelle portent les modifications")
+    edits: List[ContentEdit] = Field(..., min_length=1, max_length=100)
+
+    @field_validator("edits")
+    @classmethod
+    def edits_must_not_overlap(cls, edits: List[ContentEdit]) -> List[ContentEdit]:
+        position = 0
+        for edit in edits:
+            if edit.offset < position:
+                raise ValueError("Edits must be sorted by offset and must not overlap")
+            position = edit.offset + edit.delete
+        return edits
+
+class ModulePatchResult(BaseModel):
+    id: int
+    version: int
+    updated_at: datetime
+
 class ModuleRead(BaseModel):
     id: int
     title: str
     content: str
     type: ModuleType
+    version: int
     created_at: datetime
     updated_at: Optional[datetime]
 
@@ -32,4 +58,25 @@ class ModuleList(BaseModel):
     created_at: datetime
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class ModuleRevisionSummary(BaseModel):
+    """Entrée de l'historique d'un module (sans le contenu)"""
+    version: int
+    title: str
+    type: ModuleType
+    content_length: int
+    created_by: Optional[int]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ModuleRevisionRead(ModuleRevisionSummary):
+    content: str
+
+class ModuleRevisionDiff(BaseModel):
+    """Modifications à appliquer à `from_version` pour obtenir `to_version`"""
+    from_version: int
+    to_version: int
+    edits: List[ContentEdit]
@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field, model_validator
+from datetime import datetime
+from typing import Optional
+from models.progress import ProgressEventType
+
+class ProgressEventCreate(BaseModel):
+    event_type: ProgressEventType = Field(..., description="Type d'événement (viewed, completed ou time_spent)")
+    module_id: Optional[int] = Field(None, description="Module concerné")
+    lesson_id: Optional[int] = Field(None, description="Leçon concernée")
+    duration_seconds: Optional[int] = Field(None, ge=0, description="Temps passé (obligatoire pour time_spent)")
+    occurred_at: Optional[datetime] = Field(None, description="Date de l'événement côté client (défaut : réception)")
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if (self.module_id is None) == (self.lesson_id is None):
+            raise ValueError("Exactly one of module_id or lesson_id is required")
+        if self.event_type == ProgressEventType.time_spent and self.duration_seconds is None:
+            raise ValueError("duration_seconds is required for time_spent events")
+        return self
+
+class ProgressEventBatch(BaseModel):
+    events: list[ProgressEventCreate] = Field(..., min_length=1, max_length=1000)
+
+class ProgressEventsAccepted(BaseModel):
+    accepted: int
+    # Module ou leçon inconnus, ou date trop ancienne
+    rejected: int = 0
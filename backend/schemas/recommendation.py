@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class Recommendation(BaseModel):
+    id: int
+    score: float
+
+class RecommendationList(BaseModel):
+    items: list[Recommendation]
+    refreshed_at: Optional[datetime]
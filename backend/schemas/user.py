@@ -53,6 +53,17 @@ class UserPublic(BaseModel):
     class Config:
         from_attributes = True
 
+class UserImportError(BaseModel):
+    row: int
+    email: Optional[str]
+    detail: str
+
+class UserImportReport(BaseModel):
+    """Rapport de l'import en masse : une entrée par ligne rejetée"""
+    created: int
+    failed: int
+    errors: list[UserImportError]
+
 class Token(BaseModel):
     access_token: str
     token_type: str
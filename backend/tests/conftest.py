@@ -0,0 +1,261 @@
+"""Fixtures partagées et budgets de requêtes SQL par route.
+
+Chaque fichier de tests déclare `TestingSessionLocal`, liée à sa propre base
+SQLite ; la fixture `client` branche l'application sur cette base le temps
+d'un test. `admin_headers`/`admin_token` créent le premier admin et s'y
+connectent, `login` retourne les en-têtes d'un autre compte.
+
+Chaque appel fait avec un `TestClient` est mesuré : nombre d'instructions SQL
+exécutées (tous moteurs confondus) et durée. Si la route appelée dépasse son
+budget de requêtes déclaré dans `BUDGETS`, ou n'en déclare aucun, le test
+échoue. Les durées ne sont vérifiées que sur demande, car elles dépendent de
+la machine : `TIME_BUDGET_SCALE=1 pytest` applique les budgets de temps tels
+quels, `TIME_BUDGET_SCALE=3` les triple pour une machine de CI partagée.
+
+Une route dont un chemin rare coûte plus (premier calcul, renumérotation)
+déclare ce chemin à part, sous `(méthode, route, cas)` : le test qui l'emprunte
+l'annonce avec `with query_budget("cas"):`, et le budget par défaut reste
+celui du chemin courant.
+
+`QUERY_BUDGET_REPORT=1 pytest` affiche en fin de session le maximum observé
+pour chaque route, utile pour ajuster un budget.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.routing import Match
+from starlette.testclient import TestClient
+from main import app
+from db import get_db, Base
+from core.cache import clear_all as clear_caches
+from models.enrollment import Enrollment
+
+# 0 : durées mesurées et rapportées, jamais bloquantes
+TIME_BUDGET_SCALE = float(os.getenv("TIME_BUDGET_SCALE", "0"))
+
+@dataclass(frozen=True)
+class Budget:
+    queries: int
+    ms: float = 500
+
+# Le hachage bcrypt domine les routes qui créent ou authentifient un mot de passe
+HASHING_MS = 2000
+
+BUDGETS: dict[tuple[str, ...], Budget] = {
+    ("GET", "/health"): Budget(0),
+    ("GET", "/health/live"): Budget(0),
+    ("GET", "/health/ready"): Budget(0),
+    ("GET", "/metrics"): Budget(0),
+    # Comptes par facette puis page ; les comptes du catalogue non filtré sont en cache
+    ("GET", "/api/courses"): Budget(2),
+    ("GET", "/api/courses/{course_id}"): Budget(1),
+    ("GET", "/api/courses/{course_id}/lessons"): Budget(1),
+    ("GET", "/api/courses/{course_id}/export"): Budget(3),
+    # Lu sur disque ; rendu synchrone seulement au premier appel (cours relu sous le verrou, leçons)
+    ("GET", "/api/courses/{course_id}/bundle"): Budget(3),
+    ("GET", "/api/courses/{course_id}/bundle/{digest}"): Budget(0),
+    # Cours, un INSERT groupé par lot de COURSE_ARCHIVE_BATCH_SIZE leçons, job de rendu du paquet
+    ("POST", "/api/courses/import"): Budget(4),
+    # Leçon, verrou du cours, voisines, job de rééquilibrage et job de rendu du paquet
+    ("POST", "/api/courses/{course_id}/lessons/{lesson_id}/move"): Budget(9),
+    # Plus de place entre les clés : renumérotation synchrone et nouvelle lecture des voisines
+    ("POST", "/api/courses/{course_id}/lessons/{lesson_id}/move", "rebalance"): Budget(15),
+    ("POST", "/api/auth/register"): Budget(1, HASHING_MS),
+    ("POST", "/api/auth/register-admin"): Budget(2, HASHING_MS),
+    ("POST", "/api/auth/create-first-admin"): Budget(1, HASHING_MS),
+    # Une écriture de plus quand le hachage stocké suit une ancienne politique
+    ("POST", "/api/auth/login"): Budget(2, HASHING_MS),
+    ("GET", "/api/auth/me"): Budget(1),
+    ("PUT", "/api/auth/me"): Budget(2),
+    ("GET", "/api/auth/users/{user_id}"): Budget(2),
+    ("GET", "/api/auth/admin/users"): Budget(2),
+    # Par lot : une requête par contrainte d'unicité et une insertion groupée
+    ("POST", "/api/auth/admin/users/import"): Budget(8, 10000),
+    ("DELETE", "/api/auth/admin/users/{user_id}"): Budget(4),
+    # Une requête de plus quand l'UPDATE ne modifie rien (404 ou dernier admin)
+    ("PUT", "/api/auth/admin/users/{user_id}/role"): Budget(3),
+    ("GET", "/api/modules/"): Budget(2),
+    ("GET", "/api/modules/{module_id}"): Budget(2),
+    ("POST", "/api/modules/"): Budget(6),
+    # Module antérieur à l'historique : sa version de départ est enregistrée en plus
+    ("PUT", "/api/modules/{module_id}"): Budget(9),
+    ("PATCH", "/api/modules/{module_id}/content"): Budget(9),
+    ("GET", "/api/modules/{module_id}/revisions"): Budget(3),
+    ("GET", "/api/modules/{module_id}/revisions/{version}"): Budget(3),
+    ("GET", "/api/modules/{module_id}/revisions/{version}/diff"): Budget(5),
+    ("POST", "/api/modules/{module_id}/revisions/{version}/restore"): Budget(7),
+    ("DELETE", "/api/modules/{module_id}"): Budget(4),
+    ("GET", "/api/modules/stats/count"): Budget(2),
+    ("GET", "/api/jobs/{job_id}"): Budget(2),
+    # Tampon plein : la requête attend PROGRESS_ENQUEUE_TIMEOUT_SECONDS avant le 503
+    ("POST", "/api/progress/events"): Budget(3, 1500),
+    ("GET", "/api/recommendations/courses"): Budget(1),
+    ("GET", "/api/recommendations/courses/{course_id}/similar"): Budget(1),
+    ("GET", "/api/recommendations/modules"): Budget(1),
+    # Agrégats stockés, plus le job de rafraîchissement quand ils sont trop anciens
+    ("GET", "/api/dashboard/stats"): Budget(3),
+    # Premier appel : les agrégats sont calculés de façon synchrone
+    ("GET", "/api/dashboard/stats", "first call"): Budget(14),
+    ("GET", "/api/events/stream"): Budget(0),
+    ("GET", "/api/diagnostics/slow-queries"): Budget(1),
+    # Somme des sous-requêtes, authentification une seule fois
+    ("POST", "/api/batch"): Budget(5),
+}
+
+class QueryRecorder:
+    """Compte les instructions SQL exécutées pendant une fenêtre de mesure"""
+
+    def __init__(self):
+        self.statements: Optional[list[str]] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        self.statements = []
+
+    def stop(self) -> list[str]:
+        statements, self.statements = self.statements or [], None
+        return statements
+
+    def record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        # Les requêtes s'exécutent dans le thread de l'application, pas celui du test
+        with self._lock:
+            if self.statements is not None:
+                self.statements.append(statement)
+
+recorder = QueryRecorder()
+event.listen(Engine, "before_cursor_execute", recorder.record)
+
+observed: dict[tuple[str, ...], tuple[int, float]] = {}
+
+# Cas annoncés par `query_budget`, le plus récent en dernier
+_cases: list[str] = []
+
+def route_for(app, method: str, path: str) -> Optional[str]:
+    scope = {"type": "http", "method": method, "path": path, "root_path": ""}
+    for route in app.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return None
+
+@pytest.fixture(autouse=True)
+def enforce_query_budgets(monkeypatch):
+    original_request = TestClient.request
+
+    def measured_request(self, method, url, *args, **kwargs):
+        recorder.start()
+        started = time.perf_counter()
+        try:
+            response = original_request(self, method, url, *args, **kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            statements = recorder.stop()
+        route = route_for(self.app, method.upper(), response.request.url.path)
+        if route is None:
+            return response
+        key = (method.upper(), route, *_cases[-1:])
+        previous = observed.get(key, (0, 0.0))
+        observed[key] = (max(previous[0], len(statements)), max(previous[1], elapsed_ms))
+
+        label = " ".join(key)
+        budget = BUDGETS.get(key)
+        if budget is None:
+            pytest.fail(f"No query budget declared for {label} in tests/conftest.py")
+        if len(statements) > budget.queries:
+            listing = "\n".join(f"  {index + 1}. {sql.splitlines()[0]}" for index, sql in enumerate(statements))
+            pytest.fail(
+                f"{label} issued {len(statements)} queries "
+                f"(budget {budget.queries}):\n{listing}"
+            )
+        if TIME_BUDGET_SCALE and elapsed_ms > budget.ms * TIME_BUDGET_SCALE:
+            pytest.fail(
+                f"{label} took {elapsed_ms:.0f} ms "
+                f"(budget {budget.ms * TIME_BUDGET_SCALE:.0f} ms)"
+            )
+        return response
+
+    monkeypatch.setattr(TestClient, "request", measured_request)
+    yield
+
+@pytest.fixture
+def query_budget():
+    """Mesurer les appels du bloc `with query_budget("cas"):` avec le budget de ce cas"""
+    @contextmanager
+    def case(name: str):
+        _cases.append(name)
+        try:
+            yield
+        finally:
+            _cases.pop()
+    return case
+
+@event.listens_for(Session, "before_flush")
+def _assign_enrollment_ids(session, flush_context, instances):
+    # Les bases de test SQLite n'ont ni séquence ni auto-incrément sur une clé composite
+    pending = [obj for obj in session.new if isinstance(obj, Enrollment) and obj.id is None]
+    if not pending or session.get_bind().dialect.name != "sqlite":
+        return
+    next_id = session.execute(select(func.coalesce(func.max(Enrollment.id), 0))).scalar()
+    for enrollment in pending:
+        next_id += 1
+        enrollment.id = next_id
+
+@pytest.fixture
+def client(request):
+    """Client de l'application sur la base du fichier de tests (`TestingSessionLocal`)"""
+    session_factory = request.module.TestingSessionLocal
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    engine = session_factory.kw["bind"]
+    app.dependency_overrides[get_db] = override_get_db
+    Base.metadata.create_all(bind=engine)
+    yield TestClient(app)
+    Base.metadata.drop_all(bind=engine)
+    clear_caches()
+    app.dependency_overrides.pop(get_db, None)
+
+@pytest.fixture
+def login(client):
+    """Fonction qui connecte un compte et retourne ses en-têtes d'authentification"""
+    def login(email: str, password: str) -> dict:
+        response = client.post("/api/auth/login", data={"username": email, "password": password})
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return login
+
+@pytest.fixture
+def admin_headers(client, login):
+    """Créer le premier admin et retourner ses en-têtes d'authentification"""
+    client.post(
+        "/api/auth/create-first-admin",
+        json={"username": "admin", "email": "admin@test.com", "password": "admin123", "role": "admin"}
+    )
+    return login("admin@test.com", "admin123")
+
+@pytest.fixture
+def admin_token(admin_headers):
+    return admin_headers["Authorization"].removeprefix("Bearer ")
+
+def pytest_terminal_summary(terminalreporter):
+    if not os.getenv("QUERY_BUDGET_REPORT") or not observed:
+        return
+    terminalreporter.section("query budgets")
+    for key, (queries, elapsed_ms) in sorted(observed.items(), key=lambda item: item[0][1:]):
+        method, route = key[0], " ".join(key[1:])
+        budget = BUDGETS.get(key)
+        declared = f"{budget.queries} q / {budget.ms:.0f} ms" if budget else "none"
+        terminalreporter.write_line(
+            f"{method:<6} {route:<55} {queries:>3} q {elapsed_ms:>7.1f} ms   (budget {declared})"
+        )
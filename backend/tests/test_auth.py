@@ -1,9 +1,5 @@
-import pytest
-from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from main import app
-from db import get_db, Base
 from models.user import User, RoleEnum
 
 # Base de données de test en mémoire
@@ -11,21 +7,6 @@ SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def override_get_db():
-    try:
-        db = TestingSessionLocal()
-        yield db
-    finally:
-        db.close()
-
-app.dependency_overrides[get_db] = override_get_db
-
-@pytest.fixture
-def client():
-    Base.metadata.create_all(bind=engine)
-    yield TestClient(app)
-    Base.metadata.drop_all(bind=engine)
-
 def test_register_success(client):
     response = client.post(
         "/auth/register",
@@ -310,8 +291,9 @@ def test_admin_can_delete_regular_user(client):
         f"/auth/admin/users/{user_id}",
         headers={"Authorization": f"Bearer {admin_token}"}
     )
-    assert response.status_code == 200
-    assert "User deleted successfully" in response.json()["message"]
+    assert response.status_code == 202
+    assert "User deletion scheduled" in response.json()["message"]
+    assert "job_id" in response.json()
 
 def test_admin_cannot_delete_himself(client):
     """Test qu'un admin ne peut pas se supprimer (dernier admin)"""
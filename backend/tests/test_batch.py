@@ -0,0 +1,93 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import db as database
+from main import app
+from db import get_db
+from routers import dashboard, dependencies
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_batch.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture
+def sessions(monkeypatch):
+    """Sessions ouvertes par le vrai get_db (sans override), sur la base de test"""
+    opened = []
+
+    def counting_session():
+        opened.append(TestingSessionLocal())
+        return opened[-1]
+
+    monkeypatch.setattr(database, "SessionLocal", counting_session)
+    return opened
+
+@pytest.fixture
+def client(client, sessions):
+    # Le vrai get_db : c'est lui qui partage la session entre les sous-requêtes
+    del app.dependency_overrides[get_db]
+    return client
+
+def test_batch_runs_sub_requests_in_one_session_and_auth_context(client, admin_headers, sessions, monkeypatch, query_budget):
+    client.post("/api/modules/", json={"title": "Intro", "type": "text", "content": "Bonjour"}, headers=admin_headers)
+    # Agrégats déjà calculés : le lot est mesuré sur le chemin courant du tableau de bord
+    with query_budget("first call"):
+        client.get("/api/dashboard/stats", headers=admin_headers)
+    lookups = []
+    original_lookup = dependencies.get_user_by_email
+    monkeypatch.setattr(dependencies, "get_user_by_email", lambda db, email: lookups.append(email) or original_lookup(db, email))
+    sessions.clear()
+
+    response = client.post("/api/batch", json={"requests": [
+        {"path": "/health"},
+        {"path": "/api/dashboard/stats"},
+        {"path": "/api/modules/?limit=5"},
+        {"path": "/api/auth/admin/users"},
+        {"path": "/api/modules/999999"},
+    ]}, headers=admin_headers)
+
+    assert response.status_code == 200
+    health, stats, modules, users, missing = response.json()["responses"]
+    assert health["status"] == 200 and health["body"]["status"] == "ok"
+    assert stats["status"] == 200 and stats["body"]["total_modules"] == 1
+    assert modules["status"] == 200 and [module["title"] for module in modules["body"]] == ["Intro"]
+    assert users["status"] == 200 and [user["email"] for user in users["body"]] == ["admin@test.com"]
+    assert missing["status"] == 404
+    # Un seul chargement de l'utilisateur et une seule session pour tout le lot
+    assert lookups == ["admin@test.com"]
+    assert len(sessions) == 1
+
+def test_failing_sub_request_does_not_fail_the_batch(client, admin_headers, monkeypatch):
+    def broken(db):
+        raise RuntimeError("agrégats illisibles")
+
+    monkeypatch.setattr(dashboard, "read_rollups", broken)
+    response = client.post("/api/batch", json={"requests": [
+        {"path": "/health"},
+        {"path": "/api/dashboard/stats"},
+        {"path": "/api/modules/?limit=5"},
+    ]}, headers=admin_headers)
+
+    assert response.status_code == 200
+    health, stats, modules = response.json()["responses"]
+    assert health["status"] == 200
+    assert stats == {"status": 500, "body": None}
+    # La session partagée reste utilisable après l'échec
+    assert modules["status"] == 200 and modules["body"] == []
+
+def test_sub_requests_keep_their_own_authorization(client, admin_headers, login):
+    client.post("/api/auth/register", json={"email": "alice@test.com", "username": "alice", "password": "password123"})
+    student_headers = login("alice@test.com", "password123")
+
+    response = client.post("/api/batch", json={"requests": [{"path": "/api/auth/admin/users"}]}, headers=student_headers)
+    assert response.json()["responses"][0]["status"] == 403
+    assert client.post("/api/batch", json={"requests": [{"path": "/health"}]}).status_code == 401
+
+def test_batch_rejects_unsupported_sub_requests(client, admin_headers):
+    for sub_request in ({"path": "/api/events/stream"}, {"path": "/api/batch"}):
+        response = client.post("/api/batch", json={"requests": [sub_request]}, headers=admin_headers)
+        assert response.status_code == 400
+    response = client.post("/api/batch", json={"requests": [{"method": "DELETE", "path": "/api/modules/1"}]}, headers=admin_headers)
+    assert response.status_code == 422
+    response = client.post("/api/batch", json={"requests": [{"path": "/health"}] * 21}, headers=admin_headers)
+    assert response.status_code == 400
@@ -0,0 +1,115 @@
+import os
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from core import bundles
+from core.jobs import Worker
+from core.ordering import ORDER_GAP
+import core.tasks  # noqa: F401  (enregistre les handlers de jobs)
+from models import Course, CourseLevel, Lesson
+
+# Base de données de test en mémoire
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_bundles.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture
+def client(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(bundles, "COURSE_BUNDLE_DIR", str(tmp_path))
+    return client
+
+def create_course(lesson_count):
+    db = TestingSessionLocal()
+    course = Course(title="Cours", description="Hors ligne", level=CourseLevel.beginner)
+    db.add(course)
+    db.flush()
+    for position in range(lesson_count):
+        db.add(Lesson(course_id=course.id, title=f"Leçon {position + 1}", content="Texte", order_index=(position + 1) * ORDER_GAP))
+    db.commit()
+    course_id = course.id
+    db.close()
+    return course_id
+
+def test_bundle_is_rendered_once_then_served_from_disk(client, admin_headers, tmp_path):
+    course_id = create_course(3)
+    response = client.get(f"/api/courses/{course_id}/bundle", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "private, no-cache"
+    data = response.json()
+    assert data["course"]["title"] == "Cours"
+    assert [lesson["title"] for lesson in data["lessons"]] == ["Leçon 1", "Leçon 2", "Leçon 3"]
+
+    digest = bundles.current_hash(course_id)
+    assert response.headers["etag"] == f'"{digest}"'
+    assert response.headers["content-location"] == f"/api/courses/{course_id}/bundle/{digest}"
+    assert sorted(os.listdir(tmp_path / str(course_id))) == [".lock", "current", f"{digest}.json", f"{digest}.json.gz"]
+
+    # La base n'est plus lue : le paquet reste servi même si le cours disparaît
+    db = TestingSessionLocal()
+    db.query(Lesson).delete()
+    db.commit()
+    db.close()
+    assert client.get(f"/api/courses/{course_id}/bundle", headers=admin_headers).json() == data
+
+    cached = client.get(
+        f"/api/courses/{course_id}/bundle",
+        headers={**admin_headers, "If-None-Match": f'"{digest}"'}
+    )
+    assert cached.status_code == 304
+
+    immutable = client.get(f"/api/courses/{course_id}/bundle/{digest}", headers=admin_headers)
+    assert immutable.status_code == 200
+    assert "immutable" in immutable.headers["cache-control"]
+    assert immutable.headers["content-encoding"] == "gzip"
+    assert immutable.json() == data
+
+def test_bundle_is_rerendered_after_a_change(client, admin_headers):
+    course_id = create_course(3)
+    client.get(f"/api/courses/{course_id}/bundle", headers=admin_headers)
+    first = bundles.current_hash(course_id)
+
+    lessons = client.get(f"/api/courses/{course_id}/lessons").json()
+    client.post(
+        f"/api/courses/{course_id}/lessons/{lessons[2]['id']}/move",
+        json={"after_id": None},
+        headers=admin_headers
+    )
+    Worker(TestingSessionLocal).run_once()
+
+    second = bundles.current_hash(course_id)
+    assert second != first
+    titles = [lesson["title"] for lesson in client.get(f"/api/courses/{course_id}/bundle", headers=admin_headers).json()["lessons"]]
+    assert titles == ["Leçon 3", "Leçon 1", "Leçon 2"]
+    # L'ancienne version reste disponible pour les clients qui la téléchargent encore
+    assert client.get(f"/api/courses/{course_id}/bundle/{first}", headers=admin_headers).status_code == 200
+
+def test_unchanged_course_keeps_its_bundle(client):
+    course_id = create_course(2)
+    db = TestingSessionLocal()
+    try:
+        first = bundles.render_bundle(db, course_id)
+        assert bundles.render_bundle(db, course_id) == first
+        assert bundles.render_bundle(db, 999) is None
+    finally:
+        db.close()
+
+def test_first_render_keeps_a_bundle_written_in_the_meantime(client):
+    course_id = create_course(2)
+    db = TestingSessionLocal()
+    try:
+        rendered = bundles.render_bundle(db, course_id)
+        db.query(Lesson).filter(Lesson.course_id == course_id).update({"title": "Modifiée"})
+        db.commit()
+        # La requête qui n'avait pas trouvé de paquet ne remplace pas celui du job
+        assert bundles.render_bundle(db, course_id, replace=False) == rendered
+        assert bundles.current_hash(course_id) == rendered
+        newer = bundles.render_bundle(db, course_id)
+        assert newer != rendered
+        assert os.path.exists(bundles.bundle_path(course_id, newer))
+    finally:
+        db.close()
+
+def test_bundle_requires_token_and_existing_course(client, admin_headers):
+    assert client.get("/api/courses/1/bundle").status_code == 401
+    assert client.get("/api/courses/999/bundle", headers=admin_headers).status_code == 404
+    assert client.get("/api/courses/999/bundle/not-a-hash", headers=admin_headers).status_code == 404
@@ -0,0 +1,82 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from core.cache import get_cache
+from core.invalidation import bus
+from models import Course, CourseLevel
+
+# Base de données de test en mémoire
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_catalogue.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture
+def catalogue(client):
+    db = TestingSessionLocal()
+    db.add_all([
+        Course(title="Python débutant", description="Variables et boucles", level=CourseLevel.beginner, created_at=datetime(2025, 3, 1)),
+        Course(title="FastAPI", description="API web en Python", level=CourseLevel.intermediate, created_at=datetime(2025, 9, 1)),
+        Course(title="SQL avancé", description="Index et plans", level=CourseLevel.advanced, created_at=datetime(2026, 1, 15)),
+        Course(title="Python avancé", description="Métaclasses", level=CourseLevel.advanced, created_at=datetime(2026, 6, 1)),
+    ])
+    db.commit()
+    db.close()
+
+def test_unfiltered_catalogue_returns_facets(client, catalogue):
+    data = client.get("/api/courses").json()
+    assert data["total"] == 4
+    assert [course["title"] for course in data["courses"]][0] == "Python avancé"
+    assert data["facets"]["level"] == {"beginner": 1, "intermediate": 1, "advanced": 2}
+    assert data["facets"]["year"] == {"2026": 2, "2025": 2}
+
+def test_each_facet_ignores_its_own_filter(client, catalogue):
+    data = client.get("/api/courses", params={"level": "advanced", "year": 2026}).json()
+    assert data["total"] == 2
+    # Niveaux des cours de 2026, années des cours avancés
+    assert data["facets"]["level"] == {"beginner": 0, "intermediate": 0, "advanced": 2}
+    assert data["facets"]["year"] == {"2026": 2}
+
+    data = client.get("/api/courses", params={"year": 2025}).json()
+    assert {course["title"] for course in data["courses"]} == {"Python débutant", "FastAPI"}
+    assert data["facets"]["year"] == {"2026": 2, "2025": 2}
+
+def test_keyword_filter_and_pagination(client, catalogue):
+    data = client.get("/api/courses", params={"q": "python", "limit": 2}).json()
+    assert data["total"] == 3
+    assert len(data["courses"]) == 2
+    assert data["facets"]["level"] == {"beginner": 1, "intermediate": 1, "advanced": 1}
+
+    data = client.get("/api/courses", params={"q": "python", "limit": 2, "offset": 2}).json()
+    assert [course["title"] for course in data["courses"]] == ["Python débutant"]
+
+    assert client.get("/api/courses", params={"q": "python", "offset": 10}).json()["courses"] == []
+
+def test_keyword_wildcards_are_matched_literally(client, catalogue):
+    db = TestingSessionLocal()
+    db.add_all([
+        Course(title="Réussir à 100%", description="Méthode", level=CourseLevel.beginner),
+        Course(title="Nommage snake_case", description="Style", level=CourseLevel.beginner),
+        Course(title="Chemins C:\\temp", description="Windows", level=CourseLevel.beginner),
+    ])
+    db.commit()
+    db.close()
+
+    for q, title in (("100%", "Réussir à 100%"), ("snake_case", "Nommage snake_case"), ("C:\\temp", "Chemins C:\\temp")):
+        data = client.get("/api/courses", params={"q": q}).json()
+        assert [course["title"] for course in data["courses"]] == [title]
+    assert client.get("/api/courses", params={"q": "_"}).json()["total"] == 1
+    assert client.get("/api/courses", params={"q": "%"}).json()["total"] == 1
+
+def test_unfiltered_facets_are_cached_until_courses_change(client, catalogue):
+    client.get("/api/courses")
+    db = TestingSessionLocal()
+    db.add(Course(title="Nouveau", level=CourseLevel.beginner, created_at=datetime(2026, 7, 1)))
+    db.commit()
+    db.close()
+
+    assert client.get("/api/courses").json()["total"] == 4
+    assert get_cache("course_facets").get("unfiltered") is not None
+
+    bus.dispatch("courses", None)
+    assert client.get("/api/courses").json()["total"] == 5
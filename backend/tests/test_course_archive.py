@@ -0,0 +1,106 @@
+import gzip
+import io
+import json
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from db import Base
+from core.course_archive import ArchiveError, export_course, import_course
+from models import Course, CourseLevel, Lesson
+
+# Base de données de test en mémoire
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_course_archive.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def create_course(lesson_count):
+    db = TestingSessionLocal()
+    course = Course(title="Cours à exporter", description="Description", level=CourseLevel.intermediate)
+    db.add(course)
+    db.flush()
+    # Insérées dans le désordre : l'export suit order_index
+    for position in reversed(range(lesson_count)):
+        db.add(Lesson(course_id=course.id, title=f"Leçon {position}", content="é" * 10, order_index=(position + 1) * 100))
+    db.commit()
+    course_id = course.id
+    db.close()
+    return course_id
+
+def read_archive(data: bytes) -> list[dict]:
+    return [json.loads(line) for line in gzip.decompress(data).decode("utf-8").splitlines()]
+
+def test_export_streams_course_and_ordered_lessons(client, admin_headers):
+    course_id = create_course(3)
+    response = client.get(f"/api/courses/{course_id}/export", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+
+    records = read_archive(response.content)
+    assert records[0] == {"type": "header", "format": "elearning-course", "version": 1}
+    assert records[1]["type"] == "course"
+    assert records[1]["data"]["level"] == "intermediate"
+    assert [record["data"]["title"] for record in records[2:]] == ["Leçon 0", "Leçon 1", "Leçon 2"]
+
+    assert client.get("/api/courses/999/export", headers=admin_headers).status_code == 404
+
+def test_import_recreates_exported_course(client, admin_headers):
+    course_id = create_course(5)
+    archive = client.get(f"/api/courses/{course_id}/export", headers=admin_headers).content
+
+    response = client.post(
+        "/api/courses/import",
+        files={"file": ("course.ndjson.gz", archive, "application/gzip")},
+        headers=admin_headers
+    )
+    assert response.status_code == 201
+    new_id = response.json()["course_id"]
+    assert new_id != course_id
+    assert response.json()["lessons"] == 5
+
+    lessons = client.get(f"/api/courses/{new_id}/lessons").json()
+    assert [lesson["title"] for lesson in lessons] == [f"Leçon {position}" for position in range(5)]
+    assert lessons[0]["content"] == "é" * 10
+
+def test_import_rejects_invalid_archive_without_writing(client, admin_headers):
+    lines = [
+        {"type": "header", "format": "elearning-course", "version": 1},
+        {"type": "course", "data": {"title": "Cours", "level": "beginner"}},
+        {"type": "lesson", "data": {"title": "Sans ordre"}},
+    ]
+    archive = gzip.compress("\n".join(json.dumps(line) for line in lines).encode())
+    response = client.post(
+        "/api/courses/import",
+        files={"file": ("course.ndjson.gz", archive, "application/gzip")},
+        headers=admin_headers
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Line 3: order_index")
+    assert client.get("/api/courses").json()["total"] == 2  # catalogue vide : cours d'exemple
+
+    response = client.post(
+        "/api/courses/import",
+        files={"file": ("course.ndjson.gz", b"not gzip", "application/gzip")},
+        headers=admin_headers
+    )
+    assert response.status_code == 400
+
+def test_archive_round_trip_in_small_batches():
+    Base.metadata.create_all(bind=engine)
+    course_id = create_course(25)
+    db = TestingSessionLocal()
+    try:
+        course = db.query(Course).filter(Course.id == course_id).one()
+        archive = b"".join(export_course(db, course, batch_size=4))
+        result = import_course(db, io.BytesIO(archive), batch_size=7)
+        db.commit()
+        assert result["lessons"] == 25
+        order = [
+            row.order_index for row in
+            db.query(Lesson.order_index).filter(Lesson.course_id == result["course_id"]).order_by(Lesson.order_index)
+        ]
+        assert order == [(position + 1) * 100 for position in range(25)]
+        with pytest.raises(ArchiveError):
+            import_course(db, io.BytesIO(gzip.compress(b'{"type": "course"}\n')))
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from core.jobs import Worker
+from core.stats import REFRESH_JOB
+from models import Job, StatRollup
+import core.tasks  # noqa: F401
+
+# Base de données de test en mémoire
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_dashboard.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def create_modules(client, token, types):
+    for i, module_type in enumerate(types):
+        client.post(
+            "/api/modules/",
+            json={"title": f"Module {i + 1}", "content": "Contenu", "type": module_type},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+
+def test_dashboard_stats_counts(client, admin_token, query_budget):
+    """Test des compteurs par type de module et par rôle"""
+    create_modules(client, admin_token, ["text", "video", "text"])
+    client.post(
+        "/api/auth/register",
+        json={"email": "student@test.com", "password": "student123"}
+    )
+    
+    with query_budget("first call"):
+        response = client.get(
+            "/api/dashboard/stats",
+            headers={"Authorization": f"Bearer {admin_token}"}
+        )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_modules"] == 3
+    assert data["modules_by_type"] == {"text": 2, "video": 1}
+    assert data["users_by_role"] == {"student": 1, "instructor": 0, "admin": 1}
+    assert [module["title"] for module in data["recent_modules"]] == ["Module 3", "Module 2", "Module 1"]
+
+def test_stale_stats_are_refreshed_by_a_job(client, admin_token, query_budget):
+    """Test que des agrégats trop anciens sont recalculés en arrière-plan"""
+    with query_budget("first call"):
+        client.get("/api/dashboard/stats", headers={"Authorization": f"Bearer {admin_token}"})
+    create_modules(client, admin_token, ["video"])
+    
+    db = TestingSessionLocal()
+    db.query(StatRollup).update({StatRollup.refreshed_at: datetime.utcnow() - timedelta(hours=1)})
+    db.commit()
+    
+    # Les agrégats existants sont servis tels quels, un seul job est programmé
+    for _ in range(2):
+        response = client.get("/api/dashboard/stats", headers={"Authorization": f"Bearer {admin_token}"})
+        assert response.json()["total_modules"] == 0
+    jobs = db.query(Job).filter(Job.kind == REFRESH_JOB).all()
+    assert len(jobs) == 1 and jobs[0].dedupe_key == REFRESH_JOB
+    db.close()
+    
+    Worker(TestingSessionLocal).run_once()
+    response = client.get("/api/dashboard/stats", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.json()["total_modules"] == 1
+
+def test_catalogue_change_schedules_refresh(client, admin_token, query_budget):
+    """Test qu'un changement de module déclenche un recalcul sans attendre l'expiration"""
+    with query_budget("first call"):
+        client.get("/api/dashboard/stats", headers={"Authorization": f"Bearer {admin_token}"})
+    client.get("/api/dashboard/stats", headers={"Authorization": f"Bearer {admin_token}"})
+    db = TestingSessionLocal()
+    assert db.query(Job).filter(Job.kind == REFRESH_JOB).count() == 0
+
+    create_modules(client, admin_token, ["text"])
+    client.get("/api/dashboard/stats", headers={"Authorization": f"Bearer {admin_token}"})
+    assert db.query(Job).filter(Job.kind == REFRESH_JOB).count() == 1
+    db.close()
+
+    Worker(TestingSessionLocal).run_once()
+    response = client.get("/api/dashboard/stats", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.json()["total_modules"] == 1
+
+def test_dashboard_stats_forbidden_for_students(client):
+    """Test qu'un étudiant n'a pas accès aux statistiques"""
+    client.post(
+        "/api/auth/register",
+        json={"email": "student@test.com", "password": "student123"}
+    )
+    token = client.post(
+        "/api/auth/login",
+        data={"username": "student@test.com", "password": "student123"}
+    ).json()["access_token"]
+    response = client.get("/api/dashboard/stats", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 403
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+from fastapi.testclient import TestClient
+from main import app
+from core.events import ChangeBroadcaster
+from core.invalidation import bus
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, timeout=5))
+
+async def next_message(stream):
+    return await stream.__anext__()
+
+def test_changes_are_fanned_out_to_every_subscriber():
+    broadcaster = ChangeBroadcaster()
+    bus.subscribe(broadcaster.publish)
+
+    async def scenario():
+        streams = [broadcaster.stream(heartbeat=60) for _ in range(3)]
+        for stream in streams:
+            assert await next_message(stream) == "retry: 3000\n\n"
+        assert len(broadcaster) == 3
+
+        # Les commits arrivent depuis les threads des requêtes ou du listener PostgreSQL
+        thread = threading.Thread(target=lambda: (bus.dispatch("users", 1), bus.dispatch("modules", 7)))
+        thread.start()
+        messages = [await next_message(stream) for stream in streams]
+        thread.join()
+        for message in messages:
+            assert "event: change" in message
+            assert 'data: {"resource":"modules","id":7}' in message
+        for stream in streams:
+            await stream.aclose()
+        assert len(broadcaster) == 0
+        return messages[0]
+
+    first = run(scenario())
+    event_id = first.split("\n")[0][len("id: "):]
+
+    async def reconnect():
+        broadcaster._loop = asyncio.get_running_loop()
+        broadcaster._fan_out("courses", 2)
+        stream = broadcaster.stream(last_event_id=event_id, heartbeat=60)
+        await next_message(stream)
+        replayed = await next_message(stream)
+        await stream.aclose()
+
+        stream = broadcaster.stream(last_event_id="other-worker-3", heartbeat=60)
+        await next_message(stream)
+        reset = await next_message(stream)
+        await stream.aclose()
+        return replayed, reset
+
+    replayed, reset = run(reconnect())
+    assert '"resource":"courses","id":2' in replayed
+    assert "event: reset" in reset
+
+def test_slow_subscriber_is_disconnected():
+    broadcaster = ChangeBroadcaster(queue_size=2)
+
+    async def scenario():
+        broadcaster._loop = asyncio.get_running_loop()
+        stream = broadcaster.stream(heartbeat=60)
+        await next_message(stream)
+        for module_id in range(5):
+            broadcaster._fan_out("modules", module_id)
+        assert len(broadcaster) == 0
+        # Le flux se termine : le navigateur se reconnecte avec Last-Event-ID
+        try:
+            await next_message(stream)
+        except StopAsyncIteration:
+            return True
+        return False
+
+    assert run(scenario())
+
+def test_stream_requires_valid_token():
+    client = TestClient(app)
+    assert client.get("/api/events/stream").status_code == 401
+    assert client.get("/api/events/stream?token=invalid").status_code == 401
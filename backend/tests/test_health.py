@@ -0,0 +1,55 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from main import app
+from db import get_db
+from core.health import HealthMonitor
+from routers import health
+
+def failing_get_db():
+    raise AssertionError("Health probes must not use the request pool")
+
+@pytest.fixture
+def client():
+    previous_override = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = failing_get_db
+    yield TestClient(app)
+    app.dependency_overrides[get_db] = previous_override
+
+def test_liveness_and_readiness_are_served_from_snapshot(client, monkeypatch):
+    monitor = HealthMonitor(create_engine("sqlite:///./test_health.db"))
+    monkeypatch.setattr(health, "monitor", monitor)
+
+    assert client.get("/health/live").json() == {"status": "ok"}
+    # Aucun instantané tant que le moniteur n'a pas tourné
+    assert client.get("/health/ready").status_code == 503
+
+    monitor.refresh()
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["database"] == "connected"
+    assert data["pool"]["checked_out"] == 0
+    assert client.get("/health").json() == {"status": "ok", "database": "connected"}
+    monitor.stop()
+
+def test_readiness_reports_unreachable_database(client, monkeypatch):
+    monitor = HealthMonitor(create_engine("sqlite:////nonexistent/dir/health.db"))
+    monkeypatch.setattr(health, "monitor", monitor)
+    monitor.refresh()
+
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert "database unreachable" in response.json()["reasons"]
+    assert client.get("/health").json()["database"] == "disconnected"
+
+def test_stale_snapshot_is_not_ready(client, monkeypatch):
+    monitor = HealthMonitor(create_engine("sqlite:///./test_health.db"), interval=0.01)
+    monkeypatch.setattr(health, "monitor", monitor)
+    monitor.refresh()
+    monitor._checked_at_monotonic -= 1
+
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert "health check stale" in response.json()["reasons"]
+    monitor.stop()
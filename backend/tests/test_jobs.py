@@ -0,0 +1,97 @@
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from core.jobs import Worker, enqueue, job_handler
+from models.job import Job, JobStatus
+from models.user import User
+import core.tasks  # noqa: F401
+
+# Base de données de test en mémoire
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_jobs.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@job_handler("test_always_fails")
+def always_fails(db, payload):
+    raise RuntimeError("boom")
+
+def test_delete_user_runs_in_background(client, admin_token):
+    """Test que la suppression d'un utilisateur passe par un job"""
+    user_response = client.post(
+        "/api/auth/register",
+        json={"email": "user@test.com", "password": "userpass123"}
+    )
+    user_id = user_response.json()["id"]
+    
+    response = client.delete(
+        f"/api/auth/admin/users/{user_id}",
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    
+    # Le job est en attente tant qu'aucun worker ne l'a traité
+    response = client.get(
+        f"/api/jobs/{job_id}",
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.json()["status"] == "queued"
+    
+    assert Worker(TestingSessionLocal).run_once() == [JobStatus.succeeded]
+    
+    response = client.get(
+        f"/api/jobs/{job_id}",
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "succeeded"
+    
+    db = TestingSessionLocal()
+    assert db.query(User).filter(User.id == user_id).first() is None
+    db.close()
+
+def test_failed_job_is_retried_with_backoff(client):
+    """Test qu'un job en échec est remis en file avec un délai"""
+    db = TestingSessionLocal()
+    job = enqueue(db, "test_always_fails", max_attempts=2)
+    job_id = job.id
+    db.commit()
+    
+    worker = Worker(TestingSessionLocal)
+    assert worker.run_once() == [JobStatus.queued]
+    job = db.query(Job).filter(Job.id == job_id).first()
+    assert job.attempts == 1
+    assert job.run_at > datetime.utcnow()
+    assert "boom" in job.last_error
+    
+    # Le job n'est pas repris avant l'échéance du backoff
+    assert worker.run_once() == []
+    
+    job.run_at = datetime.utcnow()
+    db.commit()
+    assert worker.run_once() == [JobStatus.failed]
+    db.close()
+
+def test_job_status_hidden_from_other_users(client, admin_token):
+    """Test qu'un utilisateur ne voit pas les jobs des autres"""
+    db = TestingSessionLocal()
+    job = enqueue(db, "test_always_fails", created_by=1)
+    job_id = job.id
+    db.commit()
+    db.close()
+    
+    client.post(
+        "/api/auth/register",
+        json={"email": "student@test.com", "password": "student123"}
+    )
+    response = client.post(
+        "/api/auth/login",
+        data={"username": "student@test.com", "password": "student123"}
+    )
+    token = response.json()["access_token"]
+    
+    response = client.get(
+        f"/api/jobs/{job_id}",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 404
@@ -0,0 +1,139 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import core.ordering
+import routers.courses
+from core.ordering import ORDER_GAP, key_between, rebalance_lessons
+from models import Course, CourseLevel, Lesson, Job, JobStatus
+
+# Base de données de test en mémoire
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_lessons.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def create_course(order_indexes):
+    """Créer un cours avec une leçon par clé d'ordre fournie"""
+    db = TestingSessionLocal()
+    course = Course(title="Cours", level=CourseLevel.beginner)
+    db.add(course)
+    db.flush()
+    for position, order_index in enumerate(order_indexes):
+        db.add(Lesson(course_id=course.id, title=f"Leçon {position + 1}", order_index=order_index))
+    db.commit()
+    course_id = course.id
+    db.close()
+    return course_id
+
+def lesson_titles(client, course_id):
+    response = client.get(f"/api/courses/{course_id}/lessons")
+    assert response.status_code == 200
+    return [lesson["title"] for lesson in response.json()]
+
+def test_move_lesson_to_top_touches_one_row(client, admin_token):
+    """Test qu'un déplacement en tête ne modifie que la leçon déplacée"""
+    course_id = create_course([ORDER_GAP * (i + 1) for i in range(4)])
+    lesson_id = client.get(f"/api/courses/{course_id}/lessons").json()[3]["id"]
+    
+    response = client.post(
+        f"/api/courses/{course_id}/lessons/{lesson_id}/move",
+        json={"after_id": None},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    assert lesson_titles(client, course_id) == ["Leçon 4", "Leçon 1", "Leçon 2", "Leçon 3"]
+    
+    lessons = client.get(f"/api/courses/{course_id}/lessons").json()
+    assert [lesson["order_index"] for lesson in lessons[1:]] == [ORDER_GAP, 2 * ORDER_GAP, 3 * ORDER_GAP]
+
+def test_move_lesson_between_adjacent_keys_rebalances(client, admin_token, query_budget):
+    """Test du rééquilibrage quand il n'y a plus de place entre deux clés"""
+    course_id = create_course([1, 2, 3])
+    lessons = client.get(f"/api/courses/{course_id}/lessons").json()
+    
+    with query_budget("rebalance"):
+        response = client.post(
+            f"/api/courses/{course_id}/lessons/{lessons[2]['id']}/move",
+            json={"after_id": lessons[0]["id"]},
+            headers={"Authorization": f"Bearer {admin_token}"}
+        )
+    assert response.status_code == 200
+    assert lesson_titles(client, course_id) == ["Leçon 1", "Leçon 3", "Leçon 2"]
+
+def test_tight_gap_schedules_background_rebalance(client, admin_token):
+    """Test qu'un écart trop faible programme un job de rééquilibrage"""
+    course_id = create_course([100, 104, 108])
+    lessons = client.get(f"/api/courses/{course_id}/lessons").json()
+    
+    client.post(
+        f"/api/courses/{course_id}/lessons/{lessons[2]['id']}/move",
+        json={"after_id": lessons[0]["id"]},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    db = TestingSessionLocal()
+    assert db.query(Job).filter(Job.kind == "rebalance_lessons").count() == 1
+    db.close()
+
+def test_tight_gap_rebalance_is_queued_once_per_course(client, admin_token):
+    """Test qu'un seul job de rééquilibrage attend par cours"""
+    course_id = create_course([100, 104, 108, 112])
+    lessons = client.get(f"/api/courses/{course_id}/lessons").json()
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    for lesson in (lessons[2], lessons[3]):
+        response = client.post(
+            f"/api/courses/{course_id}/lessons/{lesson['id']}/move",
+            json={"after_id": lessons[0]["id"]},
+            headers=headers
+        )
+        assert response.status_code == 200
+    db = TestingSessionLocal()
+    jobs = db.query(Job).filter(Job.kind == "rebalance_lessons").all()
+    assert len(jobs) == 1 and jobs[0].dedupe_key == f"rebalance_lessons:{course_id}"
+
+    # Une fois le job réclamé par un worker, un nouveau déplacement en programme un autre
+    jobs[0].status = JobStatus.running
+    db.commit()
+    client.post(
+        f"/api/courses/{course_id}/lessons/{lessons[0]['id']}/move",
+        json={"after_id": lessons[2]["id"]},
+        headers=headers
+    )
+    assert db.query(Job).filter(Job.kind == "rebalance_lessons").count() == 2
+    db.close()
+
+def test_rebalance_gap_stays_within_integer_column(client, monkeypatch):
+    """Test que la renumérotation d'un long cours ne dépasse pas la colonne INTEGER"""
+    monkeypatch.setattr(core.ordering, "ORDER_GAP", 2 ** 30)
+    course_id = create_course([1, 2, 3, 4])
+    db = TestingSessionLocal()
+    assert rebalance_lessons(db, course_id) == 4
+    db.commit()
+    keys = [key for (key,) in db.query(Lesson.order_index).filter(Lesson.course_id == course_id).order_by(Lesson.order_index)]
+    db.close()
+    gap = (2 ** 31 - 1) // 4
+    assert keys == [gap, 2 * gap, 3 * gap, 4 * gap]
+    # Après la dernière clé, on se rapproche de la borne sans la dépasser
+    assert keys[-1] < key_between(keys[-1], None) <= 2 ** 31 - 1
+
+def test_move_without_room_after_rebalance_is_a_conflict(client, admin_token, monkeypatch, query_budget):
+    """Test qu'un déplacement impossible renvoie 409 au lieu d'écrire une clé vide"""
+    course_id = create_course([1, 2, 3])
+    lessons = client.get(f"/api/courses/{course_id}/lessons").json()
+    monkeypatch.setattr(routers.courses, "key_between", lambda previous, following: None)
+
+    with query_budget("rebalance"):
+        response = client.post(
+            f"/api/courses/{course_id}/lessons/{lessons[2]['id']}/move",
+            json={"after_id": lessons[0]["id"]},
+            headers={"Authorization": f"Bearer {admin_token}"}
+        )
+    assert response.status_code == 409
+    assert lesson_titles(client, course_id) == ["Leçon 1", "Leçon 2", "Leçon 3"]
+
+def test_move_lesson_requires_instructor_or_admin(client):
+    """Test qu'un déplacement sans authentification est refusé"""
+    course_id = create_course([ORDER_GAP])
+    response = client.post(
+        f"/api/courses/{course_id}/lessons/1/move",
+        json={"after_id": None}
+    )
+    assert response.status_code == 401
@@ -0,0 +1,117 @@
+import asyncio
+import os
+import signal
+import time
+import pytest
+import uvicorn
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from main import app
+from core.events import broadcaster
+from core.lifecycle import DrainingServer, RequestDrainer, drainer, prewarm_pool
+from core.security import create_access_token
+from routers import health
+
+@pytest.fixture
+def reset_drainer():
+    yield
+    drainer.reset()
+
+def test_prewarm_opens_the_permanent_pool_connections():
+    engine = create_engine("sqlite:///./test_lifecycle.db", pool_size=3)
+    assert engine.pool.checkedin() == 0
+
+    assert prewarm_pool(engine, 10) == 3
+    # Rendues au pool, ouvertes
+    assert engine.pool.checkedin() == 3
+    assert engine.pool.checkedout() == 0
+    engine.dispose()
+
+def test_draining_worker_refuses_new_requests(reset_drainer):
+    drainer.draining = True
+    response = TestClient(app).get("/health/live")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert response.headers["connection"] == "close"
+
+def test_drain_waits_for_in_flight_requests():
+    async def scenario():
+        requests = RequestDrainer()
+        requests.in_flight = 2
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.05, requests.finished)
+        loop.call_later(0.1, requests.finished)
+        drained = await requests.drain(timeout=5)
+        return drained, requests
+
+    drained, requests = asyncio.run(scenario())
+    assert drained and requests.in_flight == 0 and requests.draining
+
+def test_drain_gives_up_after_timeout():
+    async def scenario():
+        requests = RequestDrainer()
+        requests.in_flight = 1
+        return await requests.drain(timeout=0.05)
+
+    assert asyncio.run(scenario()) is False
+
+def test_drain_closes_event_streams():
+    async def scenario():
+        stream = broadcaster.stream(heartbeat=60)
+        assert await stream.__anext__() == "retry: 3000\n\n"
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        assert len(broadcaster) == 1
+        assert await RequestDrainer().drain(timeout=1)
+        with pytest.raises(StopAsyncIteration):
+            await pending
+        return len(broadcaster)
+
+    assert asyncio.run(scenario()) == 0
+
+def test_lifespan_starts_and_stops_background_services(reset_drainer):
+    with TestClient(app) as client:
+        # Instantané pris au démarrage, avant la première requête
+        assert health.monitor.snapshot["checked_at"] is not None
+        assert client.get("/health/live").status_code == 200
+    assert drainer.draining
+    assert health.monitor._thread is None
+
+def test_sigterm_closes_event_streams_before_uvicorn_waits(reset_drainer):
+    """Uvicorn attend les connexions ouvertes avant le lifespan : le flux SSE doit finir dès le signal"""
+    previous = {sig: signal.getsignal(sig) for sig in (signal.SIGINT, signal.SIGTERM)}
+    server = DrainingServer(uvicorn.Config(app, host="127.0.0.1", port=0, timeout_graceful_shutdown=10, log_level="warning"))
+    token = create_access_token({"sub": "alice@test.com"})
+
+    async def scenario():
+        serving = asyncio.ensure_future(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.01)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET /api/events/stream?token={token} HTTP/1.1\r\nHost: test\r\n\r\n".encode())
+        await writer.drain()
+        received = b""
+        while b"retry: 3000" not in received:
+            received += await reader.read(1024)
+
+        started = time.monotonic()
+        os.kill(os.getpid(), signal.SIGTERM)
+        # Fin du corps chunked, sans attendre --timeout-graceful-shutdown
+        while not received.endswith(b"0\r\n\r\n"):
+            chunk = await asyncio.wait_for(reader.read(1024), 5)
+            assert chunk
+            received += chunk
+        closed_after = time.monotonic() - started
+        writer.close()
+        await serving
+        return closed_after
+
+    try:
+        closed_after = asyncio.run(scenario())
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+    assert closed_after < 2
+    assert drainer.draining
+    assert health.monitor._thread is None
@@ -0,0 +1,84 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from core.metrics import CONTENT_TYPE, Counter, Histogram, Registry
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_metrics.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def _value(text, sample):
+    """Valeur d'un échantillon (nom et labels exacts), 0 s'il n'existe pas encore"""
+    match = re.search(rf"^{re.escape(sample)} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+def test_metrics_count_routes_errors_and_hashing(client):
+    before = client.get("/metrics").text
+    client.post("/api/auth/register", json={"email": "alice@test.com", "username": "alice", "password": "password123"})
+    client.post("/api/auth/login", data={"username": "alice@test.com", "password": "wrong"})
+    client.get("/api/courses/999999")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == CONTENT_TYPE
+    text = response.text
+
+    count = 'http_request_duration_seconds_count{method="POST",route="/api/auth/login"}'
+    assert _value(text, count) == _value(before, count) + 1
+    inf_bucket = 'http_request_duration_seconds_bucket{method="POST",route="/api/auth/login",le="+Inf"}'
+    assert _value(text, inf_bucket) == _value(text, count)
+
+    not_found = 'http_request_errors_total{method="GET",route="/api/courses/{course_id}",status="404"}'
+    assert _value(text, not_found) == _value(before, not_found) + 1
+    unauthorized = 'http_request_errors_total{method="POST",route="/api/auth/login",status="401"}'
+    assert _value(text, unauthorized) == _value(before, unauthorized) + 1
+
+    hashed = 'password_hash_duration_seconds_count{operation="hash",scheme="bcrypt"}'
+    assert _value(text, hashed) == _value(before, hashed) + 1
+    verified = 'password_hash_duration_seconds_count{operation="verify",scheme="bcrypt"}'
+    assert _value(text, verified) == _value(before, verified) + 1
+
+    # La requête /metrics en cours est la seule
+    assert _value(text, 'http_requests_in_progress{method="GET"}') == 1
+    assert "# TYPE db_pool_checked_out gauge" in text
+    assert 'cache_hits_total{cache="users"}' in text
+
+def test_histogram_merges_thread_shards():
+    registry = Registry()
+    histogram = Histogram("work_seconds", "Durée", ("kind",), buckets=(0.1, 1.0), registry=registry)
+    counter = Counter("work_total", "Nombre", registry=registry)
+
+    def work():
+        for _ in range(1000):
+            histogram.observe(("a",), 0.05)
+            histogram.observe(("a",), 0.5)
+            counter.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    text = registry.render()
+    assert _value(text, 'work_seconds_bucket{kind="a",le="0.1"}') == 4000
+    assert _value(text, 'work_seconds_bucket{kind="a",le="1"}') == 8000
+    assert _value(text, 'work_seconds_bucket{kind="a",le="+Inf"}') == 8000
+    assert _value(text, 'work_seconds_count{kind="a"}') == 8000
+    assert _value(text, 'work_seconds_sum{kind="a"}') == pytest.approx(2200)
+    assert _value(text, "work_total") == 4000
+
+def test_finished_threads_are_folded_into_one_shard():
+    registry = Registry()
+    counter = Counter("imports_total", "Nombre", registry=registry)
+
+    for _ in range(3):
+        # Un exécuteur neuf par import, comme core/user_import.py
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda _: counter.inc(), range(100)))
+
+    assert _value(registry.render(), "imports_total") == 300
+    assert counter._shards._live == {}
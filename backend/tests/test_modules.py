@@ -1,9 +1,6 @@
 import pytest
-from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from main import app
-from db import get_db, Base
 from models.user import User, RoleEnum
 from models.module import CourseModule, ModuleType
 
@@ -12,42 +9,6 @@ SQLALCHEMY_DATABASE_URL = "sqlite:///./test_modules.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def override_get_db():
-    try:
-        db = TestingSessionLocal()
-        yield db
-    finally:
-        db.close()
-
-app.dependency_overrides[get_db] = override_get_db
-
-@pytest.fixture
-def client():
-    Base.metadata.create_all(bind=engine)
-    yield TestClient(app)
-    Base.metadata.drop_all(bind=engine)
-
-@pytest.fixture
-def admin_token(client):
-    """Créer un admin et retourner son token"""
-    # Créer l'admin
-    client.post(
-        "/api/auth/create-first-admin",
-        json={
-            "username": "admin",
-            "email": "admin@test.com",
-            "password": "admin123",
-            "role": "admin"
-        }
-    )
-    
-    # Se connecter
-    response = client.post(
-        "/api/auth/login",
-        data={"username": "admin@test.com", "password": "admin123"}
-    )
-    return response.json()["access_token"]
-
 @pytest.fixture
 def instructor_token(client, admin_token):
     """Créer un instructor et retourner son token"""
@@ -185,6 +146,22 @@ def test_get_modules_list(client, instructor_token, student_token):
     data = response.json()
     assert len(data) == 1
 
+def test_get_modules_list_query_count_does_not_grow_with_page_size(client, instructor_token, student_token):
+    """Test que la liste des modules reste dans son budget de requêtes quelle que soit la taille de page"""
+    for i in range(30):
+        client.post(
+            "/api/modules/",
+            json={"title": f"Module {i}", "content": "Contenu", "type": "text"},
+            headers={"Authorization": f"Bearer {instructor_token}"}
+        )
+    # Le budget de GET /api/modules/ (tests/conftest.py) est vérifié à chaque appel
+    for limit in (1, 10, 30):
+        response = client.get(
+            f"/api/modules/?limit={limit}",
+            headers={"Authorization": f"Bearer {student_token}"}
+        )
+        assert len(response.json()) == limit
+
 def test_get_module_detail(client, instructor_token, student_token):
     """Test de récupération d'un module spécifique"""
     # Créer un module
@@ -247,6 +224,68 @@ def test_update_module_as_instructor(client, instructor_token):
     assert data["content"] == "Contenu mis à jour"
     assert data["type"] == "text"  # Type non modifié
 
+def test_update_module_losing_a_race_returns_409(client, instructor_token, monkeypatch):
+    """Test qu'une écriture concurrente entre la lecture et l'UPDATE donne 409, pas 500"""
+    headers = {"Authorization": f"Bearer {instructor_token}"}
+    module_id = client.post(
+        "/api/modules/",
+        json={"title": "Module disputé", "content": "Version 1", "type": "text"},
+        headers=headers
+    ).json()["id"]
+
+    from routers import modules
+    original_baseline = modules.ensure_baseline
+
+    def concurrent_patch(db, module):
+        original_baseline(db, module)
+        # Un PATCH commité par une autre requête après la lecture du module
+        other = TestingSessionLocal()
+        other.query(CourseModule).filter(CourseModule.id == module_id).update({"version": CourseModule.version + 1})
+        other.commit()
+        other.close()
+
+    monkeypatch.setattr(modules, "ensure_baseline", concurrent_patch)
+    response = client.put(f"/api/modules/{module_id}", json={"content": "Version 2"}, headers=headers)
+    assert response.status_code == 409
+
+    monkeypatch.setattr(modules, "ensure_baseline", original_baseline)
+    response = client.put(f"/api/modules/{module_id}", json={"content": "Version 2"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["content"] == "Version 2"
+
+def test_get_module_after_update_is_not_stale(client, instructor_token):
+    """Test que la mise à jour invalide le module mis en cache"""
+    create_response = client.post(
+        "/api/modules/",
+        json={
+            "title": "Module en cache",
+            "content": "Version 1",
+            "type": "text"
+        },
+        headers={"Authorization": f"Bearer {instructor_token}"}
+    )
+    module_id = create_response.json()["id"]
+    
+    # Première lecture : le module est mis en cache
+    response = client.get(
+        f"/api/modules/{module_id}",
+        headers={"Authorization": f"Bearer {instructor_token}"}
+    )
+    assert response.json()["content"] == "Version 1"
+    
+    client.put(
+        f"/api/modules/{module_id}",
+        json={"content": "Version 2"},
+        headers={"Authorization": f"Bearer {instructor_token}"}
+    )
+    
+    response = client.get(
+        f"/api/modules/{module_id}",
+        headers={"Authorization": f"Bearer {instructor_token}"}
+    )
+    assert response.status_code == 200
+    assert response.json()["content"] == "Version 2"
+
 def test_update_module_as_student_fails(client, instructor_token, student_token):
     """Test qu'un étudiant ne peut pas modifier un module"""
     # Créer un module
@@ -368,4 +407,74 @@ def test_module_type_validation(client, instructor_token):
         },
         headers={"Authorization": f"Bearer {instructor_token}"}
     )
-    assert response.status_code == 422  # Validation error 
\ No newline at end of file
+    assert response.status_code == 422  # Validation error
+
+
+def test_patch_module_content(client, instructor_token, student_token):
+    """Test de modification partielle du contenu avec précondition de version"""
+    headers = {"Authorization": f"Bearer {instructor_token}"}
+    response = client.post(
+        "/api/modules/",
+        json={"title": "Module long", "content": "Bonjuor le monde, bienvenue", "type": "text"},
+        headers=headers
+    )
+    module = response.json()
+    assert module["version"] == 1
+    # Mettre le module en cache
+    client.get(f"/api/modules/{module['id']}", headers=headers)
+
+    response = client.patch(
+        f"/api/modules/{module['id']}/content",
+        json={
+            "version": 1,
+            "edits": [
+                {"offset": 4, "delete": 2, "insert": "ou"},
+                {"offset": 27, "insert": " à tous"}
+            ]
+        },
+        headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+
+    response = client.get(f"/api/modules/{module['id']}", headers=headers)
+    assert response.json()["content"] == "Bonjour le monde, bienvenue à tous"
+    assert response.json()["version"] == 2
+
+    # Version périmée
+    response = client.patch(
+        f"/api/modules/{module['id']}/content",
+        json={"version": 1, "edits": [{"offset": 0, "delete": 1, "insert": "b"}]},
+        headers=headers
+    )
+    assert response.status_code == 409
+
+    # Position hors du contenu
+    response = client.patch(
+        f"/api/modules/{module['id']}/content",
+        json={"version": 2, "edits": [{"offset": 100, "insert": "!"}]},
+        headers=headers
+    )
+    assert response.status_code == 422
+
+    # Modifications qui se chevauchent
+    response = client.patch(
+        f"/api/modules/{module['id']}/content",
+        json={"version": 2, "edits": [{"offset": 5, "delete": 3}, {"offset": 6, "insert": "x"}]},
+        headers=headers
+    )
+    assert response.status_code == 422
+
+    response = client.patch(
+        f"/api/modules/{module['id']}/content",
+        json={"version": 2, "edits": [{"offset": 0, "delete": 1, "insert": "b"}]},
+        headers={"Authorization": f"Bearer {student_token}"}
+    )
+    assert response.status_code == 403
+
+    response = client.patch(
+        "/api/modules/9999/content",
+        json={"version": 1, "edits": [{"offset": 0, "insert": "x"}]},
+        headers=headers
+    )
+    assert response.status_code == 404
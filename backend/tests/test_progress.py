@@ -0,0 +1,153 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from main import app
+from core.progress import ProgressBuffer, BufferFull
+from models import Course, CourseLevel, CourseModule, Lesson, User
+from models.progress import ProgressEvent, ProgressEventType
+from routers.progress import get_progress_buffer
+
+# Base de données de test en mémoire
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_progress.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@event.listens_for(engine, "connect")
+def _enforce_foreign_keys(dbapi_connection, connection_record):
+    # Comme PostgreSQL : une clé étrangère invalide fait échouer l'INSERT
+    dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+@pytest.fixture
+def buffer():
+    return ProgressBuffer(engine, flush_size=1000, max_size=5)
+
+@pytest.fixture
+def client(client, buffer):
+    app.dependency_overrides[get_progress_buffer] = lambda: buffer
+    yield client
+    del app.dependency_overrides[get_progress_buffer]
+
+@pytest.fixture
+def student_token(client):
+    """Créer un étudiant et retourner son token"""
+    client.post(
+        "/api/auth/register",
+        json={"email": "student@test.com", "password": "student123"}
+    )
+    response = client.post(
+        "/api/auth/login",
+        data={"username": "student@test.com", "password": "student123"}
+    )
+    return response.json()["access_token"]
+
+@pytest.fixture
+def targets(client):
+    """Créer un module et une leçon ; retourne leurs ids"""
+    db = TestingSessionLocal()
+    module = CourseModule(title="Intro", content="Bonjour")
+    course = Course(title="Cours", level=CourseLevel.beginner)
+    db.add_all([module, course])
+    db.flush()
+    lesson = Lesson(course_id=course.id, title="Leçon 1", order_index=1)
+    db.add(lesson)
+    db.commit()
+    ids = module.id, lesson.id
+    db.close()
+    return ids
+
+def test_events_are_buffered_then_flushed(client, buffer, student_token, targets):
+    """Test que les événements sont écrits par lot au flush"""
+    module_id, lesson_id = targets
+    occurred_at = (datetime.utcnow() - timedelta(days=1)).replace(hour=10, minute=0, second=0, microsecond=0)
+    response = client.post(
+        "/api/progress/events",
+        json={"events": [
+            {"event_type": "viewed", "module_id": module_id},
+            {"event_type": "time_spent", "lesson_id": lesson_id, "duration_seconds": 120},
+            {"event_type": "completed", "module_id": module_id, "occurred_at": occurred_at.isoformat() + "+02:00"},
+        ]},
+        headers={"Authorization": f"Bearer {student_token}"}
+    )
+    assert response.status_code == 202
+    assert response.json() == {"accepted": 3, "rejected": 0}
+    
+    db = TestingSessionLocal()
+    assert db.query(ProgressEvent).count() == 0
+    assert buffer.flush() == 3
+    events = db.query(ProgressEvent).order_by(ProgressEvent.occurred_at).all()
+    assert len(events) == 3
+    assert events[0].event_type == ProgressEventType.completed
+    assert events[0].occurred_at.hour == 8
+    db.close()
+
+def test_event_validation(client, student_token):
+    """Test de validation des événements"""
+    response = client.post(
+        "/api/progress/events",
+        json={"events": [{"event_type": "time_spent", "module_id": 1}]},
+        headers={"Authorization": f"Bearer {student_token}"}
+    )
+    assert response.status_code == 422
+    
+    response = client.post(
+        "/api/progress/events",
+        json={"events": [{"event_type": "viewed", "module_id": 1, "lesson_id": 1}]},
+        headers={"Authorization": f"Bearer {student_token}"}
+    )
+    assert response.status_code == 422
+
+def test_full_buffer_applies_backpressure(client, buffer, student_token, targets):
+    """Test que le tampon plein renvoie 503 avec Retry-After"""
+    module_id, _ = targets
+    buffer.add([{"user_id": 1, "module_id": 1, "event_type": ProgressEventType.viewed}] * 5)
+    with pytest.raises(BufferFull):
+        buffer.add([{"user_id": 1, "module_id": 1, "event_type": ProgressEventType.viewed}], timeout=0)
+    
+    response = client.post(
+        "/api/progress/events",
+        json={"events": [{"event_type": "viewed", "module_id": module_id}]},
+        headers={"Authorization": f"Bearer {student_token}"}
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+def test_unknown_targets_and_stale_dates_are_rejected(client, buffer, student_token, targets):
+    """Test qu'un module ou une leçon inconnus ne bloquent pas le reste du lot"""
+    module_id, lesson_id = targets
+    now = datetime.utcnow()
+    response = client.post(
+        "/api/progress/events",
+        json={"events": [
+            {"event_type": "viewed", "module_id": module_id},
+            {"event_type": "viewed", "module_id": 999},
+            {"event_type": "viewed", "lesson_id": 999},
+            {"event_type": "viewed", "module_id": module_id, "occurred_at": (now - timedelta(days=400)).isoformat()},
+            {"event_type": "viewed", "lesson_id": lesson_id, "occurred_at": (now + timedelta(days=400)).isoformat()},
+        ]},
+        headers={"Authorization": f"Bearer {student_token}"}
+    )
+    assert response.json() == {"accepted": 2, "rejected": 3}
+    assert buffer.flush() == 2
+
+    db = TestingSessionLocal()
+    # Date future ramenée à la réception
+    assert max(event.occurred_at for event in db.query(ProgressEvent)) <= datetime.utcnow()
+    db.close()
+
+def test_flush_discards_rows_rejected_by_the_database(client, buffer, targets):
+    """Test qu'une ligne invalide est écartée au flush sans bloquer les autres"""
+    module_id, _ = targets
+    db = TestingSessionLocal()
+    db.add(User(email="student@test.com", username="student", hashed_password="x"))
+    db.commit()
+    user_id = db.query(User.id).scalar()
+    # Utilisateur supprimé pendant que ses événements attendaient dans le tampon
+    events = [{"user_id": user_id, "module_id": module_id, "event_type": ProgressEventType.viewed}] * 2
+    buffer.add(events[:1] + [{"user_id": user_id + 1, "module_id": module_id, "event_type": ProgressEventType.viewed}] + events[1:])
+
+    assert buffer.flush() == 2
+    assert buffer.rejected == 1
+    assert len(buffer) == 0
+    assert db.query(ProgressEvent).count() == 2
+    db.close()
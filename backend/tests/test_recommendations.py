@@ -0,0 +1,85 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from main import app
+from core.recommendations import ItemSimilarityIndex, Recommender
+from models import Course, CourseLevel, Enrollment
+from routers.recommendations import get_recommender
+
+# Base de données de test en mémoire
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_recommendations.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture
+def recommender():
+    return Recommender(k=5)
+
+@pytest.fixture
+def client(client, recommender):
+    app.dependency_overrides[get_recommender] = lambda: recommender
+    yield client
+    del app.dependency_overrides[get_recommender]
+
+def test_similarity_index_ranks_co_enrolled_items():
+    """Test du classement par similarité cosinus"""
+    index = ItemSimilarityIndex(k=3)
+    index.update([(1, 10), (1, 20), (2, 10), (2, 20), (3, 10), (3, 30)])
+    assert [item for item, _ in index.similar(10, 3)] == [20, 30]
+    
+    # L'utilisateur 4 suit le cours 10 : on lui propose d'abord le cours 20
+    index.update([(4, 10)])
+    assert [item for item, _ in index.recommend(4, 2)] == [20, 30]
+    
+    # Mise à jour incrémentale : le cours 30 devient le plus proche de 10
+    index.update([(5, 10), (5, 30), (6, 10), (6, 30), (7, 10), (7, 30)])
+    assert index.similar(10, 1)[0][0] == 30
+
+def test_cold_start_returns_popular_items():
+    """Test des suggestions pour un utilisateur sans historique"""
+    index = ItemSimilarityIndex(k=3)
+    index.update([(1, 10), (2, 10), (3, 20)])
+    assert [item for item, _ in index.recommend(99, 2)] == [10, 20]
+
+def test_recommend_courses_endpoint(client, recommender):
+    """Test des suggestions de cours pour l'utilisateur connecté"""
+    response = client.post(
+        "/api/auth/register",
+        json={"email": "student@test.com", "password": "student123"}
+    )
+    student_id = response.json()["id"]
+    token = client.post(
+        "/api/auth/login",
+        data={"username": "student@test.com", "password": "student123"}
+    ).json()["access_token"]
+    
+    db = TestingSessionLocal()
+    courses = [Course(title=f"Cours {i}", level=CourseLevel.beginner) for i in range(3)]
+    db.add_all(courses)
+    db.flush()
+    first, second, third = (course.id for course in courses)
+    db.add_all([
+        Enrollment(user_id=100, course_id=first),
+        Enrollment(user_id=100, course_id=second),
+        Enrollment(user_id=101, course_id=first),
+        Enrollment(user_id=101, course_id=third),
+        Enrollment(user_id=102, course_id=first),
+        Enrollment(user_id=102, course_id=second),
+        Enrollment(user_id=student_id, course_id=first),
+    ])
+    db.commit()
+    recommender.refresh(db)
+    db.close()
+    
+    response = client.get(
+        "/api/recommendations/courses?limit=2",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["items"]] == [second, third]
+    
+    response = client.get(
+        f"/api/recommendations/courses/{first}/similar",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.json()["items"][0]["id"] == second
@@ -0,0 +1,48 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from db import Base
+from core import repository
+from models import User, RoleEnum, CourseModule
+from models.module import ModuleType
+
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    session.add_all([
+        User(username="alice", email="alice@test.com", hashed_password="x", role=RoleEnum.student),
+        User(username="bob", email="bob@test.com", hashed_password="x", role=RoleEnum.instructor),
+        CourseModule(title="Module", content="Contenu", type=ModuleType.text),
+    ])
+    session.commit()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+def test_user_lookups(db):
+    assert repository.get_user_by_email(db, "bob@test.com").username == "bob"
+    assert repository.get_user_by_email(db, "nobody@test.com") is None
+    assert repository.get_user_by_login(db, "alice").email == "alice@test.com"
+    assert repository.get_user_by_login(db, "alice@test.com").username == "alice"
+    assert repository.get_user_by_login(db, "carol") is None
+
+def test_lookups_return_identity_mapped_entities(db):
+    user = repository.get_user_by_email(db, "alice@test.com")
+    assert repository.get_user_by_login(db, "alice") is user
+    assert user.role == RoleEnum.student
+
+    module = db.query(CourseModule).first()
+    assert repository.get_module(db, module.id) is module
+    assert repository.get_module(db, module.id + 1) is None
+
+def test_prepared_statement_sql_uses_positional_parameters():
+    sql = repository.USER_BY_LOGIN.prepare_sql(postgresql.dialect())
+    assert sql.startswith("PREPARE user_by_login AS SELECT")
+    assert "users.email = $1 OR users.username = $1" in sql
+    assert "%(" not in sql
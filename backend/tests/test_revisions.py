@@ -0,0 +1,153 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import random
+from core.revisions import CHUNK_MAX_SIZE, CHUNK_MIN_SIZE, chunk_hash, patch_chunks, split_chunks, store_chunks
+from models import ContentChunk, ModuleRevision
+from schemas.module import ContentEdit
+
+# Base de données de test en mémoire
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_revisions.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def long_content(lines=400):
+    return "".join(f"Ligne {i} du cours : explication détaillée numéro {i * 7}.\n" for i in range(lines))
+
+def chunk_count():
+    db = TestingSessionLocal()
+    try:
+        return db.query(ContentChunk).count()
+    finally:
+        db.close()
+
+def test_split_chunks_is_lossless_and_content_defined():
+    content = long_content()
+    chunks = split_chunks(content)
+    assert "".join(chunks) == content
+    assert len(chunks) > 1
+    assert all(len(chunk) >= CHUNK_MIN_SIZE for chunk in chunks[:-1])
+
+    # Une insertion au milieu ne modifie que les morceaux voisins
+    edited = content[:5000] + "Ajout\n" + content[5000:]
+    assert len(set(split_chunks(edited)) - set(chunks)) <= 2
+
+    assert "".join(split_chunks("x" * 50000)) == "x" * 50000
+
+def apply(content, edits):
+    for edit in reversed(edits):
+        content = content[:edit.offset] + edit.insert + content[edit.offset + edit.delete:]
+    return content
+
+def test_patch_chunks_matches_a_full_split(client):
+    """Le redécoupage partiel donne les mêmes morceaux qu'un découpage complet"""
+    rng = random.Random(7)
+    content = long_content() + "x" * (CHUNK_MAX_SIZE * 2 + 100) + "\r\n" + long_content(50) + "fin sans retour"
+    db = TestingSessionLocal()
+    try:
+        for _ in range(200):
+            offsets = sorted(rng.sample(range(len(content) + 1), rng.randint(1, 3)))
+            edits = []
+            for offset in offsets:
+                if edits and offset < edits[-1].offset + edits[-1].delete:
+                    continue
+                delete = min(rng.choice([0, 0, 1, 40, 3000]), len(content) - offset)
+                insert = rng.choice(["", "!", "\n", "\r", "Nouvelle ligne\n", "y" * 20000])
+                edits.append(ContentEdit(offset=offset, delete=delete, insert=insert))
+            edited = apply(content, edits)
+            if not edited:
+                continue
+            previous = ModuleRevision(chunk_hashes=store_chunks(db, content))
+            assert patch_chunks(db, previous, edits) == [chunk_hash(chunk) for chunk in split_chunks(edited)]
+            content = edited
+    finally:
+        db.rollback()
+        db.close()
+
+def test_revisions_share_unchanged_chunks(client, admin_headers):
+    content = long_content()
+    module = client.post(
+        "/api/modules/",
+        json={"title": "Cours", "content": content, "type": "text"},
+        headers=admin_headers
+    ).json()
+    initial_chunks = chunk_count()
+    assert initial_chunks == len(set(split_chunks(content)))
+
+    for version in range(1, 6):
+        response = client.patch(
+            f"/api/modules/{module['id']}/content",
+            json={"version": version, "edits": [{"offset": 100 * version, "insert": "!"}]},
+            headers=admin_headers
+        )
+        assert response.status_code == 200
+
+    # Cinq modifications locales : au plus quelques morceaux nouveaux par version
+    assert chunk_count() <= initial_chunks + 5 * 2
+
+    response = client.get(f"/api/modules/{module['id']}/revisions", headers=admin_headers)
+    assert response.status_code == 200
+    assert [revision["version"] for revision in response.json()] == [6, 5, 4, 3, 2, 1]
+    assert "content" not in response.json()[0]
+
+    response = client.get(f"/api/modules/{module['id']}/revisions/1", headers=admin_headers)
+    assert response.json()["content"] == content
+
+def test_diff_and_restore_revision(client, admin_headers):
+    content = long_content()
+    module = client.post(
+        "/api/modules/",
+        json={"title": "Cours", "content": content, "type": "text"},
+        headers=admin_headers
+    ).json()
+    edited = content.replace("Ligne 200 ", "Ligne deux cents ")
+    client.put(
+        f"/api/modules/{module['id']}",
+        json={"title": "Cours corrigé", "content": edited},
+        headers=admin_headers
+    )
+
+    response = client.get(f"/api/modules/{module['id']}/revisions/2/diff", headers=admin_headers)
+    assert response.status_code == 200
+    diff = response.json()
+    assert diff["from_version"] == 1
+    assert len(diff["edits"]) == 1
+    edit = diff["edits"][0]
+    assert content[edit["offset"]:edit["offset"] + edit["delete"]].startswith("Ligne 200 ")
+    assert edit["insert"].startswith("Ligne deux cents ")
+
+    chunks_before = chunk_count()
+    response = client.post(f"/api/modules/{module['id']}/revisions/1/restore", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["version"] == 3
+    assert response.json()["title"] == "Cours"
+    assert response.json()["content"] == content
+    # La restauration réutilise les morceaux existants
+    assert chunk_count() == chunks_before
+
+    response = client.get(f"/api/modules/{module['id']}", headers=admin_headers)
+    assert response.json()["content"] == content
+
+    response = client.get(f"/api/modules/{module['id']}/revisions/3/diff?from_version=1", headers=admin_headers)
+    assert response.json()["edits"] == []
+
+def test_revisions_require_instructor_or_admin(client, admin_headers):
+    module = client.post(
+        "/api/modules/",
+        json={"title": "Cours", "content": "Contenu", "type": "text"},
+        headers=admin_headers
+    ).json()
+    client.post("/api/auth/register", json={"email": "student@test.com", "password": "student123"})
+    token = client.post(
+        "/api/auth/login",
+        data={"username": "student@test.com", "password": "student123"}
+    ).json()["access_token"]
+    response = client.get(
+        f"/api/modules/{module['id']}/revisions",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 403
+
+    response = client.get("/api/modules/9999/revisions", headers=admin_headers)
+    assert response.status_code == 404
+    response = client.get(f"/api/modules/{module['id']}/revisions/7", headers=admin_headers)
+    assert response.status_code == 404
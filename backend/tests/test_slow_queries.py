@@ -0,0 +1,51 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from core.slow_queries import redact_parameters, slow_query_log
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_slow_queries.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+slow_query_log.install(engine)
+
+@pytest.fixture
+def client(client, monkeypatch):
+    # Seuil nul : chaque instruction est « lente »
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 0)
+    slow_query_log.clear()
+    yield client
+    slow_query_log.clear()
+
+def test_slow_queries_are_recorded_with_route_and_redacted_parameters(client, admin_headers):
+    response = client.get("/api/diagnostics/slow-queries", params={"limit": 1000}, headers=admin_headers)
+    assert response.status_code == 200
+    samples = response.json()
+    login = [sample for sample in samples if sample["route"] == "POST /api/auth/login"]
+    assert login and login[0]["statement"].lstrip().startswith("SELECT")
+    assert login[0]["duration_ms"] >= 0
+    assert login[0]["explain"] is None
+    # Ni l'email ni le hachage du mot de passe ne sont conservés
+    assert "admin@test.com" not in response.text
+    assert "$2b$" not in response.text
+    # Les plus récents d'abord
+    assert samples[0]["recorded_at"] >= samples[-1]["recorded_at"]
+
+def test_slow_queries_require_admin(client, login):
+    client.post("/api/auth/register", json={"email": "alice@test.com", "username": "alice", "password": "password123"})
+    headers = login("alice@test.com", "password123")
+    assert client.get("/api/diagnostics/slow-queries", headers=headers).status_code == 403
+
+def test_threshold_and_ring_buffer(client, monkeypatch):
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 60_000)
+    client.get("/api/courses/1")
+    assert slow_query_log.samples() == []
+
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 0)
+    for _ in range(slow_query_log._samples.maxlen + 5):
+        client.get("/api/courses/1")
+    assert len(slow_query_log.samples()) == slow_query_log._samples.maxlen
+
+def test_redact_parameters():
+    assert redact_parameters({"email_1": "a@b.c", "param_1": 1}, False) == {"email_1": "str", "param_1": "int"}
+    assert redact_parameters(("a@b.c", None), False) == ["str", "NoneType"]
+    assert redact_parameters([("x", 1), ("y", 2)], True) == {"rows": 2, "first": ["str", "int"]}
@@ -0,0 +1,89 @@
+import json
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from core.cache import clear_all as clear_caches
+from core.tracing import FileExporter, InMemoryExporter, KIND_CLIENT, KIND_SERVER, tracer
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_tracing.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = InMemoryExporter()
+    monkeypatch.setattr(tracer, "exporter", exporter)
+    return exporter
+
+def _headers(client):
+    client.post("/api/auth/register", json={"email": "alice@test.com", "username": "alice", "password": "password123"})
+    response = client.post("/api/auth/login", data={"username": "alice@test.com", "password": "password123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def _attributes(span):
+    return {item["key"]: next(iter(item["value"].values())) for item in span["attributes"]}
+
+def test_request_spans_form_one_trace(client, exporter):
+    headers = _headers(client)
+    exporter.clear()
+    # Cache vidé : le chargement de l'utilisateur passe par la base
+    clear_caches()
+
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+    spans = list(exporter.spans)
+    root = next(span for span in spans if "parentSpanId" not in span)
+    assert root["name"] == "GET /api/auth/me"
+    assert root["kind"] == KIND_SERVER
+    assert _attributes(root)["http.status_code"] == "200"
+    assert {span["traceId"] for span in spans} == {root["traceId"]}
+
+    by_name = {span["name"]: span for span in spans}
+    assert {"auth.decode_token", "auth.load_user", "response.serialize", "response.render"} <= set(by_name)
+    query = next(span for span in spans if span["kind"] == KIND_CLIENT)
+    assert query["parentSpanId"] == by_name["auth.load_user"]["spanId"]
+    assert _attributes(query)["db.statement"].startswith("SELECT")
+    for span in spans:
+        assert int(span["startTimeUnixNano"]) <= int(span["endTimeUnixNano"])
+        assert int(root["startTimeUnixNano"]) <= int(span["startTimeUnixNano"])
+
+def test_password_hashing_and_errors_are_traced(client, exporter):
+    _headers(client)
+    login = [span for span in exporter.spans if span["name"] == "password.verify"]
+    assert _attributes(login[0])["password.scheme"] == "bcrypt"
+
+    exporter.clear()
+    assert client.get("/api/auth/me", headers={"Authorization": "Bearer invalid"}).status_code == 401
+    decode = next(span for span in exporter.spans if span["name"] == "auth.decode_token")
+    assert decode["status"]["code"] == 2
+
+def test_incoming_traceparent_is_continued(client, exporter):
+    trace_id, parent_id = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+    client.get("/health/live", headers={"traceparent": f"00-{trace_id}-{parent_id}-01"})
+    root = next(span for span in exporter.spans if span["kind"] == KIND_SERVER)
+    assert root["parentSpanId"] == parent_id
+    assert {span["traceId"] for span in exporter.spans} == {trace_id}
+
+def test_file_exporter_writes_otlp_lines(client, monkeypatch, tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = FileExporter(str(path))
+    monkeypatch.setattr(tracer, "exporter", exporter)
+
+    client.get("/health/live")
+    client.get("/health/live")
+    # Écrit par le thread de l'exportateur, pas pendant la requête
+    exporter.close()
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 2
+    request = json.loads(lines[0])
+    resource_spans = request["resourceSpans"][0]
+    assert resource_spans["resource"]["attributes"][0]["key"] == "service.name"
+    names = [span["name"] for span in resource_spans["scopeSpans"][0]["spans"]]
+    assert sorted(names) == ["GET /health/live", "response.render", "response.serialize"]
+
+def test_disabled_tracer_records_nothing(client, monkeypatch):
+    monkeypatch.setattr(tracer, "exporter", None)
+    with tracer.span("unused") as span:
+        assert span is None
+    assert client.get("/health/live").status_code == 200
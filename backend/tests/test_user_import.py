@@ -0,0 +1,105 @@
+import json
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from models.user import User, RoleEnum
+
+# Base de données de test en mémoire
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_user_import.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def test_import_csv_with_error_report(client, admin_token):
+    """Test d'import CSV avec lignes valides et invalides"""
+    csv_content = (
+        "email,username,password,role\n"
+        "alice@test.com,alice,password1,student\n"
+        "bob@test.com,bob,password2,instructor\n"
+        "not-an-email,carol,password3,student\n"
+        "alice@test.com,alice2,password4,student\n"
+        "admin@test.com,other,password5,student\n"
+        "dave@test.com,dave,short,student\n"
+    )
+    response = client.post(
+        "/api/auth/admin/users/import",
+        files={"file": ("users.csv", csv_content, "text/csv")},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["created"] == 2
+    assert report["failed"] == 4
+    errors = {error["row"]: error["detail"] for error in report["errors"]}
+    assert "email" in errors[3]
+    assert errors[4] == "Duplicate email in file"
+    assert errors[5] == "Email already registered"
+    assert "password" in errors[6]
+    
+    db = TestingSessionLocal()
+    bob = db.query(User).filter(User.email == "bob@test.com").first()
+    assert bob.role == RoleEnum.instructor
+    db.close()
+    
+    # Les comptes importés peuvent se connecter
+    response = client.post(
+        "/api/auth/login",
+        data={"username": "alice", "password": "password1"}
+    )
+    assert response.status_code == 200
+
+def test_import_ndjson_uses_default_role(client, admin_token):
+    """Test d'import NDJSON avec rôle par défaut et lignes mal formées"""
+    lines = [
+        json.dumps({"email": "eve@test.com", "password": "password1"}),
+        "{not json",
+        json.dumps({"email": "root@test.com", "password": "password1", "role": "admin"}),
+    ]
+    response = client.post(
+        "/api/auth/admin/users/import?default_role=instructor",
+        files={"file": ("users.ndjson", "\n".join(lines), "application/x-ndjson")},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["created"] == 1
+    assert [error["row"] for error in report["errors"]] == [2, 3]
+    
+    db = TestingSessionLocal()
+    eve = db.query(User).filter(User.email == "eve@test.com").first()
+    assert eve.role == RoleEnum.instructor
+    db.close()
+
+def test_import_rejects_unknown_format(client, admin_token):
+    """Test qu'un format non supporté est refusé"""
+    response = client.post(
+        "/api/auth/admin/users/import",
+        files={"file": ("users.xlsx", b"binary", "application/octet-stream")},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 400
+
+def test_import_reports_invalid_utf8_rows(client, admin_token):
+    """Test qu'une ligne mal encodée est une erreur de ligne, pas une erreur serveur"""
+    csv_content = (
+        b"email,username,password\n"
+        b"dave@test.com,dave,password1\n"
+        b"fr\xe9d@test.com,fred,password2\n"
+        b"gina@test.com,gina,password3\n"
+    )
+    response = client.post(
+        "/api/auth/admin/users/import",
+        files={"file": ("users.csv", csv_content, "text/csv")},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["created"] == 2
+    assert report["errors"] == [{"row": 2, "email": None, "detail": "Invalid UTF-8 encoding"}]
+
+    ndjson_content = b'{"email": "hugo@test.com", "password": "password1"}\n{"email": "\xff"}\n'
+    response = client.post(
+        "/api/auth/admin/users/import",
+        files={"file": ("users.ndjson", ndjson_content, "application/x-ndjson")},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.json()["created"] == 1
+    assert response.json()["errors"][0]["detail"] == "Invalid UTF-8 encoding"
@@ -0,0 +1,167 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from db import Base
+from core.security import build_password_context, pwd_context
+from core.users import UserConflict, conflicting_field, insert_user
+from models.user import User
+from schemas.user import UserRead
+
+# Base de données de test en mémoire
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_users.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def _register(client, email, username):
+    return client.post(
+        "/api/auth/register",
+        json={"email": email, "username": username, "password": "password123"}
+    )
+
+def test_register_conflicts_are_reported_by_field(client):
+    """Les violations d'unicité donnent les mêmes erreurs que les anciennes vérifications"""
+    created = _register(client, "alice@test.com", "alice")
+    assert created.status_code == 201
+    assert created.json()["role"] == "student"
+    assert created.json()["created_at"]
+
+    response = _register(client, "alice@test.com", "other")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered"
+
+    response = _register(client, "other@test.com", "alice")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Username already taken"
+
+    # La transaction annulée ne laisse pas la session inutilisable
+    assert _register(client, "bob@test.com", "bob").status_code == 201
+
+def test_single_admin_is_enforced_by_the_database(client, admin_headers):
+    response = client.post(
+        "/api/auth/create-first-admin",
+        json={"email": "second@test.com", "password": "admin123", "role": "admin"}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "An admin user already exists. Use /register-admin endpoint instead."
+
+    response = client.post(
+        "/api/auth/register-admin",
+        json={"email": "second@test.com", "password": "admin123", "role": "admin"},
+        headers=admin_headers
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "An admin user already exists. Only one admin is allowed."
+
+    response = client.post(
+        "/api/auth/register-admin",
+        json={"email": "teacher@test.com", "password": "teacher123", "role": "instructor"},
+        headers=admin_headers
+    )
+    assert response.status_code == 201
+    assert response.json()["role"] == "instructor"
+
+def test_insert_user_raises_conflict_without_prior_select():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        insert_user(db, email="dup@test.com", hashed_password="x")
+        db.commit()
+        with pytest.raises(UserConflict) as excinfo:
+            insert_user(db, email="dup@test.com", hashed_password="x")
+        assert excinfo.value.field == "email"
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+class _Diag:
+    def __init__(self, constraint_name):
+        self.constraint_name = constraint_name
+
+class _PostgresError(Exception):
+    def __init__(self, message, constraint_name):
+        super().__init__(message)
+        self.diag = _Diag(constraint_name)
+
+def test_conflicting_field_ignores_the_offending_value():
+    """Le message de PostgreSQL cite la valeur : un email contenant "username" reste un conflit d'email"""
+    orig = _PostgresError(
+        'duplicate key value violates unique constraint "ix_users_email"\n'
+        "DETAIL:  Key (email)=(username@x.com) already exists.",
+        "ix_users_email",
+    )
+    assert conflicting_field(IntegrityError("INSERT", {}, orig)) == "email"
+    orig = _PostgresError("duplicate key", "uq_users_single_admin")
+    assert conflicting_field(IntegrityError("UPDATE", {}, orig)) == "admin"
+    orig = Exception("UNIQUE constraint failed: users.username")
+    assert conflicting_field(IntegrityError("INSERT", {}, orig)) == "username"
+    orig = Exception("NOT NULL constraint failed: users.email")
+    assert conflicting_field(IntegrityError("INSERT", {}, orig)) is None
+
+def test_role_changes_use_conditional_update(client, admin_headers):
+    user_id = _register(client, "alice@test.com", "alice").json()["id"]
+    admin_id = client.get("/api/auth/me", headers=admin_headers).json()["id"]
+
+    response = client.put(f"/api/auth/admin/users/{user_id}/role?new_role=instructor", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["role"] == "instructor"
+
+    response = client.put(f"/api/auth/admin/users/{user_id}/role?new_role=admin", headers=admin_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "An admin user already exists. Only one admin is allowed."
+
+    response = client.put(f"/api/auth/admin/users/{admin_id}/role?new_role=student", headers=admin_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cannot demote the last admin user"
+
+    response = client.put("/api/auth/admin/users/9999/role?new_role=student", headers=admin_headers)
+    assert response.status_code == 404
+
+def test_profile_update_returns_updated_row(client, login):
+    _register(client, "alice@test.com", "alice")
+    _register(client, "bob@test.com", "bob")
+    headers = login("alice@test.com", "password123")
+
+    response = client.put("/api/auth/me", json={"username": "bob"}, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Username already taken"
+
+    response = client.put("/api/auth/me", json={"firstname": "Alice", "username": "alice2"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["firstname"] == "Alice"
+    assert response.json()["username"] == "alice2"
+    assert client.get("/api/auth/me", headers=headers).json()["username"] == "alice2"
+
+def test_login_rehashes_password_hashed_with_outdated_policy(client, login):
+    db = TestingSessionLocal()
+    outdated = build_password_context(bcrypt_rounds=4).hash("password123")
+    user = insert_user(db, email="legacy@test.com", hashed_password=outdated)
+    user_id, updated_at = user.id, user.updated_at
+    db.commit()
+    db.close()
+
+    assert pwd_context.needs_update(outdated)
+    login("legacy@test.com", "password123")
+
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.id == user_id).one()
+    assert user.hashed_password != outdated
+    assert not pwd_context.needs_update(user.hashed_password)
+    assert user.updated_at == updated_at
+    db.close()
+
+    # Le nouveau hachage vérifie toujours le même mot de passe, sans nouvelle mise à jour
+    assert login("legacy@test.com", "password123")
+
+def test_admin_user_list_matches_orm_serialization(client, admin_headers):
+    for index in range(3):
+        _register(client, f"user{index}@test.com", f"user{index}")
+    response = client.get("/api/auth/admin/users", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+
+    db = TestingSessionLocal()
+    expected = [UserRead.model_validate(user).model_dump(mode="json") for user in db.query(User).order_by(User.id)]
+    db.close()
+    assert response.json() == expected
+    assert "hashed_password" not in response.json()[0]
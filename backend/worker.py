@@ -0,0 +1,14 @@
+import logging
+import signal
+from db import SessionLocal
+from core.jobs import Worker
+# Enregistre les handlers de jobs
+import core.tasks  # noqa: F401
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+if __name__ == "__main__":
+    worker = Worker(SessionLocal)
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+    worker.run_forever()
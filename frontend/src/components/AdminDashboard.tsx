@@ -13,10 +13,13 @@ import {
   UserCheck
 } from 'lucide-react';
 import { useAuth } from '../context/AuthContext';
-import { healthApi } from '../services/api';
-import { modulesApi } from '../services/modules';
+import { batchApi } from '../services/batch';
+import { dashboardApi } from '../services/dashboard';
+import { subscribeToChanges } from '../services/events';
 import StatusIndicator from '../components/StatusIndicator';
 import type { ModuleList } from '../types/modules';
+import type { DashboardStats } from '../types/dashboard';
+import type { HealthResponse } from '../types/api';
 
 const AdminDashboard: React.FC = () => {
   const { user } = useAuth();
@@ -32,35 +35,41 @@ const AdminDashboard: React.FC = () => {
   });
   
   useEffect(() => {
+    const applyStats = (stats: DashboardStats) => {
+      setModules(stats.recent_modules);
+      setPlatformStats({ 
+        totalModules: stats.total_modules, 
+        videoModules: stats.modules_by_type.video, 
+        textModules: stats.modules_by_type.text,
+        totalUsers: stats.total_users,
+        activeUsers: stats.active_users_7d
+      });
+    };
+
+    const refreshStats = async () => {
+      try {
+        applyStats(await dashboardApi.getStats());
+      } catch (error) {
+        console.error('Erreur rafraîchissement statistiques:', error);
+      }
+    };
+
     const fetchData = async () => {
       try {
         setLoading(true);
         
-        // Fetch health and modules
-        const [healthResponse, modulesResponse] = await Promise.allSettled([
-          healthApi.check(),
-          modulesApi.fetchModules({ skip: 0, limit: 100 }) // Get all modules for stats
+        // Santé et statistiques en une seule requête groupée
+        const [healthResponse, statsResponse] = await batchApi.run([
+          { path: '/health' },
+          { path: '/api/dashboard/stats' }
         ]);
 
-        if (healthResponse.status === 'fulfilled') {
-          setHealth(healthResponse.value);
+        if (healthResponse.status === 200) {
+          setHealth(healthResponse.body as HealthResponse);
         }
 
-        if (modulesResponse.status === 'fulfilled') {
-          setModules(modulesResponse.value);
-          
-          // Calculate platform statistics
-          const totalModules = modulesResponse.value.length;
-          const videoModules = modulesResponse.value.filter(m => m.type === 'video').length;
-          const textModules = modulesResponse.value.filter(m => m.type === 'text').length;
-          
-          setPlatformStats({ 
-            totalModules, 
-            videoModules, 
-            textModules,
-            totalUsers: 150, // Mock data
-            activeUsers: 89  // Mock data
-          });
+        if (statsResponse.status === 200) {
+          applyStats(statsResponse.body as DashboardStats);
         }
       } catch (error) {
         console.error('Erreur chargement dashboard:', error);
@@ -70,6 +79,19 @@ const AdminDashboard: React.FC = () => {
     };
 
     fetchData();
+
+    // Recharger les statistiques quand le catalogue change (regroupé sur une seconde)
+    let refreshTimer: ReturnType<typeof setTimeout> | undefined;
+    const scheduleRefresh = () => {
+      clearTimeout(refreshTimer);
+      refreshTimer = setTimeout(refreshStats, 1000);
+    };
+    const unsubscribe = subscribeToChanges(scheduleRefresh, scheduleRefresh);
+
+    return () => {
+      clearTimeout(refreshTimer);
+      unsubscribe();
+    };
   }, []);
 
   const getDisplayName = () => {
@@ -320,7 +342,7 @@ const AdminDashboard: React.FC = () => {
                 <div className="flex items-center justify-between">
                   <span className="text-gray-700 dark:text-dark-secondary font-medium">Taux d'engagement</span>
                   <span className="text-xl font-bold text-green-600 dark:text-gold-400">
-                    {Math.round((platformStats.activeUsers / platformStats.totalUsers) * 100)}%
+                    {platformStats.totalUsers ? Math.round((platformStats.activeUsers / platformStats.totalUsers) * 100) : 0}%
                   </span>
                 </div>
               </div>
@@ -15,9 +15,11 @@ import {
 } from 'lucide-react';
 import { useAuth } from '../context/AuthContext';
 import { healthApi } from '../services/api';
-import { modulesApi } from '../services/modules';
+import { dashboardApi } from '../services/dashboard';
+import { subscribeToChanges } from '../services/events';
 import StatusIndicator from '../components/StatusIndicator';
 import type { ModuleList } from '../types/modules';
+import type { DashboardStats } from '../types/dashboard';
 
 const InstructorDashboard: React.FC = () => {
   const { user } = useAuth();
@@ -27,28 +29,39 @@ const InstructorDashboard: React.FC = () => {
   const [moduleStats, setModuleStats] = useState({ total: 0, video: 0, text: 0 });
   
   useEffect(() => {
+    const applyStats = (stats: DashboardStats) => {
+      setModules(stats.recent_modules);
+      setModuleStats({
+        total: stats.total_modules,
+        video: stats.modules_by_type.video,
+        text: stats.modules_by_type.text
+      });
+    };
+
+    const refreshStats = async () => {
+      try {
+        applyStats(await dashboardApi.getStats());
+      } catch (error) {
+        console.error('Erreur rafraîchissement statistiques:', error);
+      }
+    };
+
     const fetchData = async () => {
       try {
         setLoading(true);
         
-        // Fetch health and modules
-        const [healthResponse, modulesResponse] = await Promise.allSettled([
+        // Fetch health and server-side statistics
+        const [healthResponse, statsResponse] = await Promise.allSettled([
           healthApi.check(),
-          modulesApi.fetchModules({ skip: 0, limit: 100 }) // Get all modules for stats
+          dashboardApi.getStats()
         ]);
 
         if (healthResponse.status === 'fulfilled') {
           setHealth(healthResponse.value);
         }
 
-        if (modulesResponse.status === 'fulfilled') {
-          setModules(modulesResponse.value);
-          
-          // Calculate module statistics
-          const total = modulesResponse.value.length;
-          const video = modulesResponse.value.filter(m => m.type === 'video').length;
-          const text = modulesResponse.value.filter(m => m.type === 'text').length;
-          setModuleStats({ total, video, text });
+        if (statsResponse.status === 'fulfilled') {
+          applyStats(statsResponse.value);
         }
       } catch (error) {
         console.error('Erreur chargement dashboard:', error);
@@ -58,6 +71,19 @@ const InstructorDashboard: React.FC = () => {
     };
 
     fetchData();
+
+    // Recharger les statistiques quand le catalogue change (regroupé sur une seconde)
+    let refreshTimer: ReturnType<typeof setTimeout> | undefined;
+    const scheduleRefresh = () => {
+      clearTimeout(refreshTimer);
+      refreshTimer = setTimeout(refreshStats, 1000);
+    };
+    const unsubscribe = subscribeToChanges(scheduleRefresh, scheduleRefresh);
+
+    return () => {
+      clearTimeout(refreshTimer);
+      unsubscribe();
+    };
   }, []);
 
   const getDisplayName = () => {
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import type { HealthResponse, CoursesResponse } from '../types/api';
+import type { HealthResponse, CoursesResponse, CourseFilters } from '../types/api';
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
@@ -16,8 +16,8 @@ export const healthApi = {
 };
 
 export const coursesApi = {
-  getAll: async (): Promise<CoursesResponse> => {
-    const response = await api.get<CoursesResponse>('/api/courses');
+  getAll: async (filters: CourseFilters = {}): Promise<CoursesResponse> => {
+    const response = await api.get<CoursesResponse>('/api/courses', { params: filters });
     return response.data;
   },
 };
@@ -0,0 +1,12 @@
+import api from './api';
+import type { BatchSubRequest, BatchSubResponse } from '../types/api';
+
+export const batchApi = {
+  // Plusieurs lectures en un seul aller-retour ; une réponse par sous-requête, dans l'ordre
+  run: async (requests: BatchSubRequest[]): Promise<BatchSubResponse[]> => {
+    const response = await api.post<{ responses: BatchSubResponse[] }>('/api/batch', { requests });
+    return response.data.responses;
+  }
+};
+
+export default batchApi;
@@ -0,0 +1,12 @@
+import api from './api';
+import type { DashboardStats } from '../types/dashboard';
+
+export const dashboardApi = {
+  // Récupérer les statistiques précalculées (instructeur ou admin)
+  getStats: async (): Promise<DashboardStats> => {
+    const response = await api.get<DashboardStats>('/api/dashboard/stats');
+    return response.data;
+  }
+};
+
+export default dashboardApi;
@@ -0,0 +1,30 @@
+export interface ChangeEvent {
+  resource: 'modules' | 'courses' | 'dashboard';
+  // null : toute la ressource a changé
+  id: number | null;
+}
+
+const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
+
+// S'abonner aux changements poussés par le serveur ; retourne la fonction de désabonnement.
+// `onReset` est appelé quand des événements ont pu être manqués : tout recharger.
+export const subscribeToChanges = (
+  onChange: (event: ChangeEvent) => void,
+  onReset: () => void = () => {}
+): (() => void) => {
+  const token = localStorage.getItem('auth_token');
+  if (!token || typeof EventSource === 'undefined') {
+    return () => {};
+  }
+
+  // EventSource ne permet pas d'envoyer d'en-tête Authorization
+  const source = new EventSource(`${API_URL}/api/events/stream?token=${encodeURIComponent(token)}`);
+  source.addEventListener('change', (message) => {
+    onChange(JSON.parse((message as MessageEvent).data) as ChangeEvent);
+  });
+  source.addEventListener('reset', () => onReset());
+
+  return () => source.close();
+};
+
+export default subscribeToChanges;
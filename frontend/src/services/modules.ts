@@ -1,5 +1,14 @@
 import api from './api';
-import type { Module, ModuleList, ModuleCreate, ModuleUpdate, ModuleStats, PaginationParams } from '../types/modules';
+import type {
+  Module,
+  ModuleList,
+  ModuleCreate,
+  ModuleUpdate,
+  ModuleContentPatch,
+  ModulePatchResult,
+  ModuleStats,
+  PaginationParams,
+} from '../types/modules';
 
 // Configuration de l'intercepteur pour ajouter le token d'auth
 api.interceptors.request.use(
@@ -43,6 +52,12 @@ export const modulesApi = {
     return response.data;
   },
 
+  // Modifier une partie du contenu (409 si le module a changé depuis `version`)
+  patchModuleContent: async (id: number, data: ModuleContentPatch): Promise<ModulePatchResult> => {
+    const response = await api.patch<ModulePatchResult>(`/api/modules/${id}/content`, data);
+    return response.data;
+  },
+
   // Supprimer un module
   deleteModule: async (id: number): Promise<{ message: string }> => {
     const response = await api.delete<{ message: string }>(`/api/modules/${id}`);
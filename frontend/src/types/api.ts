@@ -9,11 +9,36 @@ export interface Course {
   description?: string;
 }
 
+export interface CourseFilters {
+  level?: Course['level'];
+  year?: number;
+  q?: string;
+  limit?: number;
+  offset?: number;
+}
+
+export interface CourseFacets {
+  level: Record<Course['level'], number>;
+  year: Record<string, number>;
+}
+
 export interface CoursesResponse {
   courses: Course[];
+  total: number;
+  facets: CourseFacets;
 }
 
 export interface ApiError {
   message: string;
   status?: number;
-} 
\ No newline at end of file
+}
+
+export interface BatchSubRequest {
+  method?: 'GET';
+  path: string;
+}
+
+export interface BatchSubResponse<T = unknown> {
+  status: number;
+  body: T;
+}
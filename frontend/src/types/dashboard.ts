@@ -0,0 +1,18 @@
+import type { ModuleList, ModuleType } from './modules';
+
+export interface CourseEnrollmentCount {
+  course_id: number;
+  title: string;
+  enrollments: number;
+}
+
+export interface DashboardStats {
+  total_modules: number;
+  modules_by_type: Record<ModuleType, number>;
+  total_users: number;
+  users_by_role: Record<'student' | 'instructor' | 'admin', number>;
+  active_users_7d: number;
+  enrollments_by_course: CourseEnrollmentCount[];
+  recent_modules: ModuleList[];
+  refreshed_at: string | null;
+}
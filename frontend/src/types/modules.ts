@@ -5,6 +5,7 @@ export interface Module {
   title: string;
   content: string;
   type: ModuleType;
+  version: number;
   created_at: string;
   updated_at?: string;
 }
@@ -28,6 +29,24 @@ export interface ModuleUpdate {
   type?: ModuleType;
 }
 
+// Positions en caractères Unicode (points de code), relatives à la version de départ
+export interface ContentEdit {
+  offset: number;
+  delete?: number;
+  insert?: string;
+}
+
+export interface ModuleContentPatch {
+  version: number;
+  edits: ContentEdit[];
+}
+
+export interface ModulePatchResult {
+  id: number;
+  version: number;
+  updated_at: string;
+}
+
 export interface ModulesResponse {
   modules: ModuleList[];
   total: number;